@@ -0,0 +1,79 @@
+"""Throughput of the sync graph vs. the async graph against a fake chat model with injected latency.
+
+Usage:
+    python -m benchmarks.bench_async_graph --emails 200 --latency 0.05 --threads 16
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from simple_agent.agent import create_graph
+from simple_agent.llm import set_model_registry
+from tests.stubs.fake_chat_model import LatencyFakeChatModel, fake_model_registry
+
+
+def _emails(count: int):
+    return [
+        {
+            "email_subject": f"URGENT: outage {i}" if i % 2 else f"Feature idea {i}",
+            "email_body": "Production is down." if i % 2 else "Dark mode would be nice.",
+            "email_to": "support@company.com",
+            "email_summary": None,
+            "requires_attention": None,
+            "jira_ticket_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def run_sync_sequential(emails) -> float:
+    graph = create_graph()
+    start = time.perf_counter()
+    for email in emails:
+        graph.invoke(email)
+    return time.perf_counter() - start
+
+
+def run_sync_threaded(emails, threads: int) -> float:
+    graph = create_graph()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(graph.invoke, emails))
+    return time.perf_counter() - start
+
+
+def run_async(emails) -> float:
+    graph = create_graph(use_async=True)
+
+    async def run_all():
+        await asyncio.gather(*(graph.ainvoke(email) for email in emails))
+
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency in seconds")
+    parser.add_argument("--threads", type=int, default=16, help="Thread pool size for the threaded sync run")
+    args = parser.parse_args()
+
+    set_model_registry(fake_model_registry(LatencyFakeChatModel(latency=args.latency)))
+    emails = _emails(args.emails)
+
+    print(f"{args.emails} emails, {args.latency * 1000:.0f} ms fake LLM latency")
+    print(f"{'mode':<28}{'seconds':>10}{'emails/s':>12}")
+    for mode, elapsed in [
+        ("sync sequential", run_sync_sequential(emails)),
+        (f"sync {args.threads} threads", run_sync_threaded(emails, args.threads)),
+        ("async single event loop", run_async(emails)),
+    ]:
+        print(f"{mode:<28}{elapsed:>10.2f}{args.emails / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Incident index signature and lookup latency as the sliding window grows.
+
+Usage:
+    python -m benchmarks.bench_incident_dedup --window 50000
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from simple_agent.dedup import IncidentIndex, minhash
+
+VOCABULARY_SIZE = 20_000
+WORDS_PER_EMAIL = 45
+
+
+def _corpus(count: int, rng: random.Random):
+    # Zipf-distributed vocabulary, so common words are shared across emails the way real mail is.
+    vocabulary = [f"w{i}" for i in range(VOCABULARY_SIZE)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY_SIZE)))
+    return [" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=WORDS_PER_EMAIL)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = _corpus(args.window + args.queries, rng)
+
+    start = time.perf_counter()
+    signatures = [minhash(text) for text in texts]
+    sign_time = (time.perf_counter() - start) / len(texts)
+
+    index = IncidentIndex(max_entries=args.window)
+    print(f"signature: {sign_time * 1e3:.3f} ms/email")
+    print(f"{'window':>8}{'lookup ms':>11}{'matches':>9}")
+    checkpoints = sorted({size for size in (1_000, 10_000, args.window) if size <= args.window})
+    inserted = 0
+    for size in checkpoints:
+        for i in range(inserted, size):
+            if index.match_or_reserve(signatures[i]) is None:
+                index.record(signatures[i], f"JIRA-{i}")
+        inserted = size
+
+        queries = signatures[args.window:]
+        start = time.perf_counter()
+        matches = sum(index.lookup(query) is not None for query in queries)
+        lookup_time = (time.perf_counter() - start) / len(queries)
+        print(f"{len(index):>8}{lookup_time * 1e3:>11.4f}{matches:>9}")
+
+
+if __name__ == "__main__":
+    main()
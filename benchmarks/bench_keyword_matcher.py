@@ -0,0 +1,74 @@
+"""Compiled keyword matcher vs. the per-keyword substring loop at 10, 100 and 10,000 keywords.
+
+Usage:
+    python -m benchmarks.bench_keyword_matcher --emails 2000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from tests.stubs.keyword_matcher import KeywordMatcher
+from tests.stubs.stub_nodes import URGENT_KEYWORDS
+
+
+def _keywords(count: int, rng: random.Random):
+    keywords = list(URGENT_KEYWORDS)
+    while len(keywords) < count:
+        keywords.append("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12))))
+    return keywords[:count]
+
+
+def _emails(count: int, rng: random.Random):
+    words = ["server", "meeting", "notes", "invoice", "thanks", "please", "review", "dashboard", "account"]
+    return [
+        {
+            "email_subject": f"{rng.choice(words)} {rng.choice(words)}",
+            "email_body": " ".join(rng.choice(words) for _ in range(60)) + (" urgent" if i % 10 == 0 else ""),
+        }
+        for i in range(count)
+    ]
+
+
+def _loop(keywords, emails):
+    results = []
+    for email in emails:
+        combined_text = f"{email['email_subject'].lower()} {email['email_body'].lower()}"
+        results.append(any(keyword in combined_text for keyword in keywords))
+    return results
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    emails = _emails(args.emails, rng)
+
+    print(f"{args.emails} emails")
+    print(f"{'keywords':>9}{'loop s':>10}{'per-email s':>13}{'batch s':>10}{'compile s':>11}{'speedup':>9}")
+    for count in (10, 100, 10_000):
+        keywords = _keywords(count, rng)
+        compile_time, matcher = _time(KeywordMatcher, keywords)
+        loop_time, expected = _time(_loop, keywords, emails)
+        single_time, single = _time(
+            lambda: [matcher.matches(f"{e['email_subject']} {e['email_body']}") for e in emails]
+        )
+        batch_time, batch = _time(matcher.matches_emails, emails)
+        assert single == batch == expected
+        print(
+            f"{count:>9}{loop_time:>10.4f}{single_time:>13.4f}{batch_time:>10.4f}"
+            f"{compile_time:>11.4f}{loop_time / batch_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Body tokens sent to the LLM nodes before and after preprocessing, on eval/dataset.jsonl.
+
+Reports the dataset as stored and with each email wrapped in a realistic reply thread
+(signature, disclaimer and `--history` quoted earlier messages). Triage accuracy can only
+change if cleaning alters the newest message, so the report also counts emails whose
+cleaned thread differs from the original body. `python -m eval.runner --compare-preprocess`
+measures the accuracy side: requires_attention correctness and the summary judge scores
+with and without the preprocess_email node, against the real models.
+
+Usage:
+    python -m benchmarks.bench_preprocess --history 4
+"""
+
+import argparse
+import json
+import time
+
+from simple_agent.preprocess import clean_email_body, estimate_tokens, prompt_body
+from simple_agent.ratelimit import CHARS_PER_TOKEN
+from tests.stubs.email_threads import with_thread_noise
+
+LLM_NODES = ("summarize_email", "check_email_attention")
+
+
+def _load(path: str):
+    with open(path) as f:
+        return [json.loads(line)["inputs"] for line in f if line.strip()]
+
+
+def _report(label: str, emails, originals):
+    raw_tokens = sum(estimate_tokens(email["email_body"]) * len(LLM_NODES) for email in emails)
+    start = time.perf_counter()
+    states = [dict(email, clean_email_body=clean_email_body(email["email_body"])) for email in emails]
+    elapsed = time.perf_counter() - start
+    sent_tokens = sum(estimate_tokens(prompt_body(state, node)) for state in states for node in LLM_NODES)
+    changed = sum(state["clean_email_body"] != original for state, original in zip(states, originals))
+    saved = raw_tokens - sent_tokens
+    print(
+        f"{label:<10}{raw_tokens:>12}{sent_tokens:>12}{saved:>10}{saved / max(raw_tokens, 1):>9.1%}"
+        f"{changed:>10}{elapsed / len(emails) * 1e6:>12.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="eval/dataset.jsonl")
+    parser.add_argument("--history", type=int, default=4, help="quoted earlier messages per threaded email")
+    args = parser.parse_args()
+
+    emails = _load(args.dataset)
+    bodies = [email["email_body"] for email in emails]
+    threaded = [
+        dict(email, email_body=with_thread_noise(body, (bodies[i + 1:] + bodies[:i])[:args.history]))
+        for i, (email, body) in enumerate(zip(emails, bodies))
+    ]
+
+    print(f"{len(emails)} emails, body tokens across {', '.join(LLM_NODES)} (~{CHARS_PER_TOKEN} chars/token)")
+    print(f"{'':<10}{'raw tokens':>12}{'sent tokens':>12}{'saved':>10}{'saved %':>9}{'changed':>10}{'clean µs':>12}")
+    _report("dataset", emails, bodies)
+    _report("threaded", threaded, bodies)
+
+
+if __name__ == "__main__":
+    main()
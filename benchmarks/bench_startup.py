@@ -0,0 +1,127 @@
+"""Worker cold start: import time of simple_agent.agent, first graph compile and first invoke.
+
+Each run is a fresh interpreter. `python -X importtime` supplies the per-module breakdown;
+the thresholds turn the report into a regression guard (exit status 1 when exceeded),
+and the lazy-import invariants are always checked.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 1500 --max-first-invoke-ms 250
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules only the production LLM nodes need; importing the graph must not pull them in.
+LAZY_MODULES = ("langchain_openai", "openai", "langchain_core.language_models.chat_models")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import simple_agent.agent as agent
+imported = time.perf_counter()
+lazy = {name: name in sys.modules for name in %(lazy)r}
+compiled_at_import = agent._graph is not None
+
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+from simple_agent.metrics import GraphMetrics
+email = {"email_subject": "URGENT: server down", "email_body": "Production is down.", "email_to": "a@b.com"}
+compile_start = time.perf_counter()
+graph = agent.create_graph(
+    summarize_email=summarize_email_stubbed,
+    check_email_attention=check_email_attention_stubbed,
+    metrics=GraphMetrics(),
+)
+compiled = time.perf_counter()
+graph.invoke(email)
+invoked = time.perf_counter()
+graph.invoke(email)
+second = time.perf_counter()
+default_start = time.perf_counter()
+agent.get_graph()
+default_compiled = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "compile_ms": (compiled - compile_start) * 1000,
+    "first_invoke_ms": (invoked - compiled) * 1000,
+    "second_invoke_ms": (second - invoked) * 1000,
+    "default_graph_ms": (default_compiled - default_start) * 1000,
+    "imported_lazy_modules": [name for name, loaded in lazy.items() if loaded],
+    "llm_modules_after_stub_invoke": [name for name in %(lazy)r if name in sys.modules],
+    "compiled_at_import": compiled_at_import,
+}))
+"""
+
+
+def _probe():
+    code = _PROBE % {"lazy": LAZY_MODULES}
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _importtime(top: int):
+    """Self and cumulative microseconds per module from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import simple_agent.agent"],
+        check=True, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    total = next(cumulative for name, _, cumulative in rows if name == "simple_agent.agent")
+    own = [row for row in rows if row[0].startswith("simple_agent")]
+    heaviest = sorted((row for row in rows if not row[0].startswith(" ")), key=lambda row: -row[2])[:top]
+    return total, own, heaviest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest top-level imports to list")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-invoke-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [_probe() for _ in range(args.runs)]
+    total_us, own, heaviest = _importtime(args.top)
+
+    print(f"{args.runs} cold starts (median ms)")
+    for key in ("import_ms", "compile_ms", "first_invoke_ms", "second_invoke_ms", "default_graph_ms"):
+        print(f"  {key:<20}{statistics.median(run[key] for run in runs):>10.1f}")
+
+    print(f"\n-X importtime: simple_agent.agent {total_us / 1000:.1f} ms cumulative")
+    print(f"  {'module':<44}{'self ms':>9}{'cum ms':>9}")
+    for name, self_us, cumulative_us in heaviest:
+        print(f"  {name.strip():<44}{self_us / 1000:>9.1f}{cumulative_us / 1000:>9.1f}")
+    print("  ---- simple_agent modules")
+    for name, self_us, cumulative_us in own:
+        print(f"  {name.strip():<44}{self_us / 1000:>9.1f}{cumulative_us / 1000:>9.1f}")
+
+    failures = []
+    first = runs[0]
+    if first["compiled_at_import"]:
+        failures.append("importing simple_agent.agent compiled the default graph")
+    if first["imported_lazy_modules"]:
+        failures.append(f"importing simple_agent.agent loaded {', '.join(first['imported_lazy_modules'])}")
+    if first["llm_modules_after_stub_invoke"]:
+        failures.append(f"a stubbed invoke loaded {', '.join(first['llm_modules_after_stub_invoke'])}")
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_invoke_ms = statistics.median(run["first_invoke_ms"] for run in runs)
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import {import_ms:.1f} ms > {args.max_import_ms} ms")
+    if args.max_first_invoke_ms is not None and first_invoke_ms > args.max_first_invoke_ms:
+        failures.append(f"first invoke {first_invoke_ms:.1f} ms > {args.max_first_invoke_ms} ms")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Memory held by a queue of preprocessed emails: EmailState dicts vs CompactEmailState records.
+
+Builds a synthetic set (default 1M) from the eval dataset's emails, each with a unique body
+and a freshly parsed subject and recipient, and keeps the preprocessed states in a list, as
+simple_agent.batch.process_emails / aprocess_emails do with their input. tracemalloc reports the bytes still held once the parsed
+records are dropped, body text included. The dataset bodies have nothing to strip, so
+clean_email_body returns the body itself (tests/test_state.py checks this); it is not
+re-run per email here.
+
+Usage:
+    python -m benchmarks.bench_state_memory --emails 1000000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from simple_agent.state import CompactEmailState
+
+
+def _load(path: str):
+    with open(path) as f:
+        return [json.loads(line)["inputs"] for line in f if line.strip()]
+
+
+def _fresh(text: str) -> str:
+    return (text + " ")[:-1]
+
+
+def _records(templates, count: int):
+    """Parsed records as a reader would produce them: every string is a new object."""
+    for i in range(count):
+        email = templates[i % len(templates)]
+        yield f"{email['email_body']} (ref {i})", _fresh(email["email_subject"]), _fresh(email["email_to"])
+
+
+def _copied_dict(body: str, subject: str, to: str):
+    # Before preprocessing reused unchanged bodies, the cleaned body was a second, equal string.
+    return {"email_body": body, "email_subject": subject, "email_to": to, "clean_email_body": _fresh(body),
+            "email_summary": None, "requires_attention": None, "jira_ticket_id": None}
+
+
+def _dict(body: str, subject: str, to: str):
+    return {"email_body": body, "email_subject": subject, "email_to": to, "clean_email_body": body,
+            "email_summary": None, "requires_attention": None, "jira_ticket_id": None}
+
+
+def _compact(body: str, subject: str, to: str):
+    return CompactEmailState(body, subject, to, clean_email_body=body)
+
+
+def _measure(build, templates, count: int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = list(_records(templates, count))
+    states = [build(*record) for record in records]
+    del records
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    del states
+    return held, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default="eval/dataset.jsonl")
+    parser.add_argument("--emails", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    templates = _load(args.dataset)
+    print(f"{args.emails:,} synthetic emails from {len(templates)} templates")
+    print(f"{'representation':<34}{'MB held':>10}{'bytes/email':>13}{'vs dict':>9}{'build s':>9}")
+    baseline = None
+    for label, build in (
+        ("EmailState dict, copied clean body", _copied_dict),
+        ("EmailState dict", _dict),
+        ("CompactEmailState", _compact),
+    ):
+        held, elapsed = _measure(build, templates, args.emails)
+        baseline = baseline or held
+        print(
+            f"{label:<34}{held / 1e6:>10.1f}{held / args.emails:>13.0f}"
+            f"{held / baseline:>9.0%}{elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
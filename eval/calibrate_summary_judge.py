@@ -0,0 +1,100 @@
+"""
+Calibration report: the combined summary judge against the four single-criterion judges.
+
+Runs each dataset example through the graph once, scores its summary with every
+single-criterion evaluator and with summary_multi_criteria_evaluator, and reports per
+criterion the mean scores, exact agreement, mean absolute difference and how often both
+judges agree on the SUMMARY_EVALUATORS threshold. Calls the real judge model.
+
+Usage:
+    python -m eval.calibrate_summary_judge --workers 8 --output calibration.json
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eval.dataset import initial_state, load_dataset
+from eval.evaluators import (
+    SUMMARY_EVALUATORS,
+    get_judge_model,
+    summary_completeness_evaluator,
+    summary_conciseness_evaluator,
+    summary_faithfulness_evaluator,
+    summary_multi_criteria_evaluator,
+    summary_triage_usefulness_evaluator,
+)
+from simple_agent.agent import get_graph
+
+# The single-criterion LLM judges (the eval suite scores conciseness locally)
+SINGLE_CRITERION_JUDGES = {
+    "faithfulness": summary_faithfulness_evaluator,
+    "completeness": summary_completeness_evaluator,
+    "conciseness": summary_conciseness_evaluator,
+    "triage_usefulness": summary_triage_usefulness_evaluator,
+}
+
+
+def _judge_separately(run, example):
+    start = time.perf_counter()
+    scores = {name: judge(run, example)["score"] for name, judge in SINGLE_CRITERION_JUDGES.items()}
+    return scores, time.perf_counter() - start
+
+
+def _judge_combined(run, example):
+    start = time.perf_counter()
+    results = {result["key"]: result["score"] for result in summary_multi_criteria_evaluator(run, example)["results"]}
+    scores = {name: results[f"summary_{name}"] for name, _, _ in SUMMARY_EVALUATORS}
+    return scores, time.perf_counter() - start
+
+
+def _calibrate(example):
+    run = get_graph().invoke(initial_state(example))
+    separate, separate_seconds = _judge_separately(run, example)
+    combined, combined_seconds = _judge_combined(run, example)
+    return {
+        "email_subject": example["inputs"]["email_subject"],
+        "email_summary": run.get("email_summary"),
+        "separate": separate,
+        "combined": combined,
+        "separate_seconds": separate_seconds,
+        "combined_seconds": combined_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="examples judged concurrently")
+    parser.add_argument("--output", default=None, help="write per-example scores as JSON")
+    args = parser.parse_args()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        rows = list(pool.map(_calibrate, load_dataset()))
+
+    count = len(rows)
+    print(f"{count} examples, judge model {get_judge_model()}")
+    print(f"{'criterion':<20}{'separate':>10}{'combined':>10}{'exact':>8}{'mean |d|':>10}{'pass agree':>12}")
+    for name, _, threshold in SUMMARY_EVALUATORS:
+        separate = [row["separate"][name] for row in rows]
+        combined = [row["combined"][name] for row in rows]
+        exact = sum(a == b for a, b in zip(separate, combined))
+        diff = sum(abs(a - b) for a, b in zip(separate, combined))
+        passes = sum((a >= threshold) == (b >= threshold) for a, b in zip(separate, combined))
+        print(
+            f"{name:<20}{sum(separate) / count:>10.2f}{sum(combined) / count:>10.2f}"
+            f"{exact / count:>8.0%}{diff / count:>10.2f}{passes / count:>12.0%}"
+        )
+    print(
+        f"{'judge calls':<20}{count * len(SUMMARY_EVALUATORS):>10}{count:>10}\n"
+        f"{'judge seconds':<20}{sum(row['separate_seconds'] for row in rows):>10.1f}"
+        f"{sum(row['combined_seconds'] for row in rows):>10.1f}"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Deterministic sentence counting and filler detection for summary conciseness."""
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+_SEPARATOR = "\x00"
+
+# Words that end in a period without ending the sentence. Titles always precede a name;
+# the rest may also close a sentence when the next word is capitalized.
+TITLES = frozenset({"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "sgt", "capt", "gen", "rev"})
+ABBREVIATIONS = TITLES | frozenset({
+    "vs", "etc", "inc", "ltd", "co", "corp", "llc", "approx", "dept", "est", "fig", "no", "nos",
+    "vol", "ref", "min", "max", "avg", "ext", "tel", "misc", "jan", "feb", "mar", "apr", "jun",
+    "jul", "aug", "sep", "sept", "oct", "nov", "dec", "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+})
+
+# A sentence terminator (ellipsis first) with any closing quotes or brackets, followed by
+# whitespace or the end of the text, or a line break that starts a bulleted line.
+_BOUNDARY = re.compile(
+    r"(?P<term>\.{3}|…|[.!?]+)[\"'”’)\]]*(?=\s|\x00|$)"
+    r"|(?P<newline>\n)(?=[ \t]*(?P<bullet>[-*•]|\d+[.)])?)"
+)
+_WORD_BEFORE = re.compile(r"([A-Za-z](?:[A-Za-z.]*[A-Za-z])?)$")
+_DOTTED = re.compile(r"^(?:[a-z]\.)+[a-z]$")
+_NEXT_CHAR = re.compile(r"\s*(.)", re.S)
+_CONTENT = re.compile(r"\w")
+
+GREETINGS = ("hi", "hello", "hey", "dear", "greetings", "good morning", "good afternoon", "good evening")
+FILLER_PHRASES = (
+    "i hope this email finds you well",
+    "i hope this message finds you well",
+    "hope you are doing well",
+    "hope you're doing well",
+    "just wanted to",
+    "just a quick note",
+    "thank you for reaching out",
+    "thanks for reaching out",
+    "thanks in advance",
+    "please let me know if you have any questions",
+    "feel free to reach out",
+    "needless to say",
+    "it is worth noting that",
+    "it's worth noting that",
+    "to summarize",
+    "in summary",
+    "basically",
+    "best regards",
+    "kind regards",
+)
+_FILLER = re.compile(
+    r"(?:^|(?<=\x00)|(?<=[.!?]\s))\s*(?P<greeting>" + "|".join(re.escape(g) for g in GREETINGS) + r")\b"
+    r"|\b(?P<phrase>" + "|".join(re.escape(p) for p in FILLER_PHRASES) + r")\b",
+    re.IGNORECASE,
+)
+
+
+_SCORE_BUCKETS = (1.0, 0.5, 0.0)
+
+
+def conciseness_score(sentence_count: int, filler: bool = False) -> float:
+    """
+    Score a sentence count: 1-3 is ideal, 4 is acceptable, others are poor.
+
+    Filler or a greeting drops the score one bucket.
+    """
+    if 1 <= sentence_count <= 3:
+        bucket = 0
+    elif sentence_count == 4:
+        bucket = 1
+    else:
+        bucket = 2
+    if filler:
+        bucket += 1
+    return _SCORE_BUCKETS[min(bucket, len(_SCORE_BUCKETS) - 1)]
+
+
+@dataclass(frozen=True)
+class ConcisenessAssessment:
+    """
+    Local conciseness verdict for one summary.
+
+    `min_count` / `max_count` bound the sentence count over the boundaries that could be
+    read either way (an abbreviation before a capital, an ellipsis, a bare line break);
+    the assessment is confident when every reading gets the same score. Any filler
+    found costs one score bucket.
+    """
+    sentence_count: int
+    min_count: int
+    max_count: int
+    filler: Tuple[str, ...]
+
+    @property
+    def score(self) -> float:
+        return conciseness_score(self.sentence_count, bool(self.filler))
+
+    @property
+    def confident(self) -> bool:
+        filler = bool(self.filler)
+        return conciseness_score(self.min_count, filler) == conciseness_score(self.max_count, filler)
+
+    @property
+    def is_concise(self) -> bool:
+        return 1 <= self.sentence_count <= 3 and not self.filler
+
+    def describe(self) -> str:
+        count = str(self.sentence_count)
+        if self.min_count != self.max_count:
+            count += f" (could be read as {self.min_count}-{self.max_count})"
+        filler = f"Filler: {', '.join(self.filler)}." if self.filler else "No filler or greeting."
+        return f"Sentence count: {count}. {filler}"
+
+
+def _boundary(haystack: str, match: re.Match) -> Tuple[bool, bool]:
+    """Decide one candidate boundary: (splits here, could be read the other way)."""
+    following = _NEXT_CHAR.match(haystack, match.end())
+    next_char = following.group(1) if following else _SEPARATOR
+    at_end = next_char == _SEPARATOR
+
+    if match.group("newline"):
+        if match.group("bullet"):
+            return True, False
+        # A bare line break inside a sentence, or one sentence per line without punctuation
+        return False, not at_end
+
+    term = match.group("term")
+    if at_end:
+        return True, False
+    if term[0] in "!?":
+        # '"Is it down?" the customer asked.' stays one sentence
+        return (False, False) if next_char.islower() else (True, False)
+    if term in ("...", "…"):
+        # An ellipsis before a capital usually ends the sentence; before lowercase it trails off.
+        return (True, True) if next_char.isupper() else (False, False)
+    if term != ".":
+        return True, False
+
+    word = _WORD_BEFORE.search(haystack, max(0, match.start() - 32), match.start())
+    token = word.group(1).lower() if word else ""
+    if token in TITLES:
+        return False, False
+    if token in ABBREVIATIONS or _DOTTED.match(token) or (len(token) == 1 and word.group(1).isupper()):
+        # "e.g. the", "J. Smith" do not split; "at Acme Inc. The team" might
+        return (False, True) if next_char.isupper() else (False, False)
+    if next_char.islower():
+        return False, True
+    return True, False
+
+
+def assess_conciseness_batch(summaries: Sequence[str]) -> List[ConcisenessAssessment]:
+    """
+    Assess every summary with one boundary scan and one filler scan over the joined batch.
+
+    Matches are mapped back to their summary by offset, as KeywordMatcher.matches_batch does.
+    """
+    starts = []
+    position = 0
+    for summary in summaries:
+        starts.append(position)
+        position += len(summary) + 1
+    haystack = _SEPARATOR.join(summaries)
+
+    splits: List[List[int]] = [[] for _ in summaries]
+    ambiguous_splits = [0] * len(summaries)
+    ambiguous_joins = [0] * len(summaries)
+    for match in _BOUNDARY.finditer(haystack):
+        index = bisect.bisect_right(starts, match.start()) - 1
+        splits_here, ambiguous = _boundary(haystack, match)
+        if splits_here:
+            splits[index].append(match.end())
+            ambiguous_splits[index] += ambiguous
+        elif ambiguous:
+            ambiguous_joins[index] += 1
+
+    filler: List[List[str]] = [[] for _ in summaries]
+    for match in _FILLER.finditer(haystack):
+        index = bisect.bisect_right(starts, match.start()) - 1
+        phrase = (match.group("greeting") or match.group("phrase")).lower()
+        if phrase not in filler[index]:
+            filler[index].append(phrase)
+
+    assessments = []
+    for index, summary in enumerate(summaries):
+        start = starts[index]
+        edges = [start] + [end for end in splits[index] if end < start + len(summary)] + [start + len(summary)]
+        count = sum(1 for a, b in zip(edges, edges[1:]) if _CONTENT.search(haystack, a, b))
+        assessments.append(ConcisenessAssessment(
+            sentence_count=count,
+            min_count=max(count - ambiguous_splits[index], min(count, 1)),
+            max_count=count + ambiguous_joins[index],
+            filler=tuple(filler[index]),
+        ))
+    return assessments
+
+
+def assess_conciseness(summary: str) -> ConcisenessAssessment:
+    """Assess a single summary."""
+    return assess_conciseness_batch([summary])[0]
@@ -0,0 +1,104 @@
+"""
+Agreement report: the local conciseness evaluator against the LLM conciseness judge.
+
+Runs each dataset example through the graph once, counts every summary's sentences with
+eval.conciseness (one batch pass) and with judge_conciseness, and reports how often the
+sentence counts, scores and is_concise verdicts agree, how many summaries are
+low-confidence (sent to the judge by local_summary_conciseness_evaluator) and what each
+side costs. --include-bodies also scores the raw email bodies, which have the greetings,
+sign-offs and abbreviations that generated summaries rarely do. Calls the real judge model.
+
+Usage:
+    python -m eval.conciseness_agreement --workers 8 --include-bodies --output agreement.json
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eval.dataset import initial_state, load_dataset
+from eval.conciseness import assess_conciseness_batch, conciseness_score
+from eval.evaluators import get_judge_model, judge_conciseness
+from simple_agent.agent import get_graph
+
+
+def _summarize(example):
+    return get_graph().invoke(initial_state(example)).get("email_summary") or ""
+
+
+def _judge(text):
+    start = time.perf_counter()
+    response = judge_conciseness(text)
+    return response, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="graph runs and judge calls in flight")
+    parser.add_argument("--include-bodies", action="store_true", help="also score the raw email bodies")
+    parser.add_argument("--output", default=None, help="write per-text counts and verdicts as JSON")
+    args = parser.parse_args()
+
+    examples = load_dataset()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        texts = [("summary", text) for text in pool.map(_summarize, examples)]
+        if args.include_bodies:
+            texts += [("body", example["inputs"]["email_body"]) for example in examples]
+        judged = list(pool.map(_judge, [text for _, text in texts]))
+
+    start = time.perf_counter()
+    assessments = assess_conciseness_batch([text for _, text in texts])
+    local_seconds = time.perf_counter() - start
+
+    rows = []
+    for (kind, text), (response, seconds), assessment in zip(texts, judged, assessments):
+        rows.append({
+            "kind": kind,
+            "text": text,
+            "local_count": assessment.sentence_count,
+            "local_range": [assessment.min_count, assessment.max_count],
+            "local_filler": list(assessment.filler),
+            "local_concise": assessment.is_concise,
+            "confident": assessment.confident,
+            "judge_count": response.sentence_count,
+            "judge_concise": response.is_concise,
+            "judge_seconds": seconds,
+        })
+
+    count = len(rows)
+    confident = [row for row in rows if row["confident"]]
+
+    def share(selected, agree):
+        return f"{sum(agree(row) for row in selected) / len(selected):.0%}" if selected else "-"
+
+    def same_count(row):
+        return row["local_count"] == row["judge_count"]
+
+    def same_score(row):
+        return conciseness_score(row["local_count"]) == conciseness_score(row["judge_count"])
+
+    def same_verdict(row):
+        return row["local_concise"] == row["judge_concise"]
+
+    print(f"{count} texts, judge model {get_judge_model()}")
+    print(f"{'':<22}{'all':>8}{'confident':>11}")
+    for label, agree in (("sentence count", same_count), ("score", same_score), ("is_concise", same_verdict)):
+        print(f"{label:<22}{share(rows, agree):>8}{share(confident, agree):>11}")
+    print(f"{'within one sentence':<22}{share(rows, lambda row: abs(row['local_count'] - row['judge_count']) <= 1):>8}")
+    print(f"{'low confidence':<22}{count - len(confident):>8}  (judged by the LLM fallback)")
+    print(
+        f"{'local seconds':<22}{local_seconds:>8.4f}\n"
+        f"{'judge seconds':<22}{sum(row['judge_seconds'] for row in rows):>8.1f}"
+    )
+    for row in rows:
+        if not same_score(row):
+            print(f"  {row['kind']}: local {row['local_count']} {row['local_range']} vs judge {row['judge_count']}: {row['text'][:80]!r}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
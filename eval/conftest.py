@@ -4,6 +4,10 @@ import os
 
 import pytest
 
+from eval.llm_cache import LLMResponseStore, caching_model_registry
+from eval.run_cache import GraphRunCache
+from simple_agent.llm import set_model_registry
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -12,6 +16,14 @@ def pytest_addoption(parser):
         default=None,
         help="LLM model to use for judge evaluations (default: gpt-4o-mini)"
     )
+    parser.addoption(
+        "--summary-judge",
+        action="store",
+        choices=["combined", "separate"],
+        default="separate",
+        help="Score the four summary criteria with one judge call per criterion (default) "
+             "or with one combined judge call per example"
+    )
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -20,3 +32,28 @@ def set_judge_model(request):
     if model:
         os.environ["LLM_JUDGE_MODEL"] = model
 
+
+@pytest.fixture(scope="session", autouse=True)
+def llm_response_cache():
+    """
+    With EVAL_LLM_CACHE=<dir> set, every node and judge LLM call goes through the shared
+    on-disk response cache; EVAL_LLM_CACHE_MODE=offline fails on a miss instead of calling the API.
+    """
+    store = LLMResponseStore.from_env()
+    if store is None:
+        yield None
+        return
+    registry = caching_model_registry(store)
+    previous = set_model_registry(registry)
+    yield store
+    set_model_registry(previous)
+    registry.close()
+
+
+@pytest.fixture(scope="session")
+def graph_runs(tmp_path_factory):
+    """Graph runs and judgments shared by every test in the session, so each example runs once."""
+    basetemp = tmp_path_factory.getbasetemp()
+    # Under pytest-xdist each worker gets its own basetemp inside the session's shared one.
+    shared = basetemp.parent if os.environ.get("PYTEST_XDIST_WORKER") else basetemp
+    return GraphRunCache(shared / "graph_runs")
@@ -0,0 +1,33 @@
+"""The eval dataset and the graph input built from each example, shared by the eval suite and the CLIs."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_DATASET = Path(__file__).parent / "dataset.jsonl"
+
+
+def load_dataset(path: Path = DEFAULT_DATASET) -> List[Dict[str, Any]]:
+    """Load `{"inputs", "outputs"}` examples from a JSONL dataset."""
+    examples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                examples.append({
+                    "inputs": data["inputs"],
+                    "outputs": data["outputs"],
+                })
+    return examples
+
+
+def initial_state(example: Dict[str, Any]) -> Dict[str, Any]:
+    """Graph input for a dataset example."""
+    return {
+        "email_subject": example["inputs"]["email_subject"],
+        "email_body": example["inputs"]["email_body"],
+        "email_to": example["inputs"]["email_to"],
+        "requires_attention": None,
+        "jira_ticket_id": None,
+        "email_summary": None,
+    }
@@ -1,12 +1,16 @@
 """Custom evaluators for the email classification graph."""
 
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel
 
+from eval.conciseness import assess_conciseness_batch, conciseness_score
+from simple_agent.llm import get_chat_model
+from simple_agent.preclassifier import PreClassifier
+from simple_agent.preprocess import prompt_body
+
 DEFAULT_JUDGE_MODEL = "gpt-4o-mini"
 
 
@@ -66,6 +70,37 @@ def should_ticket_be_created_evaluator(run: Dict[str, Any], example: Dict[str, A
     }
 
 
+def pre_classifier_agreement_evaluator(
+    run: Dict[str, Any], example: Dict[str, Any], pre_classifier: Optional[PreClassifier] = None
+) -> Dict[str, Any]:
+    """
+    Evaluates if the deterministic pre-classifier agrees with the LLM classifier.
+    
+    Args:
+        run: The LLM classification output, containing requires_attention
+        example: The example from the dataset, containing the email inputs
+        pre_classifier: Pre-classifier to evaluate (defaults to the default rules)
+    
+    Returns:
+        Dictionary with 'key', 'score' (1 if the local decision agrees with the LLM,
+        0 if it disagrees, None if the email was escalated) and 'comment'
+    """
+    pre_classifier = pre_classifier or PreClassifier()
+    inputs = example["inputs"]
+    result = pre_classifier.classify(inputs["email_subject"], prompt_body(inputs, "check_email_attention"))
+    
+    if not result.decided:
+        score = None
+    else:
+        score = 1 if result.requires_attention == run.get("requires_attention") else 0
+    
+    return {
+        "key": "pre_classifier_agreement",
+        "score": score,
+        "comment": f"local={result.requires_attention} score={result.score} rules={list(result.matched_rules)}",
+    }
+
+
 # =============================================================================
 # LLM-as-Judge Evaluators for Email Summary
 # =============================================================================
@@ -100,22 +135,15 @@ class TriageResponse(BaseModel):
     reasoning: str
 
 
-def summary_faithfulness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Evaluate if the summary is faithful to the original email (no hallucinations).
-    
-    Args:
-        run: The run output containing email_summary
-        example: The example containing original email inputs
-    
-    Returns:
-        Dictionary with 'key', 'score' (0 or 1), and 'comment'
-    """
-    email_subject = example["inputs"]["email_subject"]
-    email_body = example["inputs"]["email_body"]
-    summary = run.get("email_summary", "")
-    
-    instructions = """You are evaluating whether an email summary is faithful to the original email.
+class SummaryJudgeResponse(BaseModel):
+    """Response schema for judging all four summary criteria in one call."""
+    faithfulness: FaithfulnessResponse
+    completeness: CompletenessResponse
+    conciseness: ConcisenessResponse
+    triage_usefulness: TriageResponse
+
+
+FAITHFULNESS_INSTRUCTIONS = """You are evaluating whether an email summary is faithful to the original email.
 
 A summary is FAITHFUL if:
 - All claims in the summary can be verified from the original email
@@ -127,22 +155,72 @@ A summary is NOT FAITHFUL if:
 - It misrepresents the intent or content of the email
 - It exaggerates or downplays the severity inappropriately"""
 
-    msg = f"""Original Email Subject: {email_subject}
-Original Email Body: {email_body}
+COMPLETENESS_INSTRUCTIONS = """You are evaluating whether an email summary is complete.
 
-Generated Summary: {summary}
+A complete summary should capture:
+1. The main topic or issue being discussed
+2. Any specific requests or problems mentioned (if present in the original)
+3. The urgency or tone (if the email conveys urgency, frustration, etc.)
 
-Is this summary faithful to the original email?"""
+IMPORTANT: Only score based on elements that ARE present in the original email.
+If the original email has no specific requests, problems, or urgency, the summary 
+should NOT be penalized for not including them. A simple thank-you email or 
+informational update that captures the main topic should score 3/3.
+
+Score 0-3 based on how many relevant elements are captured."""
+
+CONCISENESS_INSTRUCTIONS = """You are evaluating whether an email summary is appropriately concise.
+
+A concise summary should be:
+- 2-3 sentences long
+- Free of unnecessary filler or greeting phrases
+- Direct and to the point
+
+Count the sentences in the summary."""
+
+TRIAGE_USEFULNESS_INSTRUCTIONS = """You are a support team manager evaluating email summaries for ticket triage.
 
-    llm = ChatOpenAI(model=get_judge_model(), temperature=0).with_structured_output(FaithfulnessResponse)
+A useful summary for triage should:
+- Quickly convey what the sender needs or what the email is about
+- Help prioritize the email's urgency (or indicate it's low priority if applicable)
+- Be clear enough that an agent doesn't need to read the full email
+
+NOTE: Not all emails are customer support requests. For internal emails (team updates, 
+meeting notes) or simple informational emails (thank you notes, positive feedback), 
+evaluate based on whether the summary clearly conveys the main point. These emails 
+should score well if the summary is clear and accurate, even without customer-specific needs.
+
+Rate clarity 1-5 (5 = perfectly clear, 1 = confusing/unhelpful)."""
+
+MULTI_CRITERIA_INSTRUCTIONS = f"""You are evaluating an email summary against four independent criteria.
+Judge each criterion on its own, as if it were the only one asked, and fill in its section
+of the response.
+
+## faithfulness
+{FAITHFULNESS_INSTRUCTIONS}
+
+## completeness
+{COMPLETENESS_INSTRUCTIONS}
+
+## conciseness
+{CONCISENESS_INSTRUCTIONS}
+
+## triage_usefulness
+{TRIAGE_USEFULNESS_INSTRUCTIONS}"""
+
+
+def _judge(schema, instructions: str, msg: str):
+    llm = get_chat_model(get_judge_model(), temperature=0, schema=schema)
     
     messages = [
         SystemMessage(content=instructions),
         HumanMessage(content=msg),
     ]
     
-    response = llm.invoke(messages)
-    
+    return llm.invoke(messages)
+
+
+def _faithfulness_result(response: FaithfulnessResponse) -> Dict[str, Any]:
     return {
         "key": "summary_faithfulness",
         "score": 1 if response.is_faithful else 0,
@@ -150,34 +228,70 @@ Is this summary faithful to the original email?"""
     }
 
 
-def summary_completeness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
+def _completeness_result(response: CompletenessResponse) -> Dict[str, Any]:
+    return {
+        "key": "summary_completeness",
+        "score": response.overall_score / 3,  # Normalize to 0-1
+        "comment": response.reasoning,
+    }
+
+
+def _conciseness_result(response: ConcisenessResponse) -> Dict[str, Any]:
+    return {
+        "key": "summary_conciseness",
+        "score": conciseness_score(response.sentence_count),
+        "comment": f"Sentence count: {response.sentence_count}. {response.reasoning}",
+    }
+
+
+def _triage_usefulness_result(response: TriageResponse) -> Dict[str, Any]:
+    return {
+        "key": "summary_triage_usefulness",
+        "score": response.clarity_score / 5,  # Normalize to 0-1
+        "comment": response.reasoning,
+    }
+
+
+def summary_faithfulness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Evaluate if the summary captures all key information from the email.
+    Evaluate if the summary is faithful to the original email (no hallucinations).
     
     Args:
         run: The run output containing email_summary
         example: The example containing original email inputs
     
     Returns:
-        Dictionary with 'key', 'score' (0-1 normalized), and 'comment'
+        Dictionary with 'key', 'score' (0 or 1), and 'comment'
     """
     email_subject = example["inputs"]["email_subject"]
     email_body = example["inputs"]["email_body"]
     summary = run.get("email_summary", "")
-    
-    instructions = """You are evaluating whether an email summary is complete.
 
-A complete summary should capture:
-1. The main topic or issue being discussed
-2. Any specific requests or problems mentioned (if present in the original)
-3. The urgency or tone (if the email conveys urgency, frustration, etc.)
+    msg = f"""Original Email Subject: {email_subject}
+Original Email Body: {email_body}
 
-IMPORTANT: Only score based on elements that ARE present in the original email.
-If the original email has no specific requests, problems, or urgency, the summary 
-should NOT be penalized for not including them. A simple thank-you email or 
-informational update that captures the main topic should score 3/3.
+Generated Summary: {summary}
 
-Score 0-3 based on how many relevant elements are captured."""
+Is this summary faithful to the original email?"""
+
+    response = _judge(FaithfulnessResponse, FAITHFULNESS_INSTRUCTIONS, msg)
+    return _faithfulness_result(response)
+
+
+def summary_completeness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate if the summary captures all key information from the email.
+    
+    Args:
+        run: The run output containing email_summary
+        example: The example containing original email inputs
+    
+    Returns:
+        Dictionary with 'key', 'score' (0-1 normalized), and 'comment'
+    """
+    email_subject = example["inputs"]["email_subject"]
+    email_body = example["inputs"]["email_body"]
+    summary = run.get("email_summary", "")
 
     msg = f"""Original Email Subject: {email_subject}
 Original Email Body: {email_body}
@@ -186,20 +300,8 @@ Generated Summary: {summary}
 
 Evaluate the completeness of this summary."""
 
-    llm = ChatOpenAI(model=get_judge_model(), temperature=0).with_structured_output(CompletenessResponse)
-    
-    messages = [
-        SystemMessage(content=instructions),
-        HumanMessage(content=msg),
-    ]
-    
-    response = llm.invoke(messages)
-    
-    return {
-        "key": "summary_completeness",
-        "score": response.overall_score / 3,  # Normalize to 0-1
-        "comment": response.reasoning,
-    }
+    response = _judge(CompletenessResponse, COMPLETENESS_INSTRUCTIONS, msg)
+    return _completeness_result(response)
 
 
 def summary_conciseness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
@@ -213,44 +315,71 @@ def summary_conciseness_evaluator(run: Dict[str, Any], example: Dict[str, Any])
     Returns:
         Dictionary with 'key', 'score' (0-1), and 'comment'
     """
-    summary = run.get("email_summary", "")
-    
-    instructions = """You are evaluating whether an email summary is appropriately concise.
+    return _conciseness_result(judge_conciseness(run.get("email_summary", "")))
 
-A concise summary should be:
-- 2-3 sentences long
-- Free of unnecessary filler or greeting phrases
-- Direct and to the point
-
-Count the sentences in the summary."""
 
+def judge_conciseness(summary: str) -> ConcisenessResponse:
+    """Ask the judge model to count the summary's sentences and judge its conciseness."""
     msg = f"""Generated Summary: {summary}
 
 Count the sentences and evaluate conciseness."""
 
-    llm = ChatOpenAI(model=get_judge_model(), temperature=0).with_structured_output(ConcisenessResponse)
+    return _judge(ConcisenessResponse, CONCISENESS_INSTRUCTIONS, msg)
+
+
+def local_summary_conciseness_batch(
+    runs: Sequence[Dict[str, Any]],
+    examples: Sequence[Dict[str, Any]],
+    llm_fallback: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Score conciseness for a batch of summaries without the LLM judge.
+
+    Sentences are counted by eval.conciseness in one pass over the whole batch and scored
+    with the judge's rule (conciseness_score), one bucket lower when filler is found. When an ambiguous boundary (an abbreviation
+    before a capital, an ellipsis, a bare line break) could change the score, the summary
+    is sent to summary_conciseness_evaluator instead, unless llm_fallback is False.
     
-    messages = [
-        SystemMessage(content=instructions),
-        HumanMessage(content=msg),
-    ]
+    Args:
+        runs: Run outputs containing email_summary
+        examples: The matching examples, passed on to the fallback judge
+        llm_fallback: Ask the LLM judge about low-confidence summaries
+    
+    Returns:
+        One dictionary with 'key', 'score' (0-1), 'comment' and 'source' ('local' or 'llm') per run
+    """
+    assessments = assess_conciseness_batch([run.get("email_summary") or "" for run in runs])
+    results = []
+    for run, example, assessment in zip(runs, examples, assessments):
+        if llm_fallback and not assessment.confident:
+            result = summary_conciseness_evaluator(run, example)
+            result["source"] = "llm"
+        else:
+            result = {
+                "key": "summary_conciseness",
+                "score": assessment.score,
+                "comment": assessment.describe(),
+                "source": "local",
+            }
+        results.append(result)
+    return results
+
+
+def local_summary_conciseness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate if the summary is appropriately concise, counting sentences locally.
     
-    response = llm.invoke(messages)
+    Drop-in for summary_conciseness_evaluator: same key and score scale, and the LLM judge
+    is only called when the local sentence count is ambiguous.
     
-    # Score based on sentence count: 1-3 is ideal, 4 is acceptable, others are poor
-    sentence_count = response.sentence_count
-    if 1 <= sentence_count <= 3:
-        score = 1.0
-    elif sentence_count == 4:
-        score = 0.5
-    else:
-        score = 0.0
+    Args:
+        run: The run output containing email_summary
+        example: The example (only used by the fallback judge)
     
-    return {
-        "key": "summary_conciseness",
-        "score": score,
-        "comment": f"Sentence count: {response.sentence_count}. {response.reasoning}",
-    }
+    Returns:
+        Dictionary with 'key', 'score' (0-1), 'comment' and 'source'
+    """
+    return local_summary_conciseness_batch([run], [example])[0]
 
 
 def summary_triage_usefulness_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
@@ -266,37 +395,62 @@ def summary_triage_usefulness_evaluator(run: Dict[str, Any], example: Dict[str,
     """
     email_subject = example["inputs"]["email_subject"]
     summary = run.get("email_summary", "")
-    
-    instructions = """You are a support team manager evaluating email summaries for ticket triage.
-
-A useful summary for triage should:
-- Quickly convey what the sender needs or what the email is about
-- Help prioritize the email's urgency (or indicate it's low priority if applicable)
-- Be clear enough that an agent doesn't need to read the full email
-
-NOTE: Not all emails are customer support requests. For internal emails (team updates, 
-meeting notes) or simple informational emails (thank you notes, positive feedback), 
-evaluate based on whether the summary clearly conveys the main point. These emails 
-should score well if the summary is clear and accurate, even without customer-specific needs.
-
-Rate clarity 1-5 (5 = perfectly clear, 1 = confusing/unhelpful)."""
 
     msg = f"""Email Subject: {email_subject}
 Generated Summary: {summary}
 
 Would this summary help a support agent quickly triage this ticket?"""
 
-    llm = ChatOpenAI(model=get_judge_model(), temperature=0).with_structured_output(TriageResponse)
+    response = _judge(TriageResponse, TRIAGE_USEFULNESS_INSTRUCTIONS, msg)
+    return _triage_usefulness_result(response)
+
+
+def summary_multi_criteria_evaluator(run: Dict[str, Any], example: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate faithfulness, completeness, conciseness and triage usefulness in one judge call.
     
-    messages = [
-        SystemMessage(content=instructions),
-        HumanMessage(content=msg),
-    ]
+    The email and summary are sent once and the judge fills one SummaryJudgeResponse
+    section per criterion. Each criterion is scored exactly as its single-criterion
+    evaluator scores it and reported under the same feedback key.
     
-    response = llm.invoke(messages)
+    Args:
+        run: The run output containing email_summary
+        example: The example containing original email inputs
     
+    Returns:
+        Dictionary with 'results': one {'key', 'score', 'comment'} entry per criterion,
+        in the LangSmith multi-score evaluator format
+    """
+    email_subject = example["inputs"]["email_subject"]
+    email_body = example["inputs"]["email_body"]
+    summary = run.get("email_summary", "")
+
+    msg = f"""Original Email Subject: {email_subject}
+Original Email Body: {email_body}
+
+Generated Summary: {summary}
+
+Evaluate this summary on faithfulness, completeness, conciseness (count the sentences) and triage usefulness."""
+
+    response = _judge(SummaryJudgeResponse, MULTI_CRITERIA_INSTRUCTIONS, msg)
     return {
-        "key": "summary_triage_usefulness",
-        "score": response.clarity_score / 5,  # Normalize to 0-1
-        "comment": response.reasoning,
+        "results": [
+            _faithfulness_result(response.faithfulness),
+            _completeness_result(response.completeness),
+            _conciseness_result(response.conciseness),
+            _triage_usefulness_result(response.triage_usefulness),
+        ]
     }
+
+
+# (criterion, evaluator, pass threshold) for every summary criterion; each is reported
+# under the feedback key summary_<criterion>.
+SUMMARY_EVALUATORS = [
+    ("faithfulness", summary_faithfulness_evaluator, 0.8),
+    ("completeness", summary_completeness_evaluator, 0.6),
+    ("conciseness", local_summary_conciseness_evaluator, 0.8),
+    ("triage_usefulness", summary_triage_usefulness_evaluator, 0.6),
+]
+
+# Deterministic evaluators that never read the combined judge's result
+LOCAL_SUMMARY_EVALUATORS = {local_summary_conciseness_evaluator}
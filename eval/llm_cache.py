@@ -0,0 +1,189 @@
+"""
+Content-addressed LLM response cache for the eval suite, safe under pytest-xdist.
+
+Every chat completion request is hashed (method, path, canonical JSON body; headers such
+as the API key are ignored) and its response stored as one JSON file named by the hash.
+Files are written atomically, and a per-hash file lock makes sure that when several
+xdist workers miss on the same request only one of them calls the API. With a warm cache
+the eval suite makes no LLM calls.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+from eval.run_cache import file_lock, write_atomic
+from simple_agent.llm import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+READWRITE = "readwrite"
+OFFLINE = "offline"
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in offline mode when a request has no cached response."""
+
+
+def request_hash(request: httpx.Request) -> str:
+    """Hash the parts of a request that determine the response."""
+    content = request.content
+    try:
+        body: Any = json.loads(content)
+    except ValueError:
+        body = content.decode("utf-8", errors="replace")
+    payload = json.dumps([request.method, request.url.path, str(request.url.query), body], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseStore:
+    """One JSON file per request hash under `directory`, fanned out by the first two hex digits."""
+
+    def __init__(self, directory: Path, mode: str = READWRITE):
+        if mode not in (READWRITE, OFFLINE):
+            raise ValueError(f"Unknown LLM cache mode {mode!r}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMResponseStore"]:
+        """Build a store from EVAL_LLM_CACHE (directory) and EVAL_LLM_CACHE_MODE, or None if unset."""
+        directory = os.environ.get("EVAL_LLM_CACHE")
+        if not directory:
+            return None
+        return cls(Path(directory), os.environ.get("EVAL_LLM_CACHE_MODE", READWRITE))
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lock_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.lock"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def put(self, key: str, request: httpx.Request, response: httpx.Response) -> None:
+        entry = {
+            "request": {"method": request.method, "path": request.url.path, "body": json.loads(request.content or b"null")},
+            "status_code": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": response.content.decode("utf-8"),
+        }
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(entry, indent=1))
+
+    def count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def check_offline(self, key: str, request: httpx.Request) -> None:
+        if self.mode == OFFLINE:
+            raise LLMCacheMiss(f"No cached response for {request.method} {request.url.path} ({key[:12]})")
+
+
+def _cached_response(entry: Dict[str, Any], request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        entry["status_code"],
+        headers={"content-type": entry["content_type"]},
+        content=entry["body"].encode("utf-8"),
+        request=request,
+    )
+
+
+def _replayable(response: httpx.Response, request: httpx.Request) -> httpx.Response:
+    # The body has been read (and decoded), so drop the wire encoding headers.
+    headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+    return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+
+class CachingTransport(httpx.BaseTransport):
+    """httpx transport that answers from an LLMResponseStore and records 2xx responses on a miss."""
+
+    def __init__(self, transport: httpx.BaseTransport, store: LLMResponseStore):
+        self._transport = transport
+        self._store = store
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = request_hash(request)
+        entry = self._store.get(key)
+        if entry is None:
+            self._store.check_offline(key, request)
+            self._store.path(key).parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self._store.lock_path(key)):
+                # Another worker may have fetched it while this one waited for the lock.
+                entry = self._store.get(key)
+                if entry is None:
+                    self._store.count(hit=False)
+                    response = self._transport.handle_request(request)
+                    response.read()
+                    response.close()
+                    if response.is_success:
+                        self._store.put(key, request, response)
+                    return _replayable(response, request)
+        self._store.count(hit=True)
+        return _cached_response(entry, request)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Async variant of CachingTransport; the file lock is taken off the event loop."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, store: LLMResponseStore):
+        self._transport = transport
+        self._store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_hash(request)
+        entry = self._store.get(key)
+        if entry is None:
+            self._store.check_offline(key, request)
+            self._store.path(key).parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(self._store.lock_path(key), "a")
+            try:
+                await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+                entry = self._store.get(key)
+                if entry is None:
+                    self._store.count(hit=False)
+                    response = await self._transport.handle_async_request(request)
+                    await response.aread()
+                    await response.aclose()
+                    if response.is_success:
+                        self._store.put(key, request, response)
+                    return _replayable(response, request)
+            finally:
+                lock_file.close()
+        self._store.count(hit=True)
+        return _cached_response(entry, request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def caching_model_registry(store: LLMResponseStore) -> ModelRegistry:
+    """A ModelRegistry whose sync and async clients answer from `store`."""
+    return ModelRegistry(
+        transport_wrapper=lambda transport: CachingTransport(transport, store),
+        async_transport_wrapper=lambda transport: AsyncCachingTransport(transport, store),
+    )
@@ -0,0 +1,70 @@
+"""Run each dataset example through a graph (or judge) once per eval session, shared across xdist workers."""
+
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on `path` (created if missing) for the duration of the block."""
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write `text` to `path` so concurrent readers see either nothing or the whole file."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def example_key(name: str, inputs: Dict[str, Any]) -> str:
+    """Hash a graph or judge name and example inputs into a file-safe key."""
+    payload = json.dumps([name, inputs], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class GraphRunCache:
+    """
+    JSON results keyed by (graph or judge name, example inputs), stored as one file each.
+
+    The first caller for a key runs the graph while holding that key's file lock; every
+    other test, in this process or another xdist worker, waits and reads the stored result.
+    A run that raises is not stored, so the next caller retries it.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self.executed = 0
+        self.reused = 0
+
+    def get_or_run(self, name: str, inputs: Dict[str, Any], run: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the stored result for this example, calling `run()` if no one has yet."""
+        key = example_key(name, inputs)
+        if key in self._memory:
+            self.reused += 1
+            return self._memory[key]
+        path = self.directory / f"{key}.json"
+        with file_lock(self.directory / f"{key}.lock"):
+            if path.exists():
+                result = json.loads(path.read_text())
+                self.reused += 1
+            else:
+                text = json.dumps(dict(run()))
+                write_atomic(path, text)
+                # Hand back the stored form, so every test sees the same values whichever worker ran it.
+                result = json.loads(text)
+                self.executed += 1
+        self._memory[key] = result
+        return result
@@ -0,0 +1,464 @@
+"""
+Evaluation engine outside pytest: the graph and every evaluator over a dataset, concurrently.
+
+Each example runs through the async graph, then through all evaluators at once; examples
+overlap freely, bounded only by a concurrency cap per model (graph nodes count against
+the app model, LLM judges against the judge model, local evaluators against nothing).
+The judge evaluators are synchronous and run on a worker thread while they hold their
+model's slot. Scores are aggregated per feedback key into a summary table.
+
+--compare-preprocess runs the dataset through the graph with and without the
+preprocess_email node and reports the per-key scores side by side, with the examples
+whose requires_attention verdict changed.
+
+Usage:
+    python -m eval.runner --dataset eval/dataset.jsonl --concurrency gpt-4o-mini=32 --output results.jsonl
+    python -m eval.runner --compare-preprocess
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from eval.dataset import DEFAULT_DATASET, initial_state, load_dataset
+from eval.evaluators import (
+    SUMMARY_EVALUATORS,
+    does_email_require_attention_evaluator,
+    get_judge_model,
+    local_summary_conciseness_evaluator,
+    pre_classifier_agreement_evaluator,
+    should_ticket_be_created_evaluator,
+    summary_completeness_evaluator,
+    summary_faithfulness_evaluator,
+    summary_multi_criteria_evaluator,
+    summary_triage_usefulness_evaluator,
+)
+from eval.llm_cache import LLMResponseStore, caching_model_registry
+from simple_agent.checkpoint import ainvoke_email
+from simple_agent.llm import DEFAULT_MODEL, set_model_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_CONCURRENCY = 16
+
+# Pass thresholds per feedback key; the summary criteria use the eval suite's thresholds.
+THRESHOLDS = {
+    "correctness": 1.0,
+    "ticket_creation": 1.0,
+    "pre_classifier_agreement": 1.0,
+    **{f"summary_{name}": threshold for name, _, threshold in SUMMARY_EVALUATORS},
+}
+
+Evaluator = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class EvaluatorSpec:
+    """
+    One evaluator to run per example.
+
+    `uses_judge` makes it count against the judge model's concurrency cap and run on a
+    worker thread. `keys` keeps only those feedback keys of a multi-score result.
+    """
+    name: str
+    evaluator: Evaluator
+    uses_judge: bool = False
+    keys: Optional[Tuple[str, ...]] = None
+
+
+def default_evaluators(summary_judge: str = "separate") -> List[EvaluatorSpec]:
+    """
+    Every evaluator in eval/evaluators.py, with summaries judged like the eval suite does.
+
+    Args:
+        summary_judge: "combined" for one judge call per example scoring faithfulness,
+            completeness and triage usefulness, "separate" for one call per criterion.
+            Conciseness is counted locally either way.
+    """
+    specs = [
+        EvaluatorSpec("correctness", does_email_require_attention_evaluator),
+        EvaluatorSpec("ticket_creation", should_ticket_be_created_evaluator),
+        EvaluatorSpec("pre_classifier_agreement", pre_classifier_agreement_evaluator),
+        # Local, but may fall back to the judge on an ambiguous sentence count
+        EvaluatorSpec("summary_conciseness", local_summary_conciseness_evaluator, uses_judge=True),
+    ]
+    if summary_judge == "combined":
+        specs.append(EvaluatorSpec(
+            "summary_multi_criteria",
+            summary_multi_criteria_evaluator,
+            uses_judge=True,
+            keys=("summary_faithfulness", "summary_completeness", "summary_triage_usefulness"),
+        ))
+    elif summary_judge == "separate":
+        specs += [
+            EvaluatorSpec("summary_faithfulness", summary_faithfulness_evaluator, uses_judge=True),
+            EvaluatorSpec("summary_completeness", summary_completeness_evaluator, uses_judge=True),
+            EvaluatorSpec("summary_triage_usefulness", summary_triage_usefulness_evaluator, uses_judge=True),
+        ]
+    else:
+        raise ValueError(f"Unknown summary judge {summary_judge!r}")
+    return specs
+
+
+@dataclass(frozen=True)
+class ModelUsage:
+    """Graph runs or judge evaluations that held one of a model's slots, and the most held at once."""
+    tasks: int
+    peak: int
+    limit: int
+
+
+class ModelLimiter:
+    """One asyncio.Semaphore per model, created on first use with that model's cap."""
+
+    def __init__(self, caps: Optional[Mapping[str, int]] = None, default: int = DEFAULT_MODEL_CONCURRENCY):
+        self._caps = dict(caps or {})
+        self._default = default
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._tasks: Dict[str, int] = {}
+        self._peaks: Dict[str, int] = {}
+
+    def limit(self, model: str) -> int:
+        return self._caps.get(model, self._default)
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Hold one of `model`'s concurrency slots for the duration of the block."""
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = self._semaphores[model] = asyncio.Semaphore(self.limit(model))
+        async with semaphore:
+            self._tasks[model] = self._tasks.get(model, 0) + 1
+            self._in_flight[model] = self._in_flight.get(model, 0) + 1
+            self._peaks[model] = max(self._peaks.get(model, 0), self._in_flight[model])
+            try:
+                yield
+            finally:
+                self._in_flight[model] -= 1
+
+    def usage(self) -> Dict[str, ModelUsage]:
+        return {
+            model: ModelUsage(tasks=self._tasks[model], peak=self._peaks[model], limit=self.limit(model))
+            for model in sorted(self._tasks)
+        }
+
+
+@dataclass
+class ExampleResult:
+    """Graph output and feedback for one example; a failed stage is recorded in `errors`."""
+    index: int
+    example: Dict[str, Any]
+    run: Optional[Dict[str, Any]] = None
+    feedback: List[Dict[str, Any]] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    latency: float = 0.0
+
+
+@dataclass(frozen=True)
+class KeySummary:
+    """Aggregate of one feedback key over the dataset; None scores are counted but not averaged."""
+    key: str
+    count: int
+    scored: int
+    mean: Optional[float]
+    threshold: Optional[float]
+    passed: Optional[int]
+
+    @property
+    def pass_rate(self) -> Optional[float]:
+        if self.passed is None or not self.scored:
+            return None
+        return self.passed / self.scored
+
+
+@dataclass(frozen=True)
+class EvalReport:
+    """Per-example results in dataset order, the per-key summary and run figures."""
+    results: List[ExampleResult]
+    summaries: List[KeySummary]
+    elapsed: float
+    model_usage: Dict[str, ModelUsage]
+
+    @property
+    def graph_failures(self) -> int:
+        return sum(1 for result in self.results if "graph" in result.errors)
+
+    @property
+    def evaluator_errors(self) -> int:
+        return sum(len(result.errors) for result in self.results if "graph" not in result.errors)
+
+
+def _feedback(spec: EvaluatorSpec, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    entries = result["results"] if "results" in result else [result]
+    if spec.keys is not None:
+        entries = [entry for entry in entries if entry["key"] in spec.keys]
+    return [dict(entry, evaluator=spec.name) for entry in entries]
+
+
+def summarize(results: Iterable[ExampleResult], thresholds: Mapping[str, float] = THRESHOLDS) -> List[KeySummary]:
+    """Mean score and pass count per feedback key, in first-seen order."""
+    scores: Dict[str, List[Optional[float]]] = {}
+    for result in results:
+        for entry in result.feedback:
+            scores.setdefault(entry["key"], []).append(entry["score"])
+    summaries = []
+    for key, values in scores.items():
+        scored = [float(value) for value in values if value is not None]
+        threshold = thresholds.get(key)
+        summaries.append(KeySummary(
+            key=key,
+            count=len(values),
+            scored=len(scored),
+            mean=sum(scored) / len(scored) if scored else None,
+            threshold=threshold,
+            # Same epsilon as the eval suite's to_be_greater_than(threshold - 0.001)
+            passed=None if threshold is None else sum(1 for value in scored if value > threshold - 0.001),
+        ))
+    return summaries
+
+
+async def run_evaluation(
+    examples: Iterable[Dict[str, Any]],
+    evaluators: Optional[List[EvaluatorSpec]] = None,
+    graph=None,
+    concurrency: Optional[Mapping[str, int]] = None,
+    default_concurrency: int = DEFAULT_MODEL_CONCURRENCY,
+    graph_model: str = DEFAULT_MODEL,
+) -> EvalReport:
+    """
+    Run every example through the graph and all evaluators on the current event loop.
+
+    Args:
+        examples: Dataset examples with "inputs" and "outputs".
+        evaluators: Evaluators to run per example. Defaults to default_evaluators().
+        graph: Compiled graph to drive with `ainvoke`. Defaults to a graph built with
+            the async nodes.
+        concurrency: Cap on graph runs / judge evaluations in flight per model name.
+        default_concurrency: Cap for models not listed in `concurrency`.
+        graph_model: Model whose cap graph runs count against.
+
+    Returns:
+        EvalReport whose results line up with the input order. A graph failure skips
+        that example's evaluators; an evaluator failure skips only that evaluator.
+    """
+    if graph is None:
+        from simple_agent.agent import create_graph
+        graph = create_graph(use_async=True)
+    evaluators = default_evaluators() if evaluators is None else evaluators
+    limiter = ModelLimiter(concurrency, default_concurrency)
+    judge_model = get_judge_model()
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=limiter.limit(judge_model), thread_name_prefix="eval-judge")
+
+    async def evaluate(spec: EvaluatorSpec, result: ExampleResult) -> None:
+        try:
+            if spec.uses_judge:
+                async with limiter.slot(judge_model):
+                    output = await loop.run_in_executor(executor, spec.evaluator, result.run, result.example)
+            else:
+                output = spec.evaluator(result.run, result.example)
+            result.feedback += _feedback(spec, output)
+        except Exception as exc:
+            logger.warning(f"Evaluator {spec.name} failed on example {result.index}", exc_info=True)
+            result.errors[spec.name] = repr(exc)
+
+    async def run_one(index: int, example: Dict[str, Any]) -> ExampleResult:
+        result = ExampleResult(index=index, example=example)
+        start = time.perf_counter()
+        try:
+            async with limiter.slot(graph_model):
+                result.run = await ainvoke_email(graph, initial_state(example))
+        except Exception as exc:
+            logger.warning(f"Graph failed on example {index}: {example['inputs'].get('email_subject')}", exc_info=True)
+            result.errors["graph"] = repr(exc)
+        else:
+            await asyncio.gather(*(evaluate(spec, result) for spec in evaluators))
+        result.latency = time.perf_counter() - start
+        return result
+
+    batch = list(examples)
+    logger.debug(f"Evaluating {len(batch)} examples with {len(evaluators)} evaluators")
+    start = time.perf_counter()
+    try:
+        results = list(await asyncio.gather(*(run_one(index, example) for index, example in enumerate(batch))))
+    finally:
+        executor.shutdown(wait=False)
+    report = EvalReport(
+        results=results,
+        summaries=summarize(results),
+        elapsed=time.perf_counter() - start,
+        model_usage=limiter.usage(),
+    )
+    logger.info(
+        f"Evaluated {len(results)} examples in {report.elapsed:.2f}s "
+        f"({report.graph_failures} graph failures, {report.evaluator_errors} evaluator errors)"
+    )
+    return report
+
+
+def format_report(report: EvalReport) -> str:
+    """The summary table: one row per feedback key, then run and per-model figures."""
+    lines = [f"{'key':<28}{'n':>5}{'scored':>8}{'mean':>8}{'threshold':>11}{'pass':>8}"]
+    for summary in report.summaries:
+        mean = "-" if summary.mean is None else f"{summary.mean:.2f}"
+        threshold = "-" if summary.threshold is None else f"{summary.threshold:.2f}"
+        pass_rate = "-" if summary.pass_rate is None else f"{summary.pass_rate:.0%}"
+        lines.append(f"{summary.key:<28}{summary.count:>5}{summary.scored:>8}{mean:>8}{threshold:>11}{pass_rate:>8}")
+    count = len(report.results)
+    lines.append(
+        f"\n{count} examples in {report.elapsed:.1f}s "
+        f"({count / report.elapsed if report.elapsed > 0 else 0.0:.1f}/s), "
+        f"{report.graph_failures} graph failures, {report.evaluator_errors} evaluator errors"
+    )
+    for model, usage in report.model_usage.items():
+        lines.append(f"{model}: {usage.tasks} tasks, peak {usage.peak}/{usage.limit} in flight")
+    return "\n".join(lines)
+
+
+def format_comparison(baseline: EvalReport, candidate: EvalReport, labels: Tuple[str, str] = ("before", "after")) -> str:
+    """
+    Mean score and pass rate per feedback key for two runs over the same examples.
+
+    Lists the examples whose `requires_attention` verdict differs between the runs.
+    """
+    before = {summary.key: summary for summary in baseline.summaries}
+    after = {summary.key: summary for summary in candidate.summaries}
+    lines = [f"{'key':<28}{labels[0]:>18}{labels[1]:>18}{'delta':>8}"]
+    for key in list(before) + [key for key in after if key not in before]:
+        cells = []
+        for summary in (before.get(key), after.get(key)):
+            if summary is None or summary.mean is None:
+                cells.append("-")
+            else:
+                pass_rate = "" if summary.pass_rate is None else f" ({summary.pass_rate:.0%})"
+                cells.append(f"{summary.mean:.2f}{pass_rate}")
+        means = [summary.mean if summary else None for summary in (before.get(key), after.get(key))]
+        delta = "-" if None in means else f"{means[1] - means[0]:+.2f}"
+        lines.append(f"{key:<28}{cells[0]:>18}{cells[1]:>18}{delta:>8}")
+
+    changed = [
+        (old, new) for old, new in zip(baseline.results, candidate.results)
+        if old.run is not None and new.run is not None
+        and old.run.get("requires_attention") != new.run.get("requires_attention")
+    ]
+    lines.append(f"\n{len(changed)} of {len(baseline.results)} requires_attention verdicts changed")
+    for old, new in changed:
+        expected = old.example["outputs"].get("requires_attention")
+        lines.append(
+            f"  {old.example['inputs']['email_subject']!r}: {old.run.get('requires_attention')} -> "
+            f"{new.run.get('requires_attention')} (expected {expected})"
+        )
+    return "\n".join(lines)
+
+
+def _parse_concurrency(values: List[str]) -> Dict[str, int]:
+    caps = {}
+    for value in values:
+        model, sep, limit = value.rpartition("=")
+        if not sep or not model or not limit.isdigit() or int(limit) < 1:
+            raise argparse.ArgumentTypeError(f"Expected MODEL=N with N >= 1, got {value!r}")
+        caps[model] = int(limit)
+    return caps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET, help="JSONL dataset of inputs/outputs examples")
+    parser.add_argument("--limit", type=int, default=None, help="evaluate only the first N examples")
+    parser.add_argument(
+        "--concurrency", action="append", default=[], metavar="MODEL=N",
+        help="graph runs / judge evaluations in flight for one model (repeatable)",
+    )
+    parser.add_argument(
+        "--default-concurrency", type=int, default=DEFAULT_MODEL_CONCURRENCY,
+        help=f"the same for models without --concurrency (default {DEFAULT_MODEL_CONCURRENCY})",
+    )
+    parser.add_argument("--judge-model", default=None, help="LLM model for judge evaluations (default: gpt-4o-mini)")
+    parser.add_argument(
+        "--summary-judge", choices=["combined", "separate"], default="separate",
+        help="one judge call per criterion (default) or one combined call per example",
+    )
+    parser.add_argument(
+        "--compare-preprocess", action="store_true",
+        help="run the dataset with and without the preprocess_email node and compare the scores",
+    )
+    parser.add_argument("--output", default=None, help="write per-example runs and feedback as JSONL")
+    args = parser.parse_args()
+    try:
+        concurrency = _parse_concurrency(args.concurrency)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.judge_model:
+        os.environ["LLM_JUDGE_MODEL"] = args.judge_model
+    examples = load_dataset(args.dataset)[:args.limit]
+
+    # Same on-disk response cache as the eval suite when EVAL_LLM_CACHE is set
+    store = LLMResponseStore.from_env()
+
+    # (label, preprocess) per run; None keeps run_evaluation's default graph
+    variants = [("preprocess=False", False), ("preprocess=True", True)] if args.compare_preprocess else [(None, None)]
+
+    async def evaluate() -> List[Tuple[Optional[str], EvalReport]]:
+        from simple_agent.agent import create_graph
+        previous = set_model_registry(caching_model_registry(store)) if store is not None else None
+        try:
+            reports = []
+            for label, preprocess in variants:
+                graph = None if preprocess is None else create_graph(use_async=True, preprocess=preprocess)
+                reports.append((label, await run_evaluation(
+                    examples,
+                    evaluators=default_evaluators(args.summary_judge),
+                    graph=graph,
+                    concurrency=concurrency,
+                    default_concurrency=args.default_concurrency,
+                )))
+            return reports
+        finally:
+            if previous is not None:
+                # The graph's async pool can only be closed on this loop
+                await set_model_registry(previous).aclose()
+
+    reports = asyncio.run(evaluate())
+
+    for label, report in reports:
+        if label:
+            print(f"\n{label}")
+        print(format_report(report))
+    if args.compare_preprocess:
+        (before, baseline), (after, candidate) = reports
+        print(f"\n{format_comparison(baseline, candidate, labels=(before, after))}")
+    if store is not None:
+        print(f"LLM cache: {store.hits} hits, {store.misses} misses")
+    if args.output:
+        with open(args.output, "w") as f:
+            for label, report in reports:
+                for result in report.results:
+                    record = {
+                        "inputs": result.example["inputs"],
+                        "outputs": result.example["outputs"],
+                        "run": result.run,
+                        "feedback": result.feedback,
+                        "errors": result.errors,
+                        "latency": result.latency,
+                    }
+                    if label:
+                        record["variant"] = label
+                    f.write(json.dumps(record, default=str) + "\n")
+    failed = any(report.graph_failures or report.evaluator_errors for _, report in reports)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
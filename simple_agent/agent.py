@@ -1,14 +1,41 @@
-from typing import Callable, Optional
+import threading
+from functools import partial
+from typing import Callable, Optional, Union
 
-from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import StateGraph, START, END
 
+from simple_agent.cache import ResponseCache
+from simple_agent.checkpoint import get_default_checkpointer
+from simple_agent.dedup import IncidentIndex, adeduplicate_incident, deduplicate_incident, route_incident
 from simple_agent.nodes import (
     summarize_email as default_summarize_email,
     check_email_attention as default_check_email_attention,
     create_jira_ticket as default_create_jira_ticket,
     log_no_attention_needed as default_log_no_attention_needed,
+    asummarize_email as default_asummarize_email,
+    acheck_email_attention as default_acheck_email_attention,
+    acreate_jira_ticket as default_acreate_jira_ticket,
+    alog_no_attention_needed as default_alog_no_attention_needed,
+    summarize_and_classify_email as default_summarize_and_classify_email,
+    asummarize_and_classify_email as default_asummarize_and_classify_email,
 )
-from simple_agent.state import EmailState
+from simple_agent.graph_cache import get_graph_cache
+from simple_agent.jira import TicketBatcher
+from simple_agent.metrics import GraphMetrics, get_graph_metrics
+from simple_agent.preclassifier import PreClassifier
+from simple_agent.preprocess import apreprocess_email, preprocess_email
+from simple_agent.state import CompactEmailState, EmailState
+
+
+def join_triage(state: EmailState) -> EmailState:
+    """Join point for the summary and attention branches before routing."""
+    return {}
+
+
+def route_email(state: EmailState) -> str:
+    """Route to ticket creation or logging based on the attention check."""
+    return "create_jira_ticket" if state["requires_attention"] else "log_no_attention_needed"
 
 
 def create_graph(
@@ -16,6 +43,18 @@ def create_graph(
     check_email_attention: Optional[Callable] = None,
     create_jira_ticket: Optional[Callable] = None,
     log_no_attention_needed: Optional[Callable] = None,
+    parallel: bool = True,
+    use_async: bool = False,
+    response_cache: Optional[ResponseCache] = None,
+    single_call: bool = False,
+    summarize_and_classify_email: Optional[Callable] = None,
+    pre_classifier: Optional[PreClassifier] = None,
+    ticket_batcher: Optional[TicketBatcher] = None,
+    incident_index: Optional[IncidentIndex] = None,
+    checkpointer: Union[BaseCheckpointSaver, bool, None] = None,
+    metrics: Optional[GraphMetrics] = None,
+    preprocess: bool = True,
+    compact_state: bool = False,
 ):
     """
     Factory method to create and compile the email processing graph.
@@ -25,48 +64,196 @@ def create_graph(
         check_email_attention: Optional custom node function for checking email attention.
         create_jira_ticket: Optional custom node function for creating Jira tickets.
         log_no_attention_needed: Optional custom node function for logging no attention needed.
+        parallel: When True, summarize_email and check_email_attention run concurrently
+            in the same superstep and are joined before routing. When False, they run
+            one after the other.
+        use_async: When True, the default nodes are the async (`ainvoke`) variants and
+            the graph must be driven with `ainvoke`/`astream`.
+        response_cache: Optional cache placed in front of the default summarize_email and
+            check_email_attention LLM calls. Custom node functions are used as given.
+        single_call: When True, one summarize_and_classify_email node produces both the
+            summary and the attention decision with a single structured-output call, and
+            summarize_email / check_email_attention are not used.
+        summarize_and_classify_email: Optional custom node function for the single-call node.
+        pre_classifier: Optional deterministic tier placed in front of check_email_attention.
+            Emails it decides with high confidence skip the LLM; the rest are escalated.
+        ticket_batcher: Optional micro-batching queue used by the default create_jira_ticket
+            node, so tickets from concurrent runs are created with bulk requests.
+        incident_index: Optional index of recent incidents. When given, a
+            deduplicate_incident node runs between the router and create_jira_ticket and
+            attaches near-duplicate emails to the existing ticket instead of opening a new one.
+        checkpointer: Optional checkpointer the graph saves progress to after every node,
+            e.g. `simple_agent.checkpoint.sqlite_checkpointer()`, or
+            `async_sqlite_checkpointer()` for async graphs. Drive the graph with
+            `invoke_email` so each email runs on its own stable thread and a retry
+            resumes after the last completed node. When None, sync graphs use the worker
+            default `get_default_checkpointer()` (SQLite at $EMAIL_AGENT_CHECKPOINT_DB, if
+            set); async graphs get theirs from `aprocess_emails`, since an async saver is
+            bound to one event loop. False disables checkpointing.
+        metrics: Where every node records wall time, queue time, token usage and
+            estimated cost. Defaults to the process-wide `get_graph_metrics()`.
+        preprocess: When True, a preprocess_email node at the entry strips quoted replies,
+            signatures and disclaimers into `clean_email_body`, which the LLM nodes and the
+            ticket description read (each capped at its TOKEN_BUDGETS entry).
+        compact_state: When True, the state schema is CompactEmailState, so nodes receive a
+            slot-based record instead of a dict. `invoke` still accepts and returns dicts,
+            and also accepts CompactEmailState input.
     
     Returns:
-        Compiled LangGraph workflow.
+        Compiled LangGraph workflow. Graphs are memoized in the process-wide
+        `get_graph_cache()`: a call with the same flags and the same node callables,
+        caches, batchers, checkpointer and metrics (by identity) returns the graph
+        compiled for the first one.
     """
+    if metrics is None:
+        metrics = get_graph_metrics()
+    if checkpointer is None and not use_async:
+        checkpointer = get_default_checkpointer()
+    elif checkpointer is False:
+        checkpointer = None
+    options = dict(
+        summarize_email=summarize_email,
+        check_email_attention=check_email_attention,
+        create_jira_ticket=create_jira_ticket,
+        log_no_attention_needed=log_no_attention_needed,
+        parallel=parallel,
+        use_async=use_async,
+        response_cache=response_cache,
+        single_call=single_call,
+        summarize_and_classify_email=summarize_and_classify_email,
+        pre_classifier=pre_classifier,
+        ticket_batcher=ticket_batcher,
+        incident_index=incident_index,
+        checkpointer=checkpointer,
+        metrics=metrics,
+        preprocess=preprocess,
+        compact_state=compact_state,
+    )
+    return get_graph_cache().get_or_build(options, partial(_compile_graph, **options))
+
+
+def _compile_graph(
+    summarize_email: Optional[Callable],
+    check_email_attention: Optional[Callable],
+    create_jira_ticket: Optional[Callable],
+    log_no_attention_needed: Optional[Callable],
+    parallel: bool,
+    use_async: bool,
+    response_cache: Optional[ResponseCache],
+    single_call: bool,
+    summarize_and_classify_email: Optional[Callable],
+    pre_classifier: Optional[PreClassifier],
+    ticket_batcher: Optional[TicketBatcher],
+    incident_index: Optional[IncidentIndex],
+    checkpointer: Optional[BaseCheckpointSaver],
+    metrics: GraphMetrics,
+    preprocess: bool,
+    compact_state: bool,
+):
+    default_summarize = default_asummarize_email if use_async else default_summarize_email
+    default_check = default_acheck_email_attention if use_async else default_check_email_attention
+    default_triage = default_asummarize_and_classify_email if use_async else default_summarize_and_classify_email
+    if response_cache is not None:
+        default_summarize = partial(default_summarize, response_cache=response_cache)
+        default_check = partial(default_check, response_cache=response_cache)
+        default_triage = partial(default_triage, response_cache=response_cache)
+
     # Use provided functions or fall back to defaults
-    summarize_email_fn = summarize_email or default_summarize_email
-    check_email_fn = check_email_attention or default_check_email_attention
-    create_jira_fn = create_jira_ticket or default_create_jira_ticket
-    log_no_attention_fn = log_no_attention_needed or default_log_no_attention_needed
+    summarize_email_fn = summarize_email or default_summarize
+    check_email_fn = check_email_attention or default_check
+    if pre_classifier is not None:
+        check_email_fn = pre_classifier.wrap(check_email_fn)
+    triage_fn = summarize_and_classify_email or default_triage
+    default_create_jira = default_acreate_jira_ticket if use_async else default_create_jira_ticket
+    if ticket_batcher is not None:
+        default_create_jira = partial(default_create_jira, ticket_batcher=ticket_batcher)
+    create_jira_fn = create_jira_ticket or default_create_jira
+    if incident_index is not None:
+        create_jira_fn = incident_index.wrap(create_jira_fn)
+        deduplicate_fn = partial(adeduplicate_incident if use_async else deduplicate_incident, incident_index=incident_index)
+    if use_async:
+        log_no_attention_fn = log_no_attention_needed or default_alog_no_attention_needed
+    else:
+        log_no_attention_fn = log_no_attention_needed or default_log_no_attention_needed
 
     # Define the graph
-    workflow = StateGraph(EmailState)
+    workflow = StateGraph(CompactEmailState if compact_state else EmailState)
 
-    # Add nodes
-    workflow.add_node("summarize_email", summarize_email_fn)
-    workflow.add_node("check_email_attention", check_email_fn)
-    workflow.add_node("create_jira_ticket", create_jira_fn)
-    workflow.add_node("log_no_attention_needed", log_no_attention_fn)
+    def add_node(name: str, node: Callable, terminal=False) -> None:
+        workflow.add_node(name, metrics.wrap(name, node, terminal=terminal))
 
-    # Set entry point
-    workflow.set_entry_point("summarize_email")
+    # Add nodes
+    if preprocess:
+        add_node("preprocess_email", apreprocess_email if use_async else preprocess_email)
+    if single_call:
+        add_node("summarize_and_classify_email", triage_fn)
+    else:
+        add_node("summarize_email", summarize_email_fn)
+        add_node("check_email_attention", check_email_fn)
+    add_node("join_triage", join_triage)
+    add_node("create_jira_ticket", create_jira_fn, terminal=True)
+    if incident_index is not None:
+        add_node("deduplicate_incident", deduplicate_fn, terminal=lambda update: bool(update.get("matched_ticket_id")))
+    add_node("log_no_attention_needed", log_no_attention_fn, terminal=True)
 
-    # Add edge from summarize_email to check_email_attention
-    workflow.add_edge("summarize_email", "check_email_attention")
+    entry = START
+    if preprocess:
+        workflow.add_edge(START, "preprocess_email")
+        entry = "preprocess_email"
+    if single_call:
+        workflow.add_edge(entry, "summarize_and_classify_email")
+        workflow.add_edge("summarize_and_classify_email", "join_triage")
+    elif parallel:
+        # Fan out both LLM nodes from the entry point; the classifier never reads
+        # email_summary, so the two round-trips can overlap.
+        workflow.add_edge(entry, "summarize_email")
+        workflow.add_edge(entry, "check_email_attention")
+        workflow.add_edge(["summarize_email", "check_email_attention"], "join_triage")
+    else:
+        workflow.add_edge(entry, "summarize_email")
+        workflow.add_edge("summarize_email", "check_email_attention")
+        workflow.add_edge("check_email_attention", "join_triage")
 
     # Add conditional edge based on attention check result
     workflow.add_conditional_edges(
-        "check_email_attention",
-        lambda state: "create_jira_ticket" if state["requires_attention"] else "log_no_attention_needed",
+        "join_triage",
+        route_email,
         {
-            "create_jira_ticket": "create_jira_ticket",
+            "create_jira_ticket": "deduplicate_incident" if incident_index is not None else "create_jira_ticket",
             "log_no_attention_needed": "log_no_attention_needed",
         },
     )
+    if incident_index is not None:
+        workflow.add_conditional_edges(
+            "deduplicate_incident",
+            route_incident,
+            {"create_jira_ticket": "create_jira_ticket", "duplicate_incident": END},
+        )
 
     # Both paths lead to END
     workflow.add_edge("create_jira_ticket", END)
     workflow.add_edge("log_no_attention_needed", END)
 
     # Compile and return the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Return the default compiled graph for production use, compiling it on first call."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = create_graph()
+    return _graph
 
 
-# Default compiled graph for production use
-graph = create_graph()
+def __getattr__(name: str):
+    # `graph` (the langgraph.json entry point) is compiled on first access, not at import time.
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,253 @@
+"""Offline backfill mode: provider-side batch jobs for node LLM calls, then graph routing."""
+
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Protocol
+
+from langchain_core.messages import convert_to_openai_messages
+
+from simple_agent.batch import DEFAULT_MAX_CONCURRENCY, BatchResult, process_emails
+from simple_agent.llm import DEFAULT_MODEL
+from simple_agent.nodes import build_attention_messages, build_summary_messages, parse_attention_answer
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+SUMMARY_NODE = "summarize_email"
+ATTENTION_NODE = "check_email_attention"
+
+JOB_COMPLETED = "completed"
+JOB_IN_PROGRESS = "in_progress"
+JOB_FAILED = "failed"
+_OPENAI_TERMINAL_FAILURES = {"failed", "expired", "cancelled", "cancelling"}
+
+
+class BackfillError(RuntimeError):
+    """Raised when a batch job fails or does not finish in time."""
+
+
+@dataclass
+class BatchRequest:
+    """One chat completion request inside a batch job."""
+    custom_id: str
+    body: Dict[str, Any]
+
+    def to_jsonl(self) -> str:
+        return json.dumps({"custom_id": self.custom_id, "method": "POST", "url": CHAT_COMPLETIONS_URL, "body": self.body})
+
+
+class BatchBackend(Protocol):
+    """A provider that runs many chat completion requests as one asynchronous job."""
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        """Submit requests and return a job id."""
+
+    def status(self, job_id: str) -> str:
+        """Return JOB_COMPLETED, JOB_IN_PROGRESS or JOB_FAILED."""
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        """Return the completion content for each successful request, keyed by custom_id."""
+
+
+def parse_batch_output(lines: Iterable[str]) -> Dict[str, str]:
+    """Parse OpenAI batch output JSONL into {custom_id: message content}, skipping failed requests."""
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {record.get('custom_id')} failed: {record.get('error') or response}")
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+class OpenAIBatchBackend:
+    """Runs backfill requests through the OpenAI Batch API."""
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        self._client = client
+        self._completion_window = completion_window
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        payload = "".join(request.to_jsonl() + "\n" for request in requests).encode()
+        input_file = self._client.files.create(file=("backfill.jsonl", payload), purpose="batch")
+        job = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self._completion_window,
+        )
+        return job.id
+
+    def status(self, job_id: str) -> str:
+        job = self._client.batches.retrieve(job_id)
+        if job.status == "completed":
+            return JOB_COMPLETED
+        if job.status in _OPENAI_TERMINAL_FAILURES:
+            return JOB_FAILED
+        return JOB_IN_PROGRESS
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        job = self._client.batches.retrieve(job_id)
+        if not job.output_file_id:
+            return {}
+        return parse_batch_output(self._client.files.content(job.output_file_id).text.splitlines())
+
+
+class LocalFileBatchBackend:
+    """
+    File-based stand-in for a provider batch API.
+
+    Requests are written to `<directory>/<job_id>.input.jsonl`. After
+    `polls_until_complete` status checks, `responder` answers each request body and the
+    output is written in the OpenAI batch output format.
+    """
+
+    def __init__(self, directory: str, responder: Callable[[Dict[str, Any]], str], polls_until_complete: int = 1):
+        self.directory = directory
+        self.responder = responder
+        self.polls_until_complete = polls_until_complete
+        self._polls: Dict[str, int] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{kind}.jsonl")
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        job_id = f"batch_{uuid.uuid4().hex[:12]}"
+        with open(self._path(job_id, "input"), "w") as f:
+            for request in requests:
+                f.write(request.to_jsonl() + "\n")
+        self._polls[job_id] = 0
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        self._polls[job_id] += 1
+        if self._polls[job_id] < self.polls_until_complete:
+            return JOB_IN_PROGRESS
+        if not os.path.exists(self._path(job_id, "output")):
+            self._complete(job_id)
+        return JOB_COMPLETED
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        with open(self._path(job_id, "output")) as f:
+            return parse_batch_output(f)
+
+    def _complete(self, job_id: str) -> None:
+        with open(self._path(job_id, "input")) as source, open(self._path(job_id, "output"), "w") as sink:
+            for line in source:
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                response = {"status_code": 200, "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}}
+                sink.write(json.dumps({"custom_id": request["custom_id"], "response": response, "error": None}) + "\n")
+
+
+def build_batch_requests(emails: List[EmailState], model: str = DEFAULT_MODEL) -> List[BatchRequest]:
+    """Build the summary and attention requests for every email, using the node prompts."""
+    requests = []
+    for index, email in enumerate(emails):
+        for node, build_messages in ((SUMMARY_NODE, build_summary_messages), (ATTENTION_NODE, build_attention_messages)):
+            requests.append(BatchRequest(
+                custom_id=f"{index}:{node}",
+                body={"model": model, "temperature": 0, "messages": convert_to_openai_messages(build_messages(email))},
+            ))
+    return requests
+
+
+def wait_for_job(backend: BatchBackend, job_id: str, poll_interval: float, timeout: float) -> None:
+    """Poll a batch job until it completes, raising BackfillError on failure or timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = backend.status(job_id)
+        logger.debug(f"Batch job {job_id} status={status}")
+        if status == JOB_COMPLETED:
+            return
+        if status == JOB_FAILED:
+            raise BackfillError(f"Batch job {job_id} failed")
+        if time.monotonic() >= deadline:
+            raise BackfillError(f"Batch job {job_id} did not complete within {timeout}s")
+        time.sleep(poll_interval)
+
+
+def _backfilled_summary(state: EmailState) -> EmailState:
+    if state.get("email_summary") is None:
+        raise BackfillError(f"No batch result for {SUMMARY_NODE}")
+    return {}
+
+
+def _backfilled_attention(state: EmailState) -> EmailState:
+    if state.get("requires_attention") is None:
+        raise BackfillError(f"No batch result for {ATTENTION_NODE}")
+    return {}
+
+
+def create_backfill_graph(**graph_options):
+    """Build a graph whose LLM nodes pass through results already filled in by the batch job."""
+    from simple_agent.agent import create_graph
+
+    return create_graph(
+        summarize_email=_backfilled_summary,
+        check_email_attention=_backfilled_attention,
+        **graph_options,
+    )
+
+
+def run_backfill(
+    emails: Iterable[EmailState],
+    backend: BatchBackend,
+    graph=None,
+    model: str = DEFAULT_MODEL,
+    poll_interval: float = 30.0,
+    timeout: float = 24 * 60 * 60,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> BatchResult:
+    """
+    Backfill summaries and classifications for many emails with one provider batch job.
+
+    Every email's summarize_email and check_email_attention prompts are submitted as a
+    single batch job. Once it completes, each email resumes through the graph with the
+    node results filled in, routing to create_jira_ticket or log_no_attention_needed.
+
+    Args:
+        emails: Input states to backfill.
+        backend: Batch provider, e.g. OpenAIBatchBackend or LocalFileBatchBackend.
+        graph: Graph to route the filled-in states through. Defaults to `create_backfill_graph()`.
+        model: Model used for the batch requests.
+        poll_interval: Seconds between job status checks.
+        timeout: Seconds to wait for the job before raising BackfillError.
+        max_concurrency: Maximum number of emails routed through the graph at once.
+
+    Returns:
+        BatchResult in input order. Emails whose batch requests failed are reported as
+        failed results instead of being routed.
+    """
+    batch = list(emails)
+    requests = build_batch_requests(batch, model)
+    job_id = backend.submit(requests)
+    logger.info(f"Submitted backfill batch job {job_id} with {len(requests)} requests for {len(batch)} emails")
+
+    wait_for_job(backend, job_id, poll_interval, timeout)
+    results = backend.results(job_id)
+    logger.info(f"Backfill batch job {job_id} returned {len(results)}/{len(requests)} results")
+
+    filled = []
+    for index, email in enumerate(batch):
+        summary = results.get(f"{index}:{SUMMARY_NODE}")
+        answer = results.get(f"{index}:{ATTENTION_NODE}")
+        filled.append({
+            **email,
+            "email_summary": summary.strip() if summary is not None else None,
+            "requires_attention": parse_attention_answer(answer) if answer is not None else None,
+        })
+
+    return process_emails(filled, graph=graph or create_backfill_graph(), max_concurrency=max_concurrency)
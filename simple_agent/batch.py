@@ -0,0 +1,175 @@
+"""Bulk email triage with bounded concurrency and ordered results."""
+
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from simple_agent.checkpoint import ainvoke_email, async_sqlite_checkpointer, default_checkpoint_path, invoke_email
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class EmailResult:
+    """Outcome of running one email through the graph."""
+    index: int
+    state: Optional[Dict[str, Any]]
+    error: Optional[BaseException]
+    latency: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    """Throughput and latency figures for one batch."""
+    total: int
+    succeeded: int
+    failed: int
+    elapsed: float
+    throughput: float
+    p50_latency: float
+    p95_latency: float
+
+
+@dataclass
+class BatchResult:
+    """Per-email results in input order, plus batch statistics."""
+    results: List[EmailResult]
+    stats: BatchStats
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _build_stats(results: List[EmailResult], elapsed: float) -> BatchStats:
+    latencies = [result.latency for result in results]
+    failed = sum(1 for result in results if not result.ok)
+    return BatchStats(
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
+        elapsed=elapsed,
+        throughput=len(results) / elapsed if elapsed > 0 else 0.0,
+        p50_latency=percentile(latencies, 50),
+        p95_latency=percentile(latencies, 95),
+    )
+
+
+def _log_batch(stats: BatchStats) -> None:
+    logger.info(
+        f"Processed batch of {stats.total} emails ({stats.failed} failed) in {stats.elapsed:.2f}s: "
+        f"{stats.throughput:.1f} emails/s, p50={stats.p50_latency * 1000:.0f}ms, "
+        f"p95={stats.p95_latency * 1000:.0f}ms"
+    )
+
+
+def _log_failure(index: int, email: EmailState) -> None:
+    logger.warning(f"Email {index} failed during batch processing: {email.get('email_subject')}", exc_info=True)
+
+
+def run_email(graph, index: int, email: EmailState) -> EmailResult:
+    """Invoke the graph for one email, capturing any failure in the result."""
+    start = time.perf_counter()
+    try:
+        state = invoke_email(graph, email)
+        error = None
+    except Exception as exc:
+        _log_failure(index, email)
+        state, error = None, exc
+    return EmailResult(index=index, state=state, error=error, latency=time.perf_counter() - start)
+
+
+def process_emails(
+    emails: Iterable[EmailState],
+    graph=None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> BatchResult:
+    """
+    Run a batch of emails through the graph on a bounded thread pool.
+
+    Args:
+        emails: Input states to triage.
+        graph: Compiled graph to invoke. Defaults to the production graph.
+        max_concurrency: Maximum number of emails in flight at once.
+
+    Returns:
+        BatchResult whose results line up with the input order. A failing email is
+        reported in its result's `error` and does not affect the other emails.
+    """
+    if graph is None:
+        from simple_agent.agent import get_graph
+        graph = get_graph()
+
+    batch = list(emails)
+    logger.debug(f"Starting batch of {len(batch)} emails with max_concurrency={max_concurrency}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        results = list(pool.map(lambda index, email: run_email(graph, index, email), range(len(batch)), batch))
+    stats = _build_stats(results, time.perf_counter() - start)
+    _log_batch(stats)
+    return BatchResult(results=results, stats=stats)
+
+
+async def aprocess_emails(
+    emails: Iterable[EmailState],
+    graph=None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> BatchResult:
+    """
+    Run a batch of emails through the graph on the current event loop.
+
+    Args:
+        emails: Input states to triage.
+        graph: Compiled graph to drive with `ainvoke`. Defaults to a graph built
+            with the async nodes, checkpointed to async_sqlite_checkpointer() for the
+            duration of the batch when $EMAIL_AGENT_CHECKPOINT_DB is set.
+        max_concurrency: Maximum number of emails in flight at once.
+
+    Returns:
+        BatchResult whose results line up with the input order. A failing email is
+        reported in its result's `error` and does not affect the other emails.
+    """
+    if graph is None:
+        from simple_agent.agent import create_graph
+        if default_checkpoint_path():
+            async with async_sqlite_checkpointer() as checkpointer:
+                graph = create_graph(use_async=True, checkpointer=checkpointer)
+                return await aprocess_emails(emails, graph=graph, max_concurrency=max_concurrency)
+        graph = create_graph(use_async=True)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(index: int, email: EmailState) -> EmailResult:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                state = await ainvoke_email(graph, email)
+                error = None
+            except Exception as exc:
+                _log_failure(index, email)
+                state, error = None, exc
+            return EmailResult(index=index, state=state, error=error, latency=time.perf_counter() - start)
+
+    batch = list(emails)
+    logger.debug(f"Starting async batch of {len(batch)} emails with max_concurrency={max_concurrency}")
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_one(index, email) for index, email in enumerate(batch)))
+    stats = _build_stats(list(results), time.perf_counter() - start)
+    _log_batch(stats)
+    return BatchResult(results=list(results), stats=stats)
@@ -0,0 +1,173 @@
+"""Content-addressed cache for node LLM responses."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_DISK_ENTRIES = 100_000
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def make_prompt_key(model: str, messages: Sequence[Tuple[str, str]]) -> str:
+    """
+    Hash a node LLM call by the prompt it actually sends: (role, content) per message.
+
+    Keying on the rendered prompt means a change to a prompt template, to body cleaning
+    or to token budgets misses instead of serving answers to the old prompt. Contents
+    are whitespace-normalized so auto-resent and re-wrapped copies of the same email
+    share an entry.
+    """
+    payload = json.dumps([model, [[role, _normalize(content)] for role, content in messages]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of response cache counters."""
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: an in-memory LRU in front of an optional SQLite store.
+
+    Entries expire `ttl_seconds` after they are written. Both tiers are size bounded;
+    the least recently used entry is evicted first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        sqlite_path: Optional[str] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path is not None:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self._db.commit()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    make_prompt_key = staticmethod(make_prompt_key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss or expired entry."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    logger.debug(f"Response cache memory hit {key[:12]}")
+                    return value
+                del self._memory[key]
+                self._expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at > now:
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._put_memory(key, value, expires_at)
+                        self._disk_hits += 1
+                        logger.debug(f"Response cache disk hit {key[:12]}")
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._expirations += 1
+
+            self._misses += 1
+            logger.debug(f"Response cache miss {key[:12]}")
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in every tier."""
+        now = self._clock()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                overflow = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._evictions += overflow
+                self._db.commit()
+
+    def stats(self) -> CacheStats:
+        """Return a snapshot of hit/miss and eviction counters."""
+        with self._lock:
+            return CacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def close(self) -> None:
+        """Close the SQLite tier, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _put_memory(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
@@ -0,0 +1,129 @@
+"""Checkpointed graph runs keyed by a stable per-email thread id, so retries resume instead of restarting."""
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from simple_agent.jira import email_idempotency_key
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(".checkpoints", "email_agent.sqlite")
+
+
+def email_thread_id(state: EmailState) -> str:
+    """Stable thread id for an email, so every attempt at the same email shares checkpoints."""
+    return f"email-{email_idempotency_key(state)}"
+
+
+def thread_config(state: EmailState) -> Dict[str, Any]:
+    """Run config that points a checkpointed graph at the email's thread."""
+    return {"configurable": {"thread_id": email_thread_id(state)}}
+
+
+def _checkpoint_path(path: Optional[str]) -> str:
+    path = path or os.environ.get("EMAIL_AGENT_CHECKPOINT_DB", DEFAULT_CHECKPOINT_PATH)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return path
+
+
+def sqlite_checkpointer(path: Optional[str] = None):
+    """
+    Open the local SQLite checkpointer used by workers.
+
+    Defaults to $EMAIL_AGENT_CHECKPOINT_DB, falling back to DEFAULT_CHECKPOINT_PATH.
+    The connection is shared across threads; SqliteSaver serializes access to it.
+    SqliteSaver is sync-only: async graphs need async_sqlite_checkpointer().
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    conn = sqlite3.connect(_checkpoint_path(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSaver(conn)
+
+
+@asynccontextmanager
+async def async_sqlite_checkpointer(path: Optional[str] = None) -> AsyncIterator[Any]:
+    """
+    Async variant of sqlite_checkpointer for graphs built with `use_async=True`.
+
+    An AsyncSqliteSaver is bound to the event loop it is opened on, so it is a context
+    manager: open it inside the loop that drives the graph, and the connection is closed
+    on exit. Same path default, and the same file format as the sync saver.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    async with aiosqlite.connect(_checkpoint_path(path)) as conn:
+        await conn.execute("PRAGMA journal_mode=WAL")
+        yield AsyncSqliteSaver(conn)
+
+
+_default_checkpointers: Dict[str, Any] = {}
+_default_checkpointer_lock = threading.Lock()
+
+
+def default_checkpoint_path() -> Optional[str]:
+    """The worker checkpoint file from $EMAIL_AGENT_CHECKPOINT_DB, or None when workers run without one."""
+    return os.environ.get("EMAIL_AGENT_CHECKPOINT_DB") or None
+
+
+def get_default_checkpointer():
+    """
+    Return the process-wide SQLite checkpointer for sync graphs, or None.
+
+    Workers opt in by setting $EMAIL_AGENT_CHECKPOINT_DB; create_graph() then checkpoints
+    to that file by default. Without it, graphs run without a checkpointer as before.
+    """
+    path = default_checkpoint_path()
+    if path is None:
+        return None
+    with _default_checkpointer_lock:
+        if path not in _default_checkpointers:
+            _default_checkpointers[path] = sqlite_checkpointer(path)
+        return _default_checkpointers[path]
+
+
+def invoke_email(graph, email: EmailState) -> Dict[str, Any]:
+    """
+    Run one email through the graph, resuming from its checkpoint when there is one.
+
+    - No checkpointer: a plain `invoke`.
+    - An interrupted thread (an earlier attempt failed mid-graph): resume from the last
+      completed node, so finished LLM calls are not repeated.
+    - A finished thread: return the stored final state without running anything.
+    - Otherwise: start a new run on the email's thread.
+    """
+    if graph.checkpointer is None:
+        return graph.invoke(email)
+    config = thread_config(email)
+    snapshot = graph.get_state(config)
+    if snapshot.next:
+        logger.info(f"Resuming email at {', '.join(snapshot.next)}: {email.get('email_subject')}")
+        return graph.invoke(None, config)
+    if snapshot.values:
+        logger.debug(f"Email already processed, returning checkpointed result: {email.get('email_subject')}")
+        return dict(snapshot.values)
+    # The checkpointer serializes the input as given; pass CompactEmailState records as dicts.
+    return graph.invoke(dict(email), config)
+
+
+async def ainvoke_email(graph, email: EmailState) -> Dict[str, Any]:
+    """Async variant of invoke_email; the checkpointer must support async access."""
+    if graph.checkpointer is None:
+        return await graph.ainvoke(email)
+    config = thread_config(email)
+    snapshot = await graph.aget_state(config)
+    if snapshot.next:
+        logger.info(f"Resuming email at {', '.join(snapshot.next)}: {email.get('email_subject')}")
+        return await graph.ainvoke(None, config)
+    if snapshot.values:
+        logger.debug(f"Email already processed, returning checkpointed result: {email.get('email_subject')}")
+        return dict(snapshot.values)
+    return await graph.ainvoke(dict(email), config)
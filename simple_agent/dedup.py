@@ -0,0 +1,292 @@
+"""Incident deduplication: MinHash LSH index of recent attention emails, consulted before ticketing."""
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import re
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from simple_agent.preprocess import cleaned_body
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+DEFAULT_BANDS = 16
+DEFAULT_MIN_SIMILARITY = 0.5
+DEFAULT_WINDOW_SECONDS = 60 * 60
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_PENDING_TIMEOUT = 30.0
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_LANES = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+
+Signature = Tuple[int, ...]
+
+
+def minhash(text: str) -> Signature:
+    """
+    MinHash signature over the word unigrams and bigrams of `text`.
+
+    Each feature is hashed once with SHAKE-128 into NUM_PERMUTATIONS 32-bit lanes;
+    the signature keeps the per-lane minimum. The fraction of equal lanes between two
+    signatures estimates the Jaccard similarity of their feature sets.
+    """
+    tokens = _TOKEN.findall(text.lower())
+    features = set(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    if not features:
+        return (0,) * NUM_PERMUTATIONS
+    lanes = [_LANES.unpack(hashlib.shake_128(feature.encode()).digest(_LANES.size)) for feature in features]
+    return tuple(map(min, zip(*lanes)))
+
+
+def email_signature(state: EmailState) -> Signature:
+    """
+    MinHash signature of an email's subject and cleaned body, so quoted history, signatures
+    and disclaimers do not pull unrelated replies together or push duplicates apart.
+    """
+    return minhash(f"{state['email_subject']}\n{cleaned_body(state)}")
+
+
+def signature_similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(int.__eq__, a, b)) / NUM_PERMUTATIONS
+
+
+@dataclass(frozen=True)
+class IncidentMatch:
+    """An existing incident a new email was matched to."""
+    ticket_id: str
+    similarity: float
+
+
+@dataclass(frozen=True)
+class IncidentIndexStats:
+    """Snapshot of incident index counters."""
+    size: int
+    matches: int
+    misses: int
+    evictions: int
+
+
+class _Incident:
+    __slots__ = ("signature", "ticket_id", "created_at", "ready")
+
+    def __init__(self, signature: Signature, created_at: float):
+        self.signature = signature
+        self.ticket_id: Optional[str] = None
+        self.created_at = created_at
+        self.ready = threading.Event()
+
+
+class IncidentIndex:
+    """
+    Sliding-window MinHash LSH index of recent incidents that opened a ticket.
+
+    Signatures are split into `bands` bands and indexed per band, so a lookup only
+    compares against incidents sharing at least one whole band with the query instead
+    of scanning the window. Incidents older than `window_seconds`, or beyond
+    `max_entries`, are evicted oldest first.
+
+    A miss reserves the signature until its ticket is recorded, so near-duplicates
+    arriving while the first ticket is still being created wait for it (up to
+    `pending_timeout`) instead of opening their own.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        bands: int = DEFAULT_BANDS,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        pending_timeout: float = DEFAULT_PENDING_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if NUM_PERMUTATIONS % bands:
+            raise ValueError(f"bands must divide {NUM_PERMUTATIONS}, got {bands}")
+        self.min_similarity = min_similarity
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.pending_timeout = pending_timeout
+        self._clock = clock
+        self._rows = NUM_PERMUTATIONS // bands
+        self._bands: List[Dict[Signature, Set[Signature]]] = [{} for _ in range(bands)]
+        self._incidents: Dict[Signature, _Incident] = {}
+        self._order: Deque[_Incident] = deque()
+        self._lock = threading.Lock()
+        self._matches = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def lookup(self, signature: Signature) -> Optional[IncidentMatch]:
+        """Return the most similar ticketed incident at or above min_similarity, without reserving."""
+        with self._lock:
+            self._evict_expired()
+            nearest = self._nearest(signature)
+        if nearest is None or nearest[0].ticket_id is None:
+            return None
+        return IncidentMatch(ticket_id=nearest[0].ticket_id, similarity=nearest[1])
+
+    def match_or_reserve(self, signature: Signature) -> Optional[IncidentMatch]:
+        """
+        Return the incident `signature` duplicates, or reserve it as a new incident and
+        return None. The caller must then `record` the new ticket or `release` the reservation.
+        """
+        with self._lock:
+            self._evict_expired()
+            nearest = self._nearest(signature)
+            if nearest is None:
+                self._misses += 1
+                self._insert(_Incident(signature, self._clock()))
+                return None
+        incident, similarity = nearest
+
+        if not incident.ready.wait(self.pending_timeout) or incident.ticket_id is None:
+            # The first ticket for this incident failed or is stuck; open our own.
+            logger.warning("Pending incident has no ticket, creating a new one")
+            with self._lock:
+                self._misses += 1
+                if signature not in self._incidents:
+                    self._insert(_Incident(signature, self._clock()))
+            return None
+
+        with self._lock:
+            self._matches += 1
+        return IncidentMatch(ticket_id=incident.ticket_id, similarity=similarity)
+
+    def record(self, signature: Signature, ticket_id: str) -> None:
+        """Attach the ticket opened for a reserved signature and wake its waiters."""
+        with self._lock:
+            incident = self._incidents.get(signature)
+            if incident is None:
+                incident = _Incident(signature, self._clock())
+                self._insert(incident)
+        incident.ticket_id = ticket_id
+        incident.ready.set()
+
+    def release(self, signature: Signature) -> None:
+        """Drop a reservation whose ticket could not be created."""
+        with self._lock:
+            incident = self._incidents.get(signature)
+            if incident is not None and incident.ticket_id is None:
+                self._remove(incident)
+        if incident is not None:
+            incident.ready.set()
+
+    def stats(self) -> IncidentIndexStats:
+        """Return a snapshot of index size and match counters."""
+        with self._lock:
+            return IncidentIndexStats(
+                size=len(self._incidents),
+                matches=self._matches,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def wrap(self, create_jira_ticket: Callable) -> Callable:
+        """
+        Build a create_jira_ticket node that records the new ticket for the email's
+        incident. The result is async if `create_jira_ticket` is.
+        """
+        # Unannotated `state`, like GraphMetrics.wrap, so compact graphs pass their records through
+        if inspect.iscoroutinefunction(create_jira_ticket):
+            async def create_and_record_incident(state) -> EmailState:
+                signature = email_signature(state)
+                try:
+                    update = await create_jira_ticket(state)
+                except Exception:
+                    self.release(signature)
+                    raise
+                self.record(signature, update["jira_ticket_id"])
+                return update
+        else:
+            def create_and_record_incident(state) -> EmailState:
+                signature = email_signature(state)
+                try:
+                    update = create_jira_ticket(state)
+                except Exception:
+                    self.release(signature)
+                    raise
+                self.record(signature, update["jira_ticket_id"])
+                return update
+
+        return create_and_record_incident
+
+    def _band_keys(self, signature: Signature) -> List[Signature]:
+        rows = self._rows
+        return [signature[start:start + rows] for start in range(0, NUM_PERMUTATIONS, rows)]
+
+    def _nearest(self, signature: Signature) -> Optional[Tuple[_Incident, float]]:
+        candidates: Set[Signature] = set()
+        for band, key in zip(self._bands, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        best = None
+        for candidate in candidates:
+            similarity = signature_similarity(signature, candidate)
+            if similarity >= self.min_similarity and (best is None or similarity > best[1]):
+                best = (self._incidents[candidate], similarity)
+        return best
+
+    def _insert(self, incident: _Incident) -> None:
+        self._incidents[incident.signature] = incident
+        self._order.append(incident)
+        for band, key in zip(self._bands, self._band_keys(incident.signature)):
+            band.setdefault(key, set()).add(incident.signature)
+        while len(self._incidents) > self.max_entries:
+            self._evict_oldest()
+
+    def _remove(self, incident: _Incident) -> None:
+        del self._incidents[incident.signature]
+        for band, key in zip(self._bands, self._band_keys(incident.signature)):
+            bucket = band[key]
+            bucket.discard(incident.signature)
+            if not bucket:
+                del band[key]
+
+    def _evict_oldest(self) -> None:
+        incident = self._order.popleft()
+        if self._incidents.get(incident.signature) is incident:
+            self._remove(incident)
+            self._evictions += 1
+
+    def _evict_expired(self) -> None:
+        cutoff = self._clock() - self.window_seconds
+        while self._order and self._order[0].created_at < cutoff:
+            self._evict_oldest()
+
+
+def deduplicate_incident(state: EmailState, incident_index: IncidentIndex) -> EmailState:
+    """
+    Attach an attention email to a recent incident's ticket when it is a near-duplicate.
+
+    Duplicates get `jira_ticket_id` / `matched_ticket_id` set to the existing ticket and
+    skip ticket creation; new incidents leave them unset and continue to create_jira_ticket.
+    """
+    match = incident_index.match_or_reserve(email_signature(state))
+    if match is None:
+        return {"matched_ticket_id": None, "similarity_score": None}
+    logger.info(
+        f"Attached email to existing incident {match.ticket_id} "
+        f"(similarity={match.similarity:.3f}): {state['email_subject']}"
+    )
+    return {"jira_ticket_id": match.ticket_id, "matched_ticket_id": match.ticket_id, "similarity_score": match.similarity}
+
+
+async def adeduplicate_incident(state: EmailState, incident_index: IncidentIndex) -> EmailState:
+    """Async variant of deduplicate_incident; waiting on a pending incident runs in a worker thread."""
+    return await asyncio.to_thread(deduplicate_incident, state, incident_index)
+
+
+def route_incident(state: EmailState) -> str:
+    """Route new incidents to ticket creation and duplicates straight to the end."""
+    return "duplicate_incident" if state.get("matched_ticket_id") else "create_jira_ticket"
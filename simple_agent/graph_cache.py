@@ -0,0 +1,133 @@
+"""Bounded cache of compiled graphs keyed by the node callables and options they were built with."""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_GRAPHS = 128
+
+_SCALARS = (type(None), bool, int, float, str)
+
+
+def make_graph_key(options: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """
+    Key a create_graph configuration.
+
+    Flags are compared by value; node callables, caches, batchers, checkpointers and
+    metrics by identity, so a new lambda or `partial` per call is a new configuration.
+    """
+    return tuple(
+        (name, value if isinstance(value, _SCALARS) else ("id", id(value)))
+        for name, value in sorted(options.items())
+    )
+
+
+@dataclass(frozen=True)
+class GraphCacheStats:
+    """Snapshot of compiled graph cache counters."""
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+    max_entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class GraphCache:
+    """
+    LRU of compiled graphs, so identical configurations share one compiled graph.
+
+    Each entry holds a reference to the objects in its key, which keeps their ids from
+    being reused while the entry is cached. `max_entries=0` disables caching.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_GRAPHS):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._graphs: "OrderedDict[Tuple[Hashable, ...], Tuple[Any, Tuple[Any, ...]]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get_or_build(self, options: Dict[str, Any], build: Callable[[], Any]) -> Any:
+        """Return the cached graph for `options`, compiling it with `build()` on a miss."""
+        key = make_graph_key(options)
+        with self._lock:
+            entry = self._graphs.get(key)
+            if entry is not None:
+                self._graphs.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # Compile outside the lock; if another thread cached the same key meanwhile, use its graph.
+        graph = build()
+        if self.max_entries <= 0:
+            return graph
+        with self._lock:
+            entry = self._graphs.get(key)
+            if entry is not None:
+                return entry[0]
+            self._graphs[key] = (graph, tuple(options.values()))
+            while len(self._graphs) > self.max_entries:
+                self._graphs.popitem(last=False)
+                self._evictions += 1
+        logger.debug(f"Compiled graph cached ({len(self._graphs)}/{self.max_entries})")
+        return graph
+
+    def invalidate(self, *objects: Any) -> int:
+        """
+        Drop cached graphs built with any of `objects` (e.g. a tenant's replaced node or
+        checkpointer), or every cached graph when called without arguments.
+
+        Returns:
+            Number of graphs removed.
+        """
+        ids = {id(obj) for obj in objects}
+        with self._lock:
+            if objects:
+                stale = [key for key, (_, refs) in self._graphs.items() if any(id(ref) in ids for ref in refs)]
+            else:
+                stale = list(self._graphs)
+            for key in stale:
+                del self._graphs[key]
+            self._invalidations += len(stale)
+        return len(stale)
+
+    def stats(self) -> GraphCacheStats:
+        """Return a snapshot of hit/miss, eviction and invalidation counters."""
+        with self._lock:
+            return GraphCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                size=len(self._graphs),
+                max_entries=self.max_entries,
+            )
+
+
+_cache = GraphCache()
+
+
+def get_graph_cache() -> GraphCache:
+    """Return the process-wide cache that create_graph compiles through."""
+    return _cache
+
+
+def set_graph_cache(cache: GraphCache) -> GraphCache:
+    """Replace the process-wide graph cache and return the previous one."""
+    global _cache
+    previous = _cache
+    _cache = cache
+    return previous
@@ -0,0 +1,237 @@
+"""Streaming ingestion of mail dumps (JSONL or mbox) through the email graph.
+
+Usage:
+    python -m simple_agent.ingest mail.jsonl results.jsonl --max-in-flight 16 --resume
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import IO, Iterable, Iterator, Optional, Tuple
+
+from simple_agent.batch import DEFAULT_MAX_CONCURRENCY, EmailResult, run_email
+from simple_agent.checkpoint import DEFAULT_CHECKPOINT_PATH, sqlite_checkpointer
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+SourceRecord = Tuple[int, EmailState]
+# Bodies are already in the source dump; results keep only what the graph produced.
+_BODY_FIELDS = ("email_body", "clean_email_body")
+
+
+@dataclass
+class IngestStats:
+    """Counters for one ingestion run."""
+    processed: int
+    failed: int
+    start_offset: int
+    end_offset: int
+
+
+def _empty_state(subject: str, body: str, to: str) -> EmailState:
+    return {
+        "email_subject": subject,
+        "email_body": body,
+        "email_to": to,
+        "email_summary": None,
+        "requires_attention": None,
+        "jira_ticket_id": None,
+    }
+
+
+def read_jsonl(path: str, start_offset: int = 0) -> Iterator[SourceRecord]:
+    """
+    Lazily read emails from a JSONL file.
+
+    Each line is either a flat email dict or a dataset record with an `inputs` key,
+    as in `eval/dataset.jsonl`.
+
+    Yields:
+        (offset, state) pairs, where offset is the byte position just after the record
+        and can be passed back as `start_offset` to resume.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            email = record.get("inputs", record)
+            yield offset, _empty_state(email["email_subject"], email["email_body"], email.get("email_to", ""))
+
+
+def _message_to_state(raw: bytes) -> EmailState:
+    message: EmailMessage = message_from_bytes(raw, policy=policy.default)
+    part = message.get_body(preferencelist=("plain", "html"))
+    body = part.get_content().strip() if part is not None else ""
+    return _empty_state(str(message.get("Subject", "")), body, str(message.get("To", "")))
+
+
+def read_mbox(path: str, start_offset: int = 0) -> Iterator[SourceRecord]:
+    """
+    Lazily read emails from an mbox file.
+
+    `mailbox.mbox` indexes the whole file up front, so messages are split on
+    "From " separator lines here instead to keep memory flat and offsets exact.
+
+    Yields:
+        (offset, state) pairs, where offset is the byte position just after the message.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        lines = []
+        for line in f:
+            if line.startswith(b"From ") and lines:
+                yield offset, _message_to_state(b"".join(lines[1:]))
+                lines = []
+            offset += len(line)
+            lines.append(line)
+        if lines:
+            yield offset, _message_to_state(b"".join(lines[1:]))
+
+
+def read_source(path: str, start_offset: int = 0) -> Iterator[SourceRecord]:
+    """Pick the reader for `path` from its extension (`.mbox` or JSONL)."""
+    if path.endswith(".mbox"):
+        return read_mbox(path, start_offset)
+    return read_jsonl(path, start_offset)
+
+
+def _line_start(f: IO[bytes], end: int) -> int:
+    position = end
+    while position > 0:
+        read_size = min(4096, position)
+        position -= read_size
+        f.seek(position)
+        newline = f.read(read_size).rfind(b"\n")
+        if newline != -1:
+            return position + newline + 1
+    return 0
+
+
+def resume_offset(sink_path: str) -> int:
+    """
+    Return the source offset to resume from, based on the last complete sink record.
+
+    A partially written trailing line (from a crash mid-write) is truncated away.
+    """
+    if not os.path.exists(sink_path):
+        return 0
+    with open(sink_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return 0
+        f.seek(end - 1)
+        if f.read(1) != b"\n":
+            end = _line_start(f, end)
+            f.truncate(end)
+            logger.warning(f"Truncated partial record at end of {sink_path}")
+            if end == 0:
+                return 0
+        start = _line_start(f, end - 1)
+        f.seek(start)
+        return json.loads(f.read(end - start))["source_offset"]
+
+
+def _write_result(sink: IO[str], offset: int, result: EmailResult) -> None:
+    record = {key: value for key, value in (result.state or {}).items() if key not in _BODY_FIELDS}
+    record["source_offset"] = offset
+    record["latency"] = round(result.latency, 4)
+    record["error"] = repr(result.error) if result.error else None
+    sink.write(json.dumps(record) + "\n")
+    sink.flush()
+
+
+def run_pipeline(
+    source: Iterable[SourceRecord],
+    sink_path: str,
+    graph=None,
+    max_in_flight: int = DEFAULT_MAX_CONCURRENCY,
+    start_offset: int = 0,
+) -> IngestStats:
+    """
+    Stream emails through the graph and append results to a JSONL sink as they complete.
+
+    At most `max_in_flight` emails are read ahead of the sink, so memory does not grow
+    with the size of the source. Results are written in source order, so the
+    `source_offset` of the last sink line is always a safe resume point.
+
+    Args:
+        source: (offset, state) pairs, e.g. from `read_jsonl` or `read_mbox`.
+        sink_path: JSONL file to append results to.
+        graph: Compiled graph to invoke. Defaults to the production graph.
+        max_in_flight: Maximum number of emails read but not yet written.
+        start_offset: Offset the source was opened at, reported in the stats.
+
+    Returns:
+        IngestStats for the run.
+    """
+    if graph is None:
+        from simple_agent.agent import get_graph
+        graph = get_graph()
+
+    processed = failed = 0
+    end_offset = start_offset
+    window = deque()
+
+    def drain_one(sink: IO[str]) -> None:
+        nonlocal processed, failed, end_offset
+        offset, future = window.popleft()
+        result = future.result()
+        _write_result(sink, offset, result)
+        processed += 1
+        failed += 0 if result.ok else 1
+        end_offset = offset
+
+    logger.info(f"Starting ingestion into {sink_path} from offset {start_offset}")
+    with open(sink_path, "a") as sink, ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for index, (offset, email) in enumerate(source):
+            if len(window) >= max_in_flight:
+                drain_one(sink)
+            window.append((offset, pool.submit(run_email, graph, index, email)))
+        while window:
+            drain_one(sink)
+
+    logger.info(f"Ingested {processed} emails ({failed} failed) into {sink_path}, resume offset {end_offset}")
+    return IngestStats(processed=processed, failed=failed, start_offset=start_offset, end_offset=end_offset)
+
+
+def main(argv: Optional[list] = None) -> IngestStats:
+    parser = argparse.ArgumentParser(description="Stream a mail dump through the email triage graph.")
+    parser.add_argument("source", help="JSONL or .mbox file to read")
+    parser.add_argument("sink", help="JSONL file to append results to")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--resume", action="store_true", help="Continue after the last record in the sink")
+    parser.add_argument(
+        "--checkpoint-db",
+        help=f"SQLite file for per-email graph checkpoints (default: $EMAIL_AGENT_CHECKPOINT_DB or {DEFAULT_CHECKPOINT_PATH})",
+    )
+    parser.add_argument("--no-checkpoint", action="store_true", help="Run without graph checkpoints")
+    args = parser.parse_args(argv)
+
+    from simple_agent.agent import create_graph
+
+    checkpointer = False if args.no_checkpoint else sqlite_checkpointer(args.checkpoint_db)
+    start_offset = resume_offset(args.sink) if args.resume else 0
+    return run_pipeline(
+        read_source(args.source, start_offset),
+        args.sink,
+        graph=create_graph(checkpointer=checkpointer),
+        max_in_flight=args.max_in_flight,
+        start_offset=start_offset,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
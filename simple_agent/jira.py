@@ -0,0 +1,357 @@
+"""Jira clients, idempotency keys and micro-batched ticket creation."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_LABEL_PREFIX = "email-"
+DEFAULT_MAX_BATCH_SIZE = 50
+DEFAULT_MAX_WAIT_SECONDS = 0.5
+DEFAULT_IDEMPOTENCY_CACHE_SIZE = 100_000
+
+
+def email_idempotency_key(state: EmailState) -> str:
+    """Derive a stable key from the email so retries and duplicate deliveries map to one ticket."""
+    payload = json.dumps([
+        state["email_to"].strip().lower(),
+        " ".join(state["email_subject"].split()),
+        " ".join(state["email_body"].split()),
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class TicketRequest:
+    """A ticket to create, tagged with the idempotency key of the email it came from."""
+    summary: str
+    description: str
+    idempotency_key: Optional[str] = None
+
+    @property
+    def label(self) -> Optional[str]:
+        return f"{IDEMPOTENCY_LABEL_PREFIX}{self.idempotency_key}" if self.idempotency_key else None
+
+
+class BaseJiraClient:
+    """
+    Shared idempotent bulk-create flow.
+
+    Keys already seen by this process are answered from a bounded in-memory map;
+    the remaining keys are looked up remotely (`_find_existing`) before anything new
+    is created (`_bulk_create`). A key being resolved is reserved with a future under
+    the lock, so concurrent callers with the same key wait for that one create.
+    """
+
+    def __init__(self, idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE):
+        self._idempotency_cache_size = idempotency_cache_size
+        self._known: "OrderedDict[str, str]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def create_ticket(self, summary: str, description: str, idempotency_key: Optional[str] = None) -> str:
+        """Create one ticket, or return the existing ticket for `idempotency_key`."""
+        return self.create_tickets([TicketRequest(summary, description, idempotency_key)])[0]
+
+    async def acreate_ticket(self, summary: str, description: str, idempotency_key: Optional[str] = None) -> str:
+        """Async variant of create_ticket."""
+        return self.create_ticket(summary, description, idempotency_key)
+
+    def create_tickets(self, requests: List[TicketRequest]) -> List[str]:
+        """Create tickets in bulk, returning one ticket id per request in order."""
+        keys = [request.idempotency_key for request in requests if request.idempotency_key]
+        resolved: Dict[str, Optional[str]] = {}
+        waiting: Dict[str, Future] = {}
+        reserved: Dict[str, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key in self._known:
+                    resolved[key] = self._known[key]
+                elif key in self._in_flight:
+                    waiting[key] = self._in_flight[key]
+                else:
+                    reserved[key] = self._in_flight[key] = Future()
+
+        try:
+            if reserved:
+                resolved.update(self._find_existing(list(reserved)))
+
+            # One new ticket per reserved key not found remotely, and one per request without a key.
+            to_create = []
+            for request in requests:
+                key = request.idempotency_key
+                if key is None:
+                    to_create.append(request)
+                elif key in reserved and key not in resolved:
+                    resolved[key] = None
+                    to_create.append(request)
+            created = self._bulk_create(to_create) if to_create else []
+        except Exception as exc:
+            self._release(reserved, {}, exc)
+            raise
+
+        unkeyed_ids = []
+        for request, ticket_id in zip(to_create, created):
+            if request.idempotency_key is None:
+                unkeyed_ids.append(ticket_id)
+            else:
+                resolved[request.idempotency_key] = ticket_id
+        self._release(reserved, {key: resolved[key] for key in reserved})
+
+        # Keys another caller was already creating resolve to that caller's ticket.
+        for key, future in waiting.items():
+            resolved[key] = future.result()
+
+        if len(created) < len(requests):
+            logger.debug(f"Reused {len(requests) - len(created)} existing tickets for duplicate or retried emails")
+        unkeyed = iter(unkeyed_ids)
+        return [
+            resolved[request.idempotency_key] if request.idempotency_key else next(unkeyed)
+            for request in requests
+        ]
+
+    def _release(self, reserved: Dict[str, Future], tickets: Dict[str, str], error: Optional[Exception] = None) -> None:
+        """Record resolved tickets, drop the reservations and wake their waiters."""
+        with self._lock:
+            for key, ticket_id in tickets.items():
+                self._known[key] = ticket_id
+                self._known.move_to_end(key)
+            while len(self._known) > self._idempotency_cache_size:
+                self._known.popitem(last=False)
+            for key in reserved:
+                del self._in_flight[key]
+        for key, future in reserved.items():
+            if error is None:
+                future.set_result(tickets[key])
+            else:
+                future.set_exception(error)
+
+    def _find_existing(self, idempotency_keys: List[str]) -> Dict[str, str]:
+        return {}
+
+    def _bulk_create(self, requests: List[TicketRequest]) -> List[str]:
+        raise NotImplementedError
+
+
+class JiraClient(BaseJiraClient):
+    """Stubbed Jira client that simulates ticket creation."""
+
+    def _bulk_create(self, requests: List[TicketRequest]) -> List[str]:
+        ticket_ids = []
+        for request in requests:
+            ticket_id = f"JIRA-{uuid.uuid4().hex[:6].upper()}"
+            logger.info(f"[STUB] Created Jira ticket {ticket_id}: {request.summary}")
+            ticket_ids.append(ticket_id)
+        return ticket_ids
+
+
+class JiraRestClient(BaseJiraClient):
+    """
+    Long-lived Jira REST client over a pooled keep-alive HTTP connection.
+
+    Tickets are created with the bulk issue endpoint, and each carries its idempotency
+    key as a label so duplicates can be found with a single JQL search per batch.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        project_key: str,
+        auth: Optional[Tuple[str, str]] = None,
+        issue_type: str = "Task",
+        http_client: Optional[httpx.Client] = None,
+        max_connections: int = 10,
+        idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE,
+    ):
+        super().__init__(idempotency_cache_size)
+        self.project_key = project_key
+        self.issue_type = issue_type
+        self._http = http_client or httpx.Client(
+            base_url=base_url,
+            auth=auth,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def acreate_ticket(self, summary: str, description: str, idempotency_key: Optional[str] = None) -> str:
+        """Async variant of create_ticket; the blocking HTTP call runs in a worker thread."""
+        return await asyncio.to_thread(self.create_ticket, summary, description, idempotency_key)
+
+    def close(self) -> None:
+        self._http.close()
+
+    def _find_existing(self, idempotency_keys: List[str]) -> Dict[str, str]:
+        labels = {f"{IDEMPOTENCY_LABEL_PREFIX}{key}": key for key in idempotency_keys}
+        jql = f"project = {self.project_key} AND labels in ({', '.join(json.dumps(label) for label in labels)})"
+        response = self._http.get(
+            "/rest/api/2/search",
+            params={"jql": jql, "fields": "labels", "maxResults": len(labels)},
+        )
+        response.raise_for_status()
+        existing = {}
+        for issue in response.json().get("issues", []):
+            for label in issue["fields"].get("labels", []):
+                if label in labels:
+                    existing[labels[label]] = issue["key"]
+        return existing
+
+    def _bulk_create(self, requests: List[TicketRequest]) -> List[str]:
+        issue_updates = [
+            {
+                "fields": {
+                    "project": {"key": self.project_key},
+                    "issuetype": {"name": self.issue_type},
+                    "summary": request.summary,
+                    "description": request.description,
+                    "labels": [request.label] if request.label else [],
+                }
+            }
+            for request in requests
+        ]
+        response = self._http.post("/rest/api/2/issue/bulk", json={"issueUpdates": issue_updates})
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"Jira bulk create failed: {payload['errors']}")
+        ticket_ids = [issue["key"] for issue in payload["issues"]]
+        logger.info(f"Created {len(ticket_ids)} Jira tickets: {', '.join(ticket_ids)}")
+        return ticket_ids
+
+
+@dataclass(frozen=True)
+class TicketBatcherStats:
+    """Snapshot of ticket batcher counters."""
+    tickets_submitted: int
+    coalesced: int
+    batches_flushed: int
+
+
+class TicketBatcher:
+    """
+    Micro-batching queue in front of a Jira client.
+
+    Submissions are flushed as one bulk create when `max_batch_size` tickets are
+    queued or `max_wait` seconds after the oldest queued ticket, whichever comes first.
+    Submissions sharing an idempotency key while queued share one future.
+    """
+
+    def __init__(
+        self,
+        client: BaseJiraClient,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT_SECONDS,
+    ):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: List[Tuple[float, TicketRequest, Future]] = []
+        self._queued_keys: Dict[str, Future] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._batches_flushed = 0
+        self._tickets_submitted = 0
+        self._coalesced = 0
+        self._thread = threading.Thread(target=self._run, name="jira-ticket-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, request: TicketRequest) -> Future:
+        """Queue a ticket and return a future resolving to its ticket id."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("TicketBatcher is closed")
+            self._tickets_submitted += 1
+            if request.idempotency_key and request.idempotency_key in self._queued_keys:
+                self._coalesced += 1
+                return self._queued_keys[request.idempotency_key]
+            future: Future = Future()
+            self._queue.append((time.monotonic(), request, future))
+            if request.idempotency_key:
+                self._queued_keys[request.idempotency_key] = future
+            self._condition.notify()
+            return future
+
+    def stats(self) -> TicketBatcherStats:
+        """Return a snapshot of submission, coalescing and flush counters."""
+        with self._condition:
+            return TicketBatcherStats(
+                tickets_submitted=self._tickets_submitted,
+                coalesced=self._coalesced,
+                batches_flushed=self._batches_flushed,
+            )
+
+    def close(self) -> None:
+        """Flush anything queued and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0][0] + self.max_wait
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+                for _, request, _ in batch:
+                    self._queued_keys.pop(request.idempotency_key, None)
+                self._batches_flushed += 1
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[float, TicketRequest, Future]]) -> None:
+        logger.debug(f"Flushing {len(batch)} queued Jira tickets")
+        try:
+            ticket_ids = self.client.create_tickets([request for _, request, _ in batch])
+        except Exception as exc:
+            logger.error(f"Bulk Jira ticket creation failed for {len(batch)} tickets", exc_info=True)
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, _, future), ticket_id in zip(batch, ticket_ids):
+            future.set_result(ticket_id)
+
+
+_client: Optional[BaseJiraClient] = None
+_client_lock = threading.Lock()
+
+
+def get_jira_client() -> BaseJiraClient:
+    """
+    Return the process-wide Jira client.
+
+    Uses the REST client when JIRA_BASE_URL and JIRA_PROJECT_KEY are set, and the
+    stub client otherwise.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            base_url = os.environ.get("JIRA_BASE_URL")
+            project_key = os.environ.get("JIRA_PROJECT_KEY")
+            if base_url and project_key:
+                auth = (os.environ.get("JIRA_EMAIL", ""), os.environ.get("JIRA_API_TOKEN", ""))
+                _client = JiraRestClient(base_url, project_key, auth=auth)
+            else:
+                _client = JiraClient()
+        return _client
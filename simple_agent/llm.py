@@ -0,0 +1,236 @@
+"""Process-wide registry of long-lived chat model clients."""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+import httpx
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from simple_agent.ratelimit import AsyncRateLimitedTransport, RateLimitedTransport, RateLimiter
+
+if TYPE_CHECKING:
+    # Importing langchain_core.language_models costs ~70ms; only the OpenAI factory needs it at runtime.
+    from langchain_core.language_models import BaseChatModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+
+ModelFactory = Callable[[str, float, httpx.Client, httpx.AsyncClient], "BaseChatModel"]
+
+
+def openai_model_factory(
+    model: str,
+    temperature: float,
+    http_client: httpx.Client,
+    http_async_client: httpx.AsyncClient,
+) -> "BaseChatModel":
+    """
+    Build a ChatOpenAI client that sends all traffic through the shared connection pool.
+
+    The pool's rate-limited transport owns retries (429s against the shared budget,
+    transient errors with backoff), so the SDK's own retries are turned off.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        max_retries=0,
+        # Streamed calls (summarize_email) report token usage in a final chunk only when asked.
+        stream_usage=True,
+    )
+
+
+@dataclass(frozen=True)
+class RegistryStats:
+    """Snapshot of model registry and connection pool counters."""
+    hits: int
+    misses: int
+    requests: int
+    connections_opened: int
+
+    @property
+    def pool_reuse(self) -> int:
+        """Number of HTTP requests served over an already open connection."""
+        return max(self.requests - self.connections_opened, 0)
+
+
+class ModelRegistry:
+    """
+    Hands out long-lived chat models keyed by (model, temperature, structured-output schema).
+
+    Every model built by the registry shares one bounded sync and one bounded async
+    HTTP connection pool, so keep-alive connections are reused across nodes and judges.
+    Both pools send through one RateLimiter, so every call in the process shares a single
+    requests/min and tokens/min budget and 429 responses are retried with backoff.
+    `transport_wrapper` / `async_transport_wrapper` wrap the rate-limited transports,
+    e.g. with the eval suite's response cache, so cache hits never spend rate budget.
+    """
+
+    def __init__(
+        self,
+        model_factory: Optional[ModelFactory] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport_wrapper: Optional[Callable[[httpx.BaseTransport], httpx.BaseTransport]] = None,
+        async_transport_wrapper: Optional[Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport]] = None,
+    ):
+        self._model_factory = model_factory or openai_model_factory
+        self.rate_limiter = rate_limiter or RateLimiter.from_env()
+        self._transport_wrapper = transport_wrapper or (lambda transport: transport)
+        self._async_transport_wrapper = async_transport_wrapper or (lambda transport: transport)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, float, Optional[Hashable]], Runnable] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._hits = 0
+        self._misses = 0
+        self._requests = 0
+        self._connections_opened = 0
+
+    def get(
+        self,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0,
+        schema: Optional[Type[BaseModel]] = None,
+    ) -> Runnable:
+        """
+        Return the shared client for a model configuration, creating it on first use.
+
+        Args:
+            model: Model name passed to the model factory.
+            temperature: Sampling temperature.
+            schema: Optional Pydantic schema; when set the client is wrapped with
+                `with_structured_output(schema)`.
+
+        Returns:
+            A chat model, or a structured-output runnable when `schema` is set.
+        """
+        key = (model, float(temperature), schema)
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                self._hits += 1
+                return cached
+
+            self._misses += 1
+            base_key = (model, float(temperature), None)
+            llm = self._models.get(base_key)
+            if llm is None:
+                logger.debug(f"Creating chat model client model={model} temperature={temperature}")
+                llm = self._model_factory(model, float(temperature), *self._http_clients())
+                self._models[base_key] = llm
+            if schema is not None:
+                llm = llm.with_structured_output(schema)
+                self._models[key] = llm
+            return llm
+
+    def stats(self) -> RegistryStats:
+        """Return a snapshot of cache and connection pool counters."""
+        with self._lock:
+            return RegistryStats(
+                hits=self._hits,
+                misses=self._misses,
+                requests=self._requests,
+                connections_opened=self._connections_opened,
+            )
+
+    def close(self) -> None:
+        """
+        Drop all cached models and close the sync connection pool.
+
+        The async pool's connections belong to the event loop that opened them and can
+        only be closed on it, so code that made async calls must `await aclose()` instead.
+        """
+        with self._lock:
+            self._models.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._http_async_client = None
+
+    async def aclose(self) -> None:
+        """Drop all cached models and close both connection pools, on the loop that made the async calls."""
+        async_client = self._http_async_client
+        self.close()
+        if async_client is not None:
+            await async_client.aclose()
+
+    def _http_clients(self) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                transport=self._transport_wrapper(
+                    RateLimitedTransport(httpx.HTTPTransport(limits=self._limits), self.rate_limiter)
+                ),
+                event_hooks={"request": [self._on_request]},
+            )
+            self._http_async_client = httpx.AsyncClient(
+                transport=self._async_transport_wrapper(
+                    AsyncRateLimitedTransport(httpx.AsyncHTTPTransport(limits=self._limits), self.rate_limiter)
+                ),
+                event_hooks={"request": [self._on_async_request]},
+            )
+        return self._http_client, self._http_async_client
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _count_connection(self, event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+
+    # httpx has no public connection-pool counters, so new connections are observed
+    # through the httpcore "trace" request extension instead.
+    def _on_request(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._trace
+
+    async def _on_async_request(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._atrace
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._count_connection(event_name)
+
+    async def _atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._count_connection(event_name)
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return _registry
+
+
+def set_model_registry(registry: ModelRegistry) -> ModelRegistry:
+    """Replace the process-wide model registry and return the previous one."""
+    global _registry
+    previous = _registry
+    _registry = registry
+    return previous
+
+
+def get_chat_model(
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0,
+    schema: Optional[Type[BaseModel]] = None,
+) -> Runnable:
+    """Return a shared chat model from the process-wide registry."""
+    return _registry.get(model, temperature, schema)
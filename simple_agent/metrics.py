@@ -0,0 +1,388 @@
+"""In-process latency, token and cost instrumentation for graph nodes."""
+
+import bisect
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+DEFAULT_COST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+DEFAULT_MAX_OPEN_RUNS = 10_000
+
+# USD per million (input, output) tokens.
+MODEL_PRICES_PER_MILLION: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of a call, matching dated model names (e.g. gpt-4o-mini-2024-07-18) by prefix."""
+    if not model:
+        return 0.0
+    for name in sorted(MODEL_PRICES_PER_MILLION, key=len, reverse=True):
+        if model.startswith(name):
+            input_price, output_price = MODEL_PRICES_PER_MILLION[name]
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram; not thread-safe on its own."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count) pairs ending with +Inf, as Prometheus expects."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(bound): count for bound, count in self.cumulative()},
+        }
+
+
+@dataclass
+class TokenUsage:
+    """Token usage and estimated cost accumulated over one or more LLM calls."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    llm_calls: int = 0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cost += other.cost
+        self.llm_calls += other.llm_calls
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class UsageHandler(BaseCallbackHandler):
+    """
+    Adds every chat model call it sees, and the usage the call reports, to `usage`.
+
+    Instrumented nodes attach one per node; pass one in `config["callbacks"]` to tally a whole invocation.
+    """
+
+    run_inline = True
+
+    def __init__(self, usage: TokenUsage):
+        self.usage = usage
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        llm_output = response.llm_output or {}
+        call = TokenUsage(llm_calls=1)
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if not usage_metadata:
+                    continue
+                model = message.response_metadata.get("model_name") or llm_output.get("model_name")
+                input_tokens = usage_metadata.get("input_tokens", 0)
+                output_tokens = usage_metadata.get("output_tokens", 0)
+                call.add(TokenUsage(input_tokens, output_tokens, estimate_cost(model, input_tokens, output_tokens)))
+        self.usage.add(call)
+
+
+# Set for the duration of each instrumented node; LangChain attaches the handler to
+# every model call made inside it through the configure hook.
+_usage_handler: ContextVar[Optional[UsageHandler]] = ContextVar("simple_agent_usage_handler", default=None)
+register_configure_hook(_usage_handler, inheritable=True)
+
+
+class _NodeStats:
+    __slots__ = ("calls", "errors", "duration", "queue", "usage")
+
+    def __init__(self, latency_buckets: Sequence[float]):
+        self.calls = 0
+        self.errors = 0
+        self.duration = Histogram(latency_buckets)
+        self.queue = Histogram(latency_buckets)
+        self.usage = TokenUsage()
+
+
+class _EmailRun:
+    __slots__ = ("started_at", "ready_at", "usage")
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.ready_at: Optional[float] = None
+        self.usage = TokenUsage()
+
+
+def _run_key(state: EmailState) -> Optional[Tuple[str, str, str]]:
+    # Every node sees the same input fields, so they identify the email's run. Identical
+    # emails in flight at the same time share one run record.
+    try:
+        return state["email_to"], state["email_subject"], state["email_body"]
+    except (KeyError, TypeError):
+        return None
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class GraphMetrics:
+    """
+    Per-node and per-email latency, token and cost histograms for graph runs.
+
+    `wrap` instruments one node. For every call it records:
+    - wall time
+    - queue time: from the end of the email's previous node to this node's start
+    - LLM token usage reported in response metadata, with its estimated cost
+
+    Per-email totals close when a terminal node finishes or a node fails. Read the
+    numbers with `snapshot()`, `to_json()` or `to_prometheus()`.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        token_buckets: Sequence[float] = DEFAULT_TOKEN_BUCKETS,
+        cost_buckets: Sequence[float] = DEFAULT_COST_BUCKETS,
+        max_open_runs: int = DEFAULT_MAX_OPEN_RUNS,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.latency_buckets = tuple(latency_buckets)
+        self.token_buckets = tuple(token_buckets)
+        self.cost_buckets = tuple(cost_buckets)
+        self.max_open_runs = max_open_runs
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every recorded observation."""
+        with self._lock:
+            self._nodes: Dict[str, _NodeStats] = {}
+            self._runs: "OrderedDict[Any, _EmailRun]" = OrderedDict()
+            self._emails = 0
+            self._failed_runs = 0
+            self._abandoned_runs = 0
+            self._email_duration = Histogram(self.latency_buckets)
+            self._email_tokens = Histogram(self.token_buckets)
+            self._email_cost = Histogram(self.cost_buckets)
+
+    def wrap(self, name: str, node: Callable, terminal: Union[bool, Callable[[EmailState], bool]] = False) -> Callable:
+        """
+        Instrument `node` under `name`. `terminal` marks nodes that end an email's run,
+        either always (True) or when the predicate holds for the node's update.
+        The result is async if `node` is.
+        """
+        ends_run = terminal if callable(terminal) else (lambda update: terminal)
+
+        # `state` is left unannotated: LangGraph coerces node input to the annotated type,
+        # which would turn a CompactEmailState graph's records back into dicts.
+
+        if inspect.iscoroutinefunction(node):
+            async def instrumented_node(state) -> EmailState:
+                run_key, start, queue = self._begin(state)
+                usage = TokenUsage()
+                token = _usage_handler.set(UsageHandler(usage))
+                try:
+                    update = await node(state)
+                except Exception:
+                    self._finish(name, run_key, start, queue, usage, failed=True, ends_run=False)
+                    raise
+                finally:
+                    _usage_handler.reset(token)
+                self._finish(name, run_key, start, queue, usage, failed=False, ends_run=ends_run(update or {}))
+                return update
+        else:
+            def instrumented_node(state) -> EmailState:
+                run_key, start, queue = self._begin(state)
+                usage = TokenUsage()
+                token = _usage_handler.set(UsageHandler(usage))
+                try:
+                    update = node(state)
+                except Exception:
+                    self._finish(name, run_key, start, queue, usage, failed=True, ends_run=False)
+                    raise
+                finally:
+                    _usage_handler.reset(token)
+                self._finish(name, run_key, start, queue, usage, failed=False, ends_run=ends_run(update or {}))
+                return update
+
+        return instrumented_node
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of every node and email metric."""
+        with self._lock:
+            return {
+                "nodes": {
+                    name: {
+                        "calls": stats.calls,
+                        "errors": stats.errors,
+                        "duration_seconds": stats.duration.to_dict(),
+                        "queue_seconds": stats.queue.to_dict(),
+                        "input_tokens": stats.usage.input_tokens,
+                        "output_tokens": stats.usage.output_tokens,
+                        "cost_usd": stats.usage.cost,
+                    }
+                    for name, stats in sorted(self._nodes.items())
+                },
+                "emails": {
+                    "completed": self._emails,
+                    "failed": self._failed_runs,
+                    "in_flight": len(self._runs),
+                    "abandoned": self._abandoned_runs,
+                    "duration_seconds": self._email_duration.to_dict(),
+                    "tokens": self._email_tokens.to_dict(),
+                    "cost_usd": self._email_cost.to_dict(),
+                },
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Serialize `snapshot()` to JSON."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump_json(self, path: str) -> None:
+        """Write `to_json()` to `path`."""
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def to_prometheus(self, prefix: str = "email_agent") -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def histogram(name: str, value: Histogram, labels: str = "") -> None:
+            separator = "," if labels else ""
+            for bound, count in value.cumulative():
+                lines.append(f'{prefix}_{name}_bucket{{{labels}{separator}le="{_format_bound(bound)}"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{prefix}_{name}_sum{suffix} {value.sum!r}")
+            lines.append(f"{prefix}_{name}_count{suffix} {value.count}")
+
+        with self._lock:
+            nodes = sorted(self._nodes.items())
+            header("node_duration_seconds", "histogram", "Wall time spent inside each graph node.")
+            for name, stats in nodes:
+                histogram("node_duration_seconds", stats.duration, f'node="{name}"')
+            header("node_queue_seconds", "histogram", "Time from the previous node finishing to this node starting.")
+            for name, stats in nodes:
+                histogram("node_queue_seconds", stats.queue, f'node="{name}"')
+            header("node_calls_total", "counter", "Graph node invocations.")
+            for name, stats in nodes:
+                lines.append(f'{prefix}_node_calls_total{{node="{name}"}} {stats.calls}')
+            header("node_errors_total", "counter", "Graph node invocations that raised.")
+            for name, stats in nodes:
+                lines.append(f'{prefix}_node_errors_total{{node="{name}"}} {stats.errors}')
+            header("node_tokens_total", "counter", "LLM tokens used by each graph node.")
+            for name, stats in nodes:
+                lines.append(f'{prefix}_node_tokens_total{{node="{name}",direction="input"}} {stats.usage.input_tokens}')
+                lines.append(f'{prefix}_node_tokens_total{{node="{name}",direction="output"}} {stats.usage.output_tokens}')
+            header("node_cost_usd_total", "counter", "Estimated LLM cost of each graph node in USD.")
+            for name, stats in nodes:
+                lines.append(f'{prefix}_node_cost_usd_total{{node="{name}"}} {stats.usage.cost!r}')
+            header("emails_total", "counter", "Email graph runs by outcome.")
+            lines.append(f'{prefix}_emails_total{{outcome="completed"}} {self._emails}')
+            lines.append(f'{prefix}_emails_total{{outcome="failed"}} {self._failed_runs}')
+            header("email_duration_seconds", "histogram", "Wall time of a whole email run.")
+            histogram("email_duration_seconds", self._email_duration)
+            header("email_tokens", "histogram", "LLM tokens used per email.")
+            histogram("email_tokens", self._email_tokens)
+            header("email_cost_usd", "histogram", "Estimated LLM cost per email in USD.")
+            histogram("email_cost_usd", self._email_cost)
+        return "\n".join(lines) + "\n"
+
+    def _begin(self, state: EmailState) -> Tuple[Optional[Any], float, Optional[float]]:
+        run_key = _run_key(state)
+        start = self._clock()
+        if run_key is None:
+            return None, start, None
+        with self._lock:
+            run = self._runs.get(run_key)
+            if run is None:
+                run = self._runs[run_key] = _EmailRun(start)
+                if len(self._runs) > self.max_open_runs:
+                    self._runs.popitem(last=False)
+                    self._abandoned_runs += 1
+            queue = start - run.ready_at if run.ready_at is not None else None
+        return run_key, start, queue
+
+    def _finish(
+        self,
+        name: str,
+        run_key: Optional[Any],
+        start: float,
+        queue: Optional[float],
+        usage: TokenUsage,
+        failed: bool,
+        ends_run: bool,
+    ) -> None:
+        end = self._clock()
+        with self._lock:
+            stats = self._nodes.get(name)
+            if stats is None:
+                stats = self._nodes[name] = _NodeStats(self.latency_buckets)
+            stats.calls += 1
+            stats.errors += failed
+            stats.duration.observe(end - start)
+            if queue is not None:
+                stats.queue.observe(max(queue, 0.0))
+            stats.usage.add(usage)
+
+            run = self._runs.get(run_key) if run_key is not None else None
+            if run is None:
+                return
+            run.usage.add(usage)
+            run.ready_at = end if run.ready_at is None else max(run.ready_at, end)
+            if failed:
+                # The run ends here; a retry starts a new run.
+                del self._runs[run_key]
+                self._failed_runs += 1
+            elif ends_run:
+                del self._runs[run_key]
+                self._emails += 1
+                self._email_duration.observe(end - run.started_at)
+                self._email_tokens.observe(run.usage.total_tokens)
+                self._email_cost.observe(run.usage.cost)
+
+
+_metrics = GraphMetrics()
+
+
+def get_graph_metrics() -> GraphMetrics:
+    """Return the process-wide metrics that graphs record into by default."""
+    return _metrics
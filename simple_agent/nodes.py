@@ -1,22 +1,21 @@
+import asyncio
 import logging
-import uuid
+from typing import Any, Callable, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from langgraph.config import get_stream_writer
+from pydantic import BaseModel, Field
 
+from simple_agent.cache import ResponseCache
+from simple_agent.jira import TicketBatcher, TicketRequest, email_idempotency_key, get_jira_client
+from simple_agent.llm import DEFAULT_MODEL, get_chat_model
+from simple_agent.preprocess import prompt_body
 from simple_agent.state import EmailState
 
 logger = logging.getLogger(__name__)
 
 
-def summarize_email(state: EmailState) -> EmailState:
-    """Generate a concise summary of the email using OpenAI."""
-    subject = state["email_subject"]
-    body = state["email_body"]
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    
-    system_prompt = """You are an email summarization assistant. Your job is to create a brief, clear summary of customer support emails.
+SUMMARY_SYSTEM_PROMPT = """You are an email summarization assistant. Your job is to create a brief, clear summary of customer support emails.
 
 Create a 2-3 sentence summary that captures:
 - The main topic or issue
@@ -25,32 +24,39 @@ Create a 2-3 sentence summary that captures:
 
 Be concise and factual. Do not include greetings, signatures, or filler content in your summary."""
 
-    human_prompt = f"""Subject: {subject}
+ATTENTION_SYSTEM_PROMPT = """You are a support email classifier for a SaaS product. Your job is to determine if a customer support email requires immediate attention from the support team.
 
-Body: {body}
+An email requires immediate attention if it contains:
+- Service outages or downtime reports affecting the customer
+- Critical bugs blocking the customer's workflow
+- Security concerns or potential data breaches
+- Billing issues such as failed payments or incorrect charges
+- Account access problems (locked out, authentication failures)
+- Data loss or corruption reports
+- Compliance or legal concerns
+- Customers expressing significant frustration or threatening to cancel
 
-Provide a brief summary of this email."""
+An email does NOT require immediate attention if it is:
+- General feature requests or suggestions
+- How-to questions or documentation requests
+- Non-urgent feedback or praise
+- Newsletter or marketing-related inquiries
+- Routine account updates or preference changes
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=human_prompt),
-    ]
-    
-    response = llm.invoke(messages)
-    summary = response.content.strip()
-    
-    return {"email_summary": summary}
+Respond with ONLY "yes" or "no" - nothing else."""
 
 
-def check_email_attention(state: EmailState) -> EmailState:
-    """Determine if an email requires attention using OpenAI."""
-    subject = state["email_subject"]
-    body = state["email_body"]
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    
-    system_prompt = """You are a support email classifier for a SaaS product. Your job is to determine if a customer support email requires immediate attention from the support team.
+TRIAGE_SYSTEM_PROMPT = """You are a support email triage assistant for a SaaS product. For each customer support email you must produce two things.
 
+1. email_summary
+Create a 2-3 sentence summary that captures:
+- The main topic or issue
+- Any specific requests or problems mentioned
+- The urgency or tone if relevant
+
+Be concise and factual. Do not include greetings, signatures, or filler content in your summary.
+
+2. requires_attention
 An email requires immediate attention if it contains:
 - Service outages or downtime reports affecting the customer
 - Critical bugs blocking the customer's workflow
@@ -68,46 +74,228 @@ An email does NOT require immediate attention if it is:
 - Newsletter or marketing-related inquiries
 - Routine account updates or preference changes
 
-Respond with ONLY "yes" or "no" - nothing else."""
+Set requires_attention to true only if the email requires immediate attention."""
+
+
+class EmailTriageResponse(BaseModel):
+    """Structured output for the single-call summarize and classify node."""
+    email_summary: str = Field(description="2-3 sentence summary of the email")
+    requires_attention: bool = Field(description="Whether the email requires immediate attention")
+
+
+def build_summary_messages(state: EmailState) -> List[BaseMessage]:
+    """Build the chat messages used to summarize an email."""
+    human_prompt = f"""Subject: {state["email_subject"]}
+
+Body: {prompt_body(state, "summarize_email")}
+
+Provide a brief summary of this email."""
+
+    return [
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=human_prompt),
+    ]
+
 
-    human_prompt = f"""Subject: {subject}
+def build_attention_messages(state: EmailState) -> List[BaseMessage]:
+    """Build the chat messages used to decide if an email requires attention."""
+    human_prompt = f"""Subject: {state["email_subject"]}
 
-Body: {body}
+Body: {prompt_body(state, "check_email_attention")}
 
 Does this email require immediate attention?"""
 
-    messages = [
-        SystemMessage(content=system_prompt),
+    return [
+        SystemMessage(content=ATTENTION_SYSTEM_PROMPT),
         HumanMessage(content=human_prompt),
     ]
+
+
+def build_triage_messages(state: EmailState) -> List[BaseMessage]:
+    """Build the chat messages used to summarize and classify an email in one call."""
+    human_prompt = f"""Subject: {state["email_subject"]}
+
+Body: {prompt_body(state, "summarize_and_classify_email")}
+
+Summarize this email and decide whether it requires immediate attention."""
+
+    return [
+        SystemMessage(content=TRIAGE_SYSTEM_PROMPT),
+        HumanMessage(content=human_prompt),
+    ]
+
+
+def parse_attention_answer(content: str) -> bool:
+    """Interpret the classifier's yes/no answer."""
+    return content.strip().lower() == "yes"
+
+
+def _cache_lookup(
+    response_cache: Optional[ResponseCache], messages: List[BaseMessage]
+) -> Tuple[Optional[str], Optional[str]]:
+    if response_cache is None:
+        return None, None
+    key = response_cache.make_prompt_key(DEFAULT_MODEL, [(message.type, message.content) for message in messages])
+    return key, response_cache.get(key)
+
+
+def _cache_store(response_cache: Optional[ResponseCache], key: Optional[str], content: str) -> None:
+    if response_cache is not None:
+        response_cache.set(key, content)
+
+
+def _stream_writer() -> Callable[[Any], None]:
+    """The current graph run's custom stream writer, or a no-op when a node is called directly."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def summarize_email(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """
+    Generate a concise summary of the email using OpenAI.
+
+    The completion is streamed: token chunks reach `stream_mode="messages"` consumers as
+    they arrive, and the summary so far is written as `{"email_summary": ...}` to
+    `stream_mode="custom"` after every chunk, so a UI can render it before the call ends.
+    """
+    write = _stream_writer()
+    messages = build_summary_messages(state)
+    key, summary = _cache_lookup(response_cache, messages)
+    if summary is None:
+        llm = get_chat_model(DEFAULT_MODEL, temperature=0)
+        text = ""
+        for chunk in llm.stream(messages):
+            if chunk.text:
+                text += chunk.text
+                write({"email_summary": text.strip()})
+        summary = text.strip()
+        _cache_store(response_cache, key, summary)
+    else:
+        write({"email_summary": summary})
     
-    response = llm.invoke(messages)
-    answer = response.content.strip().lower()
+    return {"email_summary": summary}
+
+
+async def asummarize_email(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """Async variant of summarize_email."""
+    write = _stream_writer()
+    messages = build_summary_messages(state)
+    key, summary = _cache_lookup(response_cache, messages)
+    if summary is None:
+        llm = get_chat_model(DEFAULT_MODEL, temperature=0)
+        text = ""
+        async for chunk in llm.astream(messages):
+            if chunk.text:
+                text += chunk.text
+                write({"email_summary": text.strip()})
+        summary = text.strip()
+        _cache_store(response_cache, key, summary)
+    else:
+        write({"email_summary": summary})
     
-    requires_attention = answer == "yes"
+    return {"email_summary": summary}
+
+
+def check_email_attention(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """Determine if an email requires attention using OpenAI."""
+    messages = build_attention_messages(state)
+    key, answer = _cache_lookup(response_cache, messages)
+    if answer is None:
+        llm = get_chat_model(DEFAULT_MODEL, temperature=0)
+        response = llm.invoke(messages)
+        answer = response.content.strip()
+        _cache_store(response_cache, key, answer)
     
-    return {"requires_attention": requires_attention}
+    return {"requires_attention": parse_attention_answer(answer)}
 
 
-class JiraClient:
-    """Stubbed Jira client that simulates ticket creation."""
+async def acheck_email_attention(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """Async variant of check_email_attention."""
+    messages = build_attention_messages(state)
+    key, answer = _cache_lookup(response_cache, messages)
+    if answer is None:
+        llm = get_chat_model(DEFAULT_MODEL, temperature=0)
+        response = await llm.ainvoke(messages)
+        answer = response.content.strip()
+        _cache_store(response_cache, key, answer)
     
-    def create_ticket(self, summary: str, description: str) -> str:
-        """Create a Jira ticket (stubbed - just logs and returns fake ID)."""
-        ticket_id = f"JIRA-{uuid.uuid4().hex[:6].upper()}"
-        logger.info(f"[STUB] Created Jira ticket {ticket_id}: {summary}")
-        return ticket_id
+    return {"requires_attention": parse_attention_answer(answer)}
+
 
+def _triage_update(triage: EmailTriageResponse) -> EmailState:
+    return {
+        "email_summary": triage.email_summary.strip(),
+        "requires_attention": triage.requires_attention,
+    }
 
-def create_jira_ticket(state: EmailState) -> EmailState:
-    """Create a Jira ticket for emails that require attention."""
-    client = JiraClient()
+
+def summarize_and_classify_email(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """Summarize the email and decide if it requires attention with one structured-output call."""
+    messages = build_triage_messages(state)
+    key, cached = _cache_lookup(response_cache, messages)
+    if cached is not None:
+        return _triage_update(EmailTriageResponse.model_validate_json(cached))
+
+    llm = get_chat_model(DEFAULT_MODEL, temperature=0, schema=EmailTriageResponse)
+    triage = llm.invoke(messages)
+    _cache_store(response_cache, key, triage.model_dump_json())
     
+    return _triage_update(triage)
+
+
+async def asummarize_and_classify_email(state: EmailState, response_cache: Optional[ResponseCache] = None) -> EmailState:
+    """Async variant of summarize_and_classify_email."""
+    messages = build_triage_messages(state)
+    key, cached = _cache_lookup(response_cache, messages)
+    if cached is not None:
+        return _triage_update(EmailTriageResponse.model_validate_json(cached))
+
+    llm = get_chat_model(DEFAULT_MODEL, temperature=0, schema=EmailTriageResponse)
+    triage = await llm.ainvoke(messages)
+    _cache_store(response_cache, key, triage.model_dump_json())
+    
+    return _triage_update(triage)
+
+
+def _ticket_fields(state: EmailState) -> Tuple[str, str]:
     summary = f"Email requires attention: {state['email_subject']}"
     email_summary = state.get("email_summary", "No summary available")
-    description = f"Email to: {state['email_to']}\n\nSummary:\n{email_summary}\n\nBody:\n{state['email_body']}"
+    body = prompt_body(state, "create_jira_ticket")
+    description = f"Email to: {state['email_to']}\n\nSummary:\n{email_summary}\n\nBody:\n{body}"
+    return summary, description
+
+
+def _ticket_request(state: EmailState) -> TicketRequest:
+    return TicketRequest(*_ticket_fields(state), idempotency_key=email_idempotency_key(state))
+
+
+def create_jira_ticket(state: EmailState, ticket_batcher: Optional[TicketBatcher] = None) -> EmailState:
+    """
+    Create a Jira ticket for emails that require attention.
+
+    Uses the process-wide Jira client, or queues the ticket on `ticket_batcher` for bulk
+    creation when given. The idempotency key derived from the email means a retried or
+    duplicate email resolves to the ticket that already exists.
+    """
+    request = _ticket_request(state)
+    if ticket_batcher is not None:
+        ticket_id = ticket_batcher.submit(request).result()
+    else:
+        ticket_id = get_jira_client().create_ticket(request.summary, request.description, request.idempotency_key)
+    logger.info(f"Created Jira ticket {ticket_id} for email: {state['email_subject']}")
     
-    ticket_id = client.create_ticket(summary, description)
+    return {"jira_ticket_id": ticket_id}
+
+
+async def acreate_jira_ticket(state: EmailState, ticket_batcher: Optional[TicketBatcher] = None) -> EmailState:
+    """Async variant of create_jira_ticket."""
+    request = _ticket_request(state)
+    if ticket_batcher is not None:
+        ticket_id = await asyncio.wrap_future(ticket_batcher.submit(request))
+    else:
+        ticket_id = await get_jira_client().acreate_ticket(request.summary, request.description, request.idempotency_key)
     logger.info(f"Created Jira ticket {ticket_id} for email: {state['email_subject']}")
     
     return {"jira_ticket_id": ticket_id}
@@ -117,3 +305,8 @@ def log_no_attention_needed(state: EmailState) -> EmailState:
     """Log that the email does not require attention."""
     logger.info(f"Email does not require attention: {state['email_subject']}")
     return {}
+
+
+async def alog_no_attention_needed(state: EmailState) -> EmailState:
+    """Async variant of log_no_attention_needed."""
+    return log_no_attention_needed(state)
@@ -0,0 +1,157 @@
+"""Deterministic pre-classifier that decides obvious emails without an LLM call."""
+
+import inspect
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+from simple_agent.preprocess import prompt_body
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A named regex fragment whose weight pushes towards (positive) or away from (negative) attention."""
+    name: str
+    pattern: str
+    weight: float
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule("outage", r"\boutage\b|\bdowntime\b|\b(?:server|site|service|production|app)\b[^.]{0,40}\b(?:is|went|has been) down\b", 2.0),
+    Rule("security", r"\bsecurity (?:vulnerability|breach|incident)\b|\bdata breach\b|\bcompromised\b", 2.0),
+    Rule("data_loss", r"\bdata (?:loss|corruption)\b|\bdata (?:has been|was|is) (?:lost|corrupted)\b", 2.0),
+    Rule("billing_failure", r"\bpayments? (?:processing )?(?:is |are )?fail(?:ed|ing|s)?\b|\bincorrect (?:billing )?charge\b|\b(?:double|over)[- ]?charged\b", 2.0),
+    Rule("locked_out", r"\blocked out\b|\b(?:cannot|can't|unable to) (?:access|log ?in|sign ?in)\b", 1.5),
+    Rule("cancel_threat", r"\bthreaten(?:s|ed|ing)? to cancel\b|\bcancel (?:my|our|their) (?:subscription|account)\b", 1.5),
+    Rule("urgency", r"\burgent\b|\basap\b|\bimmediately\b|\bimmediate action\b|\bcritical\b|\bemergency\b", 1.0),
+    Rule("feature_request", r"\bfeature request\b|\bwould love to see\b|\bit would be nice\b", -2.0),
+    Rule("newsletter", r"\bnewsletter\b|\bunsubscribe\b", -2.0),
+    Rule("gratitude", r"\bthank you\b|\bpositive feedback\b|\bkeep up the good work\b", -1.5),
+    Rule("meeting_notes", r"\bmeeting notes\b|\bnotes from\b|\bteam sync\b", -1.5),
+    Rule("not_blocking", r"\bnot blocking\b|\bno rush\b|\bwhen you get a chance\b", -1.5),
+)
+
+
+@dataclass(frozen=True)
+class PreClassification:
+    """Result of the local tier. `requires_attention` is None when the email must be escalated."""
+    requires_attention: Optional[bool]
+    score: float
+    matched_rules: Tuple[str, ...]
+
+    @property
+    def decided(self) -> bool:
+        return self.requires_attention is not None
+
+
+@dataclass(frozen=True)
+class PreClassifierStats:
+    """Snapshot of local vs. escalated decisions."""
+    local_attention: int
+    local_no_attention: int
+    escalated: int
+
+    @property
+    def local_decision_rate(self) -> float:
+        total = self.local_attention + self.local_no_attention + self.escalated
+        return (self.local_attention + self.local_no_attention) / total if total else 0.0
+
+
+class PreClassifier:
+    """
+    Scores an email with a single compiled multi-pattern regex and decides it locally
+    when the evidence is one-sided and strong enough.
+
+    An email is decided as requiring attention when its score reaches
+    `attention_threshold` and no negative rule matched, and as not requiring attention
+    when its score falls to `no_attention_threshold` and no positive rule matched.
+    Everything else is escalated.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Rule] = DEFAULT_RULES,
+        attention_threshold: float = 2.0,
+        no_attention_threshold: float = -1.5,
+    ):
+        self.rules = tuple(rules)
+        self.attention_threshold = attention_threshold
+        self.no_attention_threshold = no_attention_threshold
+        self._weights = {rule.name: rule.weight for rule in self.rules}
+        self._pattern = re.compile(
+            "|".join(f"(?P<{rule.name}>{rule.pattern})" for rule in self.rules),
+            re.IGNORECASE,
+        )
+        self._lock = threading.Lock()
+        self._local_attention = 0
+        self._local_no_attention = 0
+        self._escalated = 0
+
+    def classify(self, subject: str, body: str) -> PreClassification:
+        """Score an email and return a local decision, or None to escalate."""
+        matched = {match.lastgroup for match in self._pattern.finditer(f"{subject}\n{body}")}
+        weights = [self._weights[name] for name in matched]
+        score = sum(weights)
+        has_positive = any(weight > 0 for weight in weights)
+        has_negative = any(weight < 0 for weight in weights)
+
+        if score >= self.attention_threshold and not has_negative:
+            decision = True
+        elif score <= self.no_attention_threshold and not has_positive:
+            decision = False
+        else:
+            decision = None
+
+        with self._lock:
+            if decision is True:
+                self._local_attention += 1
+            elif decision is False:
+                self._local_no_attention += 1
+            else:
+                self._escalated += 1
+        return PreClassification(requires_attention=decision, score=score, matched_rules=tuple(sorted(matched)))
+
+    def stats(self) -> PreClassifierStats:
+        """Return a snapshot of local-decision counters."""
+        with self._lock:
+            return PreClassifierStats(
+                local_attention=self._local_attention,
+                local_no_attention=self._local_no_attention,
+                escalated=self._escalated,
+            )
+
+    def wrap(self, llm_node: Callable) -> Callable:
+        """
+        Build a tiered attention node that decides locally when it can and otherwise
+        delegates to `llm_node`. The result is async if `llm_node` is.
+        """
+        def decide(state: EmailState) -> PreClassification:
+            # Score what the LLM classifier would see, not quoted history or signatures
+            result = self.classify(state["email_subject"], prompt_body(state, "check_email_attention"))
+            if result.decided:
+                logger.debug(
+                    f"Pre-classified email locally requires_attention={result.requires_attention} "
+                    f"score={result.score} rules={result.matched_rules}"
+                )
+            return result
+
+        # Unannotated `state`, like GraphMetrics.wrap, so compact graphs pass their records through
+        if inspect.iscoroutinefunction(llm_node):
+            async def tiered_check_email_attention(state) -> EmailState:
+                result = decide(state)
+                if result.decided:
+                    return {"requires_attention": result.requires_attention}
+                return await llm_node(state)
+        else:
+            def tiered_check_email_attention(state) -> EmailState:
+                result = decide(state)
+                if result.decided:
+                    return {"requires_attention": result.requires_attention}
+                return llm_node(state)
+
+        return tiered_check_email_attention
@@ -0,0 +1,177 @@
+"""Email body cleanup and per-node token budgets applied before the body reaches a prompt or ticket."""
+
+import logging
+import re
+from typing import List
+
+from simple_agent.ratelimit import CHARS_PER_TOKEN
+from simple_agent.state import EmailState
+
+logger = logging.getLogger(__name__)
+
+# Most body tokens each consumer may see; longer bodies keep their head and tail.
+TOKEN_BUDGETS = {
+    "summarize_email": 1024,
+    "check_email_attention": 512,
+    "summarize_and_classify_email": 1024,
+    "create_jira_ticket": 2048,
+}
+HEAD_RATIO = 0.75
+
+_REPLY_HEADER = re.compile(
+    r"^\s*(?:on\s.{0,200}\bwrote:|-{3,}\s*original message\s*-{3,}|_{20,})\s*$",
+    re.IGNORECASE,
+)
+_FORWARD_HEADER = re.compile(r"^\s*-{3,}\s*forwarded message\s*-{3,}\s*$|^\s*begin forwarded message:", re.IGNORECASE)
+_OUTLOOK_FROM = re.compile(r"^\s*\*?from:\*?\s", re.IGNORECASE)
+_OUTLOOK_FIELD = re.compile(r"^\s*\*?(?:sent|date|to|subject):\*?\s", re.IGNORECASE)
+_SIGNATURE_DELIMITER = re.compile(r"^--\s?$")
+_MOBILE_SIGNATURE = re.compile(r"^\s*(?:sent from my|get outlook for)\b", re.IGNORECASE)
+_SIGN_OFF = re.compile(
+    r"^\s*(?:(?:best|kind|warm|many)\s+)?(?:regards|thanks|thank you|cheers|sincerely|best)[\s,.!]*$",
+    re.IGNORECASE,
+)
+_DISCLAIMER = re.compile(
+    r"^\s*(?:disclaimer\b|confidentiality notice\b|this (?:e-?mail|message)(?: and any (?:files|attachments))?"
+    r"[^.]{0,80}\b(?:confidential|privileged|intended (?:solely )?for))",
+    re.IGNORECASE,
+)
+# Sign-offs are only trusted this close to the end, followed by a few short name/title lines.
+_SIGN_OFF_WINDOW = 8
+_SIGNATURE_LINE_MAX = 80
+_SIGNATURE_MAX_LINES = 4
+# A lowercase word ending a sentence ("it fails."); names, titles and "Acme Inc." do not match.
+_SENTENCE_END = re.compile(r"\b[a-z]{2,}[.!?](?:\s|$)")
+_POSTSCRIPT = re.compile(r"^\s*(?:[Pp]\.\s?[Ss]\.|PS[:.,-]?\s)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting, the same characters-per-token estimate the rate limiter uses."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _is_reply_header(lines: List[str], index: int) -> bool:
+    line = lines[index]
+    if _REPLY_HEADER.match(line):
+        return True
+    # "On Mon, Jan 6, 2025 at 9:14 AM Jane Doe <jane@example.com>" wrapped before "wrote:"
+    if line.lstrip().lower().startswith("on ") and index + 1 < len(lines):
+        return bool(_REPLY_HEADER.match(f"{line} {lines[index + 1]}"))
+    # Outlook reply block: From: followed by Sent:/Date:/To: lines
+    if _OUTLOOK_FROM.match(line):
+        following = lines[index + 1:index + 4]
+        return any(_OUTLOOK_FIELD.match(field) for field in following)
+    return False
+
+
+def _looks_like_signature(lines: List[str]) -> bool:
+    content = [line for line in lines if line.strip()]
+    return len(content) <= _SIGNATURE_MAX_LINES and all(
+        len(line) <= _SIGNATURE_LINE_MAX and not _SENTENCE_END.search(line) for line in content
+    )
+
+
+def _strip_signature(lines: List[str]) -> List[str]:
+    """Drop a trailing signature, keeping any P.S. that follows it."""
+    postscript = next((index for index, line in enumerate(lines) if _POSTSCRIPT.match(line)), len(lines))
+
+    def cut(index: int) -> List[str]:
+        if postscript == len(lines):
+            return lines[:index]
+        return "\n".join(lines[:index]).rstrip().split("\n") + [""] + lines[postscript:]
+
+    for index, line in enumerate(lines[:postscript]):
+        if _SIGNATURE_DELIMITER.match(line) or _MOBILE_SIGNATURE.match(line):
+            return cut(index)
+    content = [index for index, line in enumerate(lines[:postscript]) if line.strip()]
+    for index in content[-_SIGN_OFF_WINDOW:]:
+        if _SIGN_OFF.match(lines[index]) and _looks_like_signature(lines[index + 1:postscript]):
+            return cut(index)
+    return lines
+
+
+def clean_email_body(body: str) -> str:
+    """
+    Remove quoted reply history, signatures and legal disclaimers from an email body.
+
+    Only the newest message is kept: everything from the first reply header ("On ... wrote:",
+    "-----Original Message-----", an Outlook From:/Sent: block) on is dropped. When the reply
+    header opens the email (a bottom-posted reply), the ">"-quoted lines after it are dropped
+    instead; ">" lines in emails that are not replies (pasted logs, steps) are kept, and so are
+    forwarded messages, since they usually carry the report. A sign-off is only cut when what
+    follows looks like a signature, and a P.S. is kept. If cleaning would leave nothing, the
+    stripped original is returned.
+    """
+    lines = body.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+    quoted_from = len(lines)
+    for index in range(len(lines)):
+        if _FORWARD_HEADER.match(lines[index]):
+            break
+        if _is_reply_header(lines, index):
+            if any(line.strip() for line in lines[:index]):
+                lines = lines[:index]
+                break
+            quoted_from = min(quoted_from, index)
+    lines = [
+        line.rstrip() for index, line in enumerate(lines)
+        if index <= quoted_from or not line.lstrip().startswith(">")
+    ]
+
+    paragraphs = "\n".join(lines).split("\n\n")
+    kept = [paragraph.strip("\n") for paragraph in paragraphs if paragraph.strip() and not _DISCLAIMER.match(paragraph)]
+    cleaned = "\n".join(_strip_signature("\n\n".join(kept).split("\n"))).strip()
+    if not cleaned:
+        return body.strip()
+    # Hand back the original string when nothing was removed, so the state holds one copy.
+    return body if cleaned == body else cleaned
+
+
+def truncate_to_budget(text: str, max_tokens: int, head_ratio: float = HEAD_RATIO) -> str:
+    """
+    Cap `text` at roughly `max_tokens`, keeping its head and tail.
+
+    The opening states the problem and the closing usually holds the ask, so the middle is
+    replaced with a marker saying how much was omitted. Cuts fall on whitespace.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    head_chars = int(max_chars * head_ratio)
+    tail_chars = max_chars - head_chars
+    head = text[:head_chars]
+    head = head[:head.rfind(" ")] if " " in head else head
+    tail = text[len(text) - tail_chars:]
+    tail = tail[tail.find(" ") + 1:] if " " in tail else tail
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head.rstrip()}\n\n[... {omitted} characters omitted ...]\n\n{tail.lstrip()}"
+
+
+def cleaned_body(state: EmailState) -> str:
+    """
+    The cleaned body from preprocess_email, or the body cleaned here when the state was not
+    preprocessed (custom graphs, provider batch backfill).
+    """
+    body = state.get("clean_email_body")
+    if body is None:
+        body = clean_email_body(state["email_body"])
+    return body
+
+
+def prompt_body(state: EmailState, node: str) -> str:
+    """Body text `node` should use: cleaned_body truncated to the node's TOKEN_BUDGETS entry."""
+    return truncate_to_budget(cleaned_body(state), TOKEN_BUDGETS[node])
+
+
+def preprocess_email(state: EmailState) -> EmailState:
+    """Clean the email body once at the graph entry so every downstream node reuses it."""
+    cleaned = clean_email_body(state["email_body"])
+    saved = estimate_tokens(state["email_body"]) - estimate_tokens(cleaned)
+    if saved > 0:
+        logger.debug(f"Preprocessing saved ~{saved} body tokens: {state['email_subject']}")
+    return {"clean_email_body": cleaned}
+
+
+async def apreprocess_email(state: EmailState) -> EmailState:
+    """Async variant of preprocess_email."""
+    return preprocess_email(state)
@@ -0,0 +1,380 @@
+"""Process-wide request and token rate limiting for model API traffic, with 429 and transient-error retries."""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Tier-1 limits for gpt-4o-mini; response headers replace them once the API reports its own.
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200_000
+DEFAULT_BURST_SECONDS = 1.0
+DEFAULT_MAX_RETRIES = 6
+# Timeouts, connection errors, 408/409 and 5xx get the OpenAI SDK's default retry budget.
+DEFAULT_MAX_TRANSIENT_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+# Completion tokens assumed for requests without max_tokens; the API counts them against TPM too.
+DEFAULT_COMPLETION_TOKENS = 128
+CHARS_PER_TOKEN = 4
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an `x-ratelimit-reset-*` duration such as "20ms", "1s" or "6m0s" into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from `retry-after-ms` or `retry-after` (delta seconds or an HTTP date)."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient_status(status_code: int) -> bool:
+    """Statuses retried besides 429, as the OpenAI SDK does: request timeout, lock conflict, server errors."""
+    return status_code in (408, 409) or status_code >= 500
+
+
+def estimate_request_tokens(content: bytes) -> int:
+    """
+    Estimate the tokens a chat completion request counts against the TPM limit.
+
+    Prompt tokens are approximated from message length; completion tokens come from
+    `max_completion_tokens` / `max_tokens`, or DEFAULT_COMPLETION_TOKENS when unset.
+    """
+    try:
+        payload = json.loads(content)
+    except (TypeError, ValueError):
+        return DEFAULT_COMPLETION_TOKENS
+    if not isinstance(payload, dict):
+        return DEFAULT_COMPLETION_TOKENS
+    prompt_chars = 0
+    for message in payload.get("messages") or ():
+        body = message.get("content") if isinstance(message, dict) else None
+        prompt_chars += len(body) if isinstance(body, str) else len(json.dumps(body or ""))
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt_chars // CHARS_PER_TOKEN + int(completion)
+
+
+class _Bucket:
+    """Token bucket that lets reservations drive the level negative; the deficit is the wait."""
+
+    def __init__(self, per_minute: float, burst_seconds: float, now: float):
+        self.burst_seconds = burst_seconds
+        self.set_limit(per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    def set_limit(self, per_minute: float) -> None:
+        self.per_minute = float(per_minute)
+        self.rate = self.per_minute / 60
+        self.capacity = max(self.rate * self.burst_seconds, 1.0)
+        if hasattr(self, "level"):
+            self.level = min(self.level, self.capacity)
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        # A request larger than the burst capacity borrows the excess instead of never fitting;
+        # the debt delays whoever reserves next.
+        self.refill(now)
+        self.level -= amount
+        deficit = -self.level - max(amount - self.capacity, 0.0)
+        return deficit / self.rate if deficit > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class RateLimiterStats:
+    """Snapshot of rate limiter counters and the limits currently in force."""
+    requests: int
+    throttled: int
+    wait_seconds: float
+    rate_limited: int
+    retries: int
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+class RateLimiter:
+    """
+    Shared requests/min and tokens/min budget for every model call in the process.
+
+    Each request reserves one request and its estimated tokens before it is sent, and
+    waits until both buckets cover the reservation, so concurrent callers are paced
+    rather than rejected. `x-ratelimit-*` response headers replace the configured limits
+    with the server's, and an exhausted budget pauses all callers until it resets.
+    A 429 pauses all callers for its `Retry-After` and is retried with jittered
+    exponential backoff by the transports below. They also retry connection errors,
+    timeouts, 408/409 and 5xx responses up to `max_transient_retries` times, so chat
+    clients built on them must not retry themselves (the registry's factory sets the
+    OpenAI SDK's `max_retries=0`).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+        burst_seconds: float = DEFAULT_BURST_SECONDS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_transient_retries: int = DEFAULT_MAX_TRANSIENT_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_retries = max_retries
+        self.max_transient_retries = max_transient_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        now = clock()
+        self._requests = _Bucket(requests_per_minute, burst_seconds, now)
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds, now)
+        self._paused_until = now
+        self._request_count = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+        self._rate_limited = 0
+        self._retries = 0
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """Build a limiter from $OPENAI_REQUESTS_PER_MINUTE / $OPENAI_TOKENS_PER_MINUTE, if set."""
+        return cls(
+            requests_per_minute=float(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)),
+            tokens_per_minute=float(os.environ.get("OPENAI_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)),
+        )
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens; return the seconds to wait before sending."""
+        with self._lock:
+            now = self._clock()
+            wait = max(
+                self._requests.reserve(1, now),
+                self._tokens.reserve(tokens, now),
+                self._paused_until - now,
+            )
+            self._request_count += 1
+            if wait > 0:
+                self._throttled += 1
+                self._wait_seconds += wait
+            return max(wait, 0.0)
+
+    def acquire(self, tokens: int) -> None:
+        """Block until a request of `tokens` tokens may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        """Async variant of acquire."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Adopt the server's limits and remaining budget from `x-ratelimit-*` response headers."""
+        with self._lock:
+            now = self._clock()
+            for bucket, kind in ((self._requests, "requests"), (self._tokens, "tokens")):
+                limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+                if limit and limit != bucket.per_minute:
+                    logger.info(f"Adopting server rate limit: {limit:g} {kind}/min (was {bucket.per_minute:g})")
+                    bucket.set_limit(limit)
+                # `remaining` is already stale when it arrives and counts a whole minute, so it is
+                # only trusted as an exhaustion signal: pause everyone until the window resets.
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and remaining < 1 and reset:
+                    self._paused_until = max(self._paused_until, now + reset)
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Record a 429 and return how long the failed request should wait before retrying.
+
+        All callers are paused for the server's `Retry-After`; the retrying request adds
+        jitter on top so they do not return in lockstep. Without `Retry-After` the delay
+        is full-jitter exponential backoff and the buckets are drained instead.
+        """
+        with self._lock:
+            now = self._clock()
+            self._rate_limited += 1
+            self._retries += 1
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, now + retry_after)
+                return retry_after + self._rng.uniform(0, self.backoff_base)
+            for bucket in (self._requests, self._tokens):
+                bucket.refill(now)
+                bucket.level = min(bucket.level, 0.0)
+            return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def transient_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Return how long to wait before retrying a request that hit a transient failure.
+
+        These say nothing about the shared budget, so only the failed request waits: the
+        server's `Retry-After` if it sent one, otherwise full-jitter exponential backoff.
+        """
+        with self._lock:
+            self._retries += 1
+        if retry_after is not None:
+            return retry_after
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def give_up(self) -> None:
+        """Record a 429 that exhausted max_retries and is returned to the caller."""
+        with self._lock:
+            self._rate_limited += 1
+
+    def stats(self) -> RateLimiterStats:
+        """Return a snapshot of counters and current limits."""
+        with self._lock:
+            return RateLimiterStats(
+                requests=self._request_count,
+                throttled=self._throttled,
+                wait_seconds=self._wait_seconds,
+                rate_limited=self._rate_limited,
+                retries=self._retries,
+                requests_per_minute=self._requests.per_minute,
+                tokens_per_minute=self._tokens.per_minute,
+            )
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that paces requests through a RateLimiter and retries 429s and transient failures."""
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: RateLimiter):
+        self._transport = transport
+        self._limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = estimate_request_tokens(request.content)
+        attempt = 0
+        failures = 0
+        while True:
+            self._limiter.acquire(tokens)
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as exc:
+                if failures >= self._limiter.max_transient_retries:
+                    raise
+                delay = self._limiter.transient_delay(failures, None)
+                failures += 1
+                logger.warning(f"{type(exc).__name__} from {request.url.host}, retry {failures} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            self._limiter.observe(response.headers)
+            if is_transient_status(response.status_code) and failures < self._limiter.max_transient_retries:
+                delay = self._limiter.transient_delay(failures, parse_retry_after(response.headers))
+                response.close()
+                failures += 1
+                logger.warning(f"HTTP {response.status_code} from {request.url.host}, retry {failures} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            if response.status_code != 429:
+                return response
+            if attempt >= self._limiter.max_retries:
+                self._limiter.give_up()
+                return response
+            delay = self._limiter.retry_delay(attempt, parse_retry_after(response.headers))
+            response.close()
+            attempt += 1
+            logger.warning(f"Rate limited by {request.url.host}, retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async variant of RateLimitedTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter):
+        self._transport = transport
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = estimate_request_tokens(request.content)
+        attempt = 0
+        failures = 0
+        while True:
+            await self._limiter.aacquire(tokens)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as exc:
+                if failures >= self._limiter.max_transient_retries:
+                    raise
+                delay = self._limiter.transient_delay(failures, None)
+                failures += 1
+                logger.warning(f"{type(exc).__name__} from {request.url.host}, retry {failures} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self._limiter.observe(response.headers)
+            if is_transient_status(response.status_code) and failures < self._limiter.max_transient_retries:
+                delay = self._limiter.transient_delay(failures, parse_retry_after(response.headers))
+                await response.aclose()
+                failures += 1
+                logger.warning(f"HTTP {response.status_code} from {request.url.host}, retry {failures} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code != 429:
+                return response
+            if attempt >= self._limiter.max_retries:
+                self._limiter.give_up()
+                return response
+            delay = self._limiter.retry_delay(attempt, parse_retry_after(response.headers))
+            await response.aclose()
+            attempt += 1
+            logger.warning(f"Rate limited by {request.url.host}, retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
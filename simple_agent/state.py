@@ -1,4 +1,5 @@
-from typing import TypedDict, Optional
+import sys
+from typing import Any, Dict, Iterator, Optional, TypedDict
 
 
 class EmailState(TypedDict):
@@ -6,7 +7,94 @@ class EmailState(TypedDict):
     email_body: str
     email_subject: str
     email_to: str
+    # Preprocessing: body without quoted replies, signatures and disclaimers
+    clean_email_body: Optional[str]
     # Output
     email_summary: Optional[str]
     requires_attention: Optional[bool]
     jira_ticket_id: Optional[str]
+    # Incident deduplication (set when the graph has an incident index)
+    matched_ticket_id: Optional[str]
+    similarity_score: Optional[float]
+
+
+EMAIL_STATE_FIELDS = tuple(EmailState.__annotations__)
+
+
+class CompactEmailState:
+    """
+    Slot-based EmailState for large in-memory email queues, also usable as the graph's
+    state schema (`create_graph(compact_state=True)`).
+
+    It has no per-email dict, `email_to` is interned, and a `clean_email_body` equal to
+    the body shares the body string instead of holding a second copy. Nodes read it like
+    the TypedDict: `state["email_body"]`, `state.get("clean_email_body")`. Unset fields
+    read as None and are left out of `keys()` and `to_dict()`.
+    """
+
+    __slots__ = EMAIL_STATE_FIELDS
+    __annotations__ = EmailState.__annotations__
+
+    def __init__(
+        self,
+        email_body: str,
+        email_subject: str,
+        email_to: str,
+        clean_email_body: Optional[str] = None,
+        email_summary: Optional[str] = None,
+        requires_attention: Optional[bool] = None,
+        jira_ticket_id: Optional[str] = None,
+        matched_ticket_id: Optional[str] = None,
+        similarity_score: Optional[float] = None,
+    ):
+        self.email_body = email_body
+        self.email_subject = email_subject
+        self.email_to = sys.intern(email_to) if type(email_to) is str else email_to
+        self.clean_email_body = email_body if clean_email_body == email_body else clean_email_body
+        self.email_summary = email_summary
+        self.requires_attention = requires_attention
+        self.jira_ticket_id = jira_ticket_id
+        self.matched_ticket_id = matched_ticket_id
+        self.similarity_score = similarity_score
+
+    @classmethod
+    def from_dict(cls, state: EmailState) -> "CompactEmailState":
+        """Build a compact record from an EmailState dict."""
+        return cls(**{name: state[name] for name in EMAIL_STATE_FIELDS if name in state})
+
+    def to_dict(self) -> EmailState:
+        """Return the fields that are set as an EmailState dict."""
+        return {name: self[name] for name in self.keys()}
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def keys(self):
+        return [name for name in EMAIL_STATE_FIELDS if getattr(self, name) is not None]
+
+    def __contains__(self, name: object) -> bool:
+        return name in EMAIL_STATE_FIELDS and getattr(self, name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactEmailState):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == {name: value for name, value in other.items() if value is not None}
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields: Dict[str, Any] = self.to_dict()
+        return f"CompactEmailState({', '.join(f'{name}={value!r}' for name, value in fields.items())})"
@@ -0,0 +1,41 @@
+import pytest
+
+from simple_agent.llm import set_model_registry
+from simple_agent.state import EmailState
+from tests.stubs.fake_chat_model import LatencyFakeChatModel, fake_model_registry
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "fake_model(**kwargs): LatencyFakeChatModel arguments for the fake_model fixture",
+    )
+
+
+def make_email(
+    subject: str = "URGENT: Production server is down",
+    body: str = "Customers cannot access the service.",
+    to: str = "oncall@company.com",
+) -> EmailState:
+    """Graph input for one email, with every field the graph fills in still unset."""
+    return {
+        "email_subject": subject,
+        "email_body": body,
+        "email_to": to,
+        "email_summary": None,
+        "requires_attention": None,
+        "jira_ticket_id": None,
+    }
+
+
+@pytest.fixture
+def fake_model(request):
+    """
+    Serve every model in the registry from one LatencyFakeChatModel for the test.
+
+    `@pytest.mark.fake_model(latency=0.2)` on a test or module passes constructor arguments.
+    """
+    marker = request.node.get_closest_marker("fake_model")
+    model = LatencyFakeChatModel(**(marker.kwargs if marker else {}))
+    previous = set_model_registry(fake_model_registry(model))
+    yield model
+    set_model_registry(previous)
@@ -0,0 +1,47 @@
+from typing import List
+
+SIGNATURE = """Thanks,
+Alex Morgan
+Customer Success Lead | Northwind Traders
++1 (555) 010-0199 | northwind.example"""
+
+DISCLAIMER = (
+    "CONFIDENTIALITY NOTICE: This e-mail and any attachments are confidential and intended solely "
+    "for the use of the individual or entity to whom they are addressed. If you have received this "
+    "e-mail in error, please notify the sender immediately and delete it from your system. Any "
+    "unauthorised copying, disclosure or distribution of the material in this e-mail is forbidden."
+)
+
+
+def _quote(text: str) -> str:
+    return "\n".join(f"> {line}" if line else ">" for line in text.split("\n"))
+
+
+def with_thread_noise(body: str, history: List[str]) -> str:
+    """
+    Wrap `body` the way a long reply thread arrives: signature, legal disclaimer, then every
+    earlier message quoted under a Gmail or Outlook reply header, each with its own signature.
+    """
+    parts = [body, "", SIGNATURE, "", DISCLAIMER]
+    for depth, earlier in enumerate(history):
+        if depth % 2:
+            parts += [
+                "",
+                "-----Original Message-----",
+                "From: Support Team <support@company.com>",
+                f"Sent: Monday, January {6 + depth}, 2025 9:{10 + depth} AM",
+                "To: Alex Morgan <alex@northwind.example>",
+                "Subject: RE: Follow-up",
+                "",
+                earlier,
+                "",
+                SIGNATURE,
+            ]
+        else:
+            parts += [
+                "",
+                f"On Mon, Jan {6 + depth}, 2025 at 9:{10 + depth} AM Support Team <support@company.com>",
+                "wrote:",
+                _quote(f"{earlier}\n\n{SIGNATURE}\n\n{DISCLAIMER}"),
+            ]
+    return "\n".join(parts)
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Type
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from simple_agent.llm import ModelRegistry
+from tests.stubs.stub_nodes import URGENT_KEYWORDS
+
+_call_lock = threading.Lock()
+
+
+FAKE_SUMMARY = "The sender reports an issue. They are asking for help."
+
+
+def _is_urgent(messages: List[BaseMessage]) -> bool:
+    prompt = messages[-1].content.lower()
+    return any(keyword in prompt for keyword in URGENT_KEYWORDS)
+
+
+def keyword_responder(messages: List[BaseMessage]) -> str:
+    """Answer attention prompts with yes/no from URGENT_KEYWORDS and anything else with a summary."""
+    if messages[-1].content.endswith("Does this email require immediate attention?"):
+        return "yes" if _is_urgent(messages) else "no"
+    return FAKE_SUMMARY
+
+
+def keyword_structured_responder(schema: Type[BaseModel], messages: List[BaseMessage]) -> BaseModel:
+    """Fill a structured-output schema by field type, deciding requires_attention from URGENT_KEYWORDS."""
+    values = {}
+    for name, field in schema.model_fields.items():
+        if name == "requires_attention":
+            values[name] = _is_urgent(messages)
+        elif field.annotation is bool:
+            values[name] = True
+        elif field.annotation is int:
+            values[name] = 3
+        elif isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+            values[name] = keyword_structured_responder(field.annotation, messages)
+        else:
+            values[name] = FAKE_SUMMARY
+    return schema(**values)
+
+
+class LatencyFakeChatModel(BaseChatModel):
+    """
+    Local chat model that answers deterministically after an injected delay.
+
+    Streaming calls wait `latency` before the first chunk, then yield the answer word by
+    word, `chunk_latency` apart; the last chunk carries the usage metadata.
+    """
+
+    latency: float = 0.0
+    chunk_latency: float = 0.0
+    responder: Callable[[List[BaseMessage]], str] = keyword_responder
+    structured_responder: Callable[[Type[BaseModel], List[BaseMessage]], BaseModel] = keyword_structured_responder
+    calls: int = 0
+    model_name: str = "gpt-4o-mini"
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake-chat-model"
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> Runnable:
+        def respond(messages: List[BaseMessage]) -> BaseModel:
+            time.sleep(self.latency)
+            self._count_call()
+            return self.structured_responder(schema, messages)
+
+        async def arespond(messages: List[BaseMessage]) -> BaseModel:
+            await asyncio.sleep(self.latency)
+            self._count_call()
+            return self.structured_responder(schema, messages)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+    def _count_call(self) -> None:
+        with _call_lock:
+            self.calls += 1
+
+    def _usage(self, messages: List[BaseMessage], content: str) -> dict:
+        # Whitespace-separated words stand in for tokens.
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(content.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        self._count_call()
+        content = self.responder(messages)
+        message = AIMessage(
+            content=content,
+            usage_metadata=self._usage(messages, content),
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[ChatGenerationChunk]:
+        self._count_call()
+        content = self.responder(messages)
+        words = content.split(" ")
+        chunks = [
+            ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            for i, word in enumerate(words)
+        ]
+        chunks.append(ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(messages, content),
+            response_metadata={"model_name": self.model_name},
+        )))
+        return chunks
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(messages)):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(messages)):
+            if i:
+                await asyncio.sleep(self.chunk_latency)
+            yield chunk
+
+
+def fake_model_registry(model: LatencyFakeChatModel) -> ModelRegistry:
+    """Build a model registry that hands out `model` for every configuration."""
+    return ModelRegistry(model_factory=lambda *args: model)
@@ -0,0 +1,94 @@
+import json
+import re
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+_LABEL = re.compile(r'"([^"]+)"')
+
+
+class FakeJiraServer:
+    """In-process HTTP server implementing the Jira bulk-create and search endpoints."""
+
+    def __init__(self, project_key: str = "SUP"):
+        self.project_key = project_key
+        self.issues: List[Dict] = []
+        self.request_counts: Counter = Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "FakeJiraServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def bulk_create(self, body: Dict) -> Dict:
+        created = []
+        with self._lock:
+            for update in body["issueUpdates"]:
+                key = f"{self.project_key}-{len(self.issues) + 1}"
+                self.issues.append({"key": key, "fields": update["fields"]})
+                created.append({"id": str(len(self.issues)), "key": key})
+        return {"issues": created, "errors": []}
+
+    def search(self, jql: str) -> Dict:
+        wanted = set(_LABEL.findall(jql))
+        with self._lock:
+            matches = [
+                {"key": issue["key"], "fields": {"labels": issue["fields"].get("labels", [])}}
+                for issue in self.issues
+                if wanted & set(issue["fields"].get("labels", []))
+            ]
+        return {"issues": matches, "total": len(matches)}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def _reply(self, payload: Dict, status: int = 200) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with server._lock:
+                    server.request_counts[f"GET {url.path}"] += 1
+                if url.path != "/rest/api/2/search":
+                    return self._reply({"errorMessages": ["Not found"]}, 404)
+                self._reply(server.search(parse_qs(url.query)["jql"][0]))
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                with server._lock:
+                    server.request_counts[f"POST {url.path}"] += 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if url.path != "/rest/api/2/issue/bulk":
+                    return self._reply({"errorMessages": ["Not found"]}, 404)
+                self._reply(server.bulk_create(body), 201)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,180 @@
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _default_responder(body: Dict) -> str:
+    return "yes"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        pass  # clients closing pooled keep-alive connections is expected
+
+
+class _LimitBucket:
+    """Server-side token bucket holding `burst_seconds` worth of a per-minute limit."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        return max(min(amount, self.capacity) - self.level, 0.0) / self.rate
+
+
+class FakeOpenAIServer:
+    """
+    In-process HTTP server that speaks the OpenAI chat completions API.
+
+    With `requests_per_minute` / `tokens_per_minute` it enforces limits like the real API:
+    every response carries `x-ratelimit-*` headers, and a request over budget gets a 429
+    with `retry-after-ms`. Requests are charged prompt characters / 4 plus `max_tokens`.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[Dict], str]] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 1.0,
+    ):
+        self.responder = responder or _default_responder
+        self.requests: List[Dict] = []
+        self.rate_limited = 0
+        self._forced_rejections: List[float] = []
+        self._request_bucket = _LimitBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self._token_bucket = _LimitBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reject_next(self, count: int, retry_after: float) -> None:
+        """Answer the next `count` requests with 429 and `retry-after-ms`, regardless of limits."""
+        with self._lock:
+            self._forced_rejections.extend([retry_after] * count)
+
+    def admit(self, body: Dict) -> Tuple[int, Dict[str, str]]:
+        """Charge a request against the limits; return (status, rate limit headers)."""
+        tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        tokens += body.get("max_tokens") or 0
+        charges = [(self._request_bucket, 1, "requests"), (self._token_bucket, tokens, "tokens")]
+        headers: Dict[str, str] = {}
+        with self._lock:
+            if self._forced_rejections:
+                self.rate_limited += 1
+                return 429, {"retry-after-ms": str(int(self._forced_rejections.pop(0) * 1000))}
+            now = time.monotonic()
+            wait = 0.0
+            for bucket, amount, _ in charges:
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_for(amount))
+            if wait == 0:
+                for bucket, amount, _ in charges:
+                    if bucket is not None:
+                        bucket.level -= amount
+            else:
+                self.rate_limited += 1
+                headers["retry-after-ms"] = str(math.ceil(wait * 1000))
+            for bucket, _, kind in charges:
+                if bucket is not None:
+                    headers[f"x-ratelimit-limit-{kind}"] = f"{bucket.per_minute:g}"
+                    headers[f"x-ratelimit-remaining-{kind}"] = str(int(max(bucket.level, 0)))
+        return (200 if wait == 0 else 429), headers
+
+    def handle(self, body: Dict) -> Dict:
+        with self._lock:
+            self.requests.append(body)
+        return {
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.responder(body)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+        }
+
+    def stream_events(self, body: Dict) -> bytes:
+        """The completion as server-sent events, one word per chunk, for `"stream": true` requests."""
+        completion = self.handle(body)
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        words = completion["choices"][0]["message"]["content"].split(" ")
+        events = [
+            {**base, "object": "chat.completion.chunk",
+             "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}]}
+            for i, word in enumerate(words)
+        ]
+        events.append({**base, "object": "chat.completion.chunk",
+                       "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": completion["usage"]})
+        lines = [f"data: {json.dumps(event)}\n\n" for event in events] + ["data: [DONE]\n\n"]
+        return "".join(lines).encode()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                body = json.loads(self.rfile.read(length))
+                status, headers = server.admit(body)
+                if status == 429:
+                    error = {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+                    payload = json.dumps({"error": error}).encode()
+                    content_type = "application/json"
+                elif body.get("stream"):
+                    payload = server.stream_events(body)
+                    content_type = "text/event-stream"
+                else:
+                    payload = json.dumps(server.handle(body)).encode()
+                    content_type = "application/json"
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
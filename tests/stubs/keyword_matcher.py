@@ -0,0 +1,119 @@
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from simple_agent.state import EmailState
+
+_END = ""
+_SEPARATOR = "\x00"
+
+# Below this many keywords, repeated `in` checks (a C-level fast search per keyword)
+# beat a regex that has to attempt a match at every text position.
+SUBSTRING_SCAN_MAX_KEYWORDS = 64
+
+
+def _build_trie(keywords: Iterable[str]) -> Dict:
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    return trie
+
+
+def _trie_to_pattern(node: Dict) -> Optional[str]:
+    # Returns None for a leaf, so callers can fold single-character tails into a character class.
+    optional = _END in node
+    branches: List[str] = []
+    leaf_chars: List[str] = []
+    for char in sorted(key for key in node if key != _END):
+        tail = _trie_to_pattern(node[char])
+        if tail is None:
+            leaf_chars.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + tail)
+
+    if not branches and not leaf_chars:
+        return None
+
+    single_class = not branches
+    if leaf_chars:
+        branches.append(leaf_chars[0] if len(leaf_chars) == 1 else f"[{''.join(leaf_chars)}]")
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+    if optional:
+        pattern = f"{pattern}?" if single_class else f"(?:{pattern})?"
+    return pattern
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive keyword matcher compiled into a single trie-shaped regex.
+
+    Shared prefixes are factored out, so the regex engine walks one automaton over the
+    text instead of testing every keyword separately. Small keyword sets without
+    word-boundary mode use plain substring checks instead, which are faster there.
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword})
+        self.word_boundary = word_boundary
+        pattern = _trie_to_pattern(_build_trie(self.keywords)) if self.keywords else None
+        if pattern is None:
+            self._regex = None
+        elif word_boundary:
+            self._regex = re.compile(rf"\b{pattern}\b")
+        else:
+            self._regex = re.compile(pattern)
+        self._substring_scan = not word_boundary and len(self.keywords) <= SUBSTRING_SCAN_MAX_KEYWORDS
+
+    def matches(self, text: str) -> bool:
+        """Return True if any keyword occurs in `text`."""
+        if self._substring_scan:
+            lowered = text.lower()
+            return any(keyword in lowered for keyword in self.keywords)
+        return self._regex is not None and self._regex.search(text.lower()) is not None
+
+    def find_all(self, text: str) -> List[str]:
+        """Return the non-overlapping keyword occurrences in `text`, left to right."""
+        if self._regex is None:
+            return []
+        return self._regex.findall(text.lower())
+
+    def matches_batch(self, texts: Sequence[str]) -> List[bool]:
+        """
+        Return one flag per text, scanning the whole batch as a single joined string.
+
+        After a hit the scan jumps straight to the next text, so each text costs at most
+        one partial pass.
+        """
+        if self._substring_scan:
+            return [self.matches(text) for text in texts]
+        results = [False] * len(texts)
+        if self._regex is None or not texts:
+            return results
+
+        # Offsets come from the lowered texts: lower() can change length ('İ' becomes two code points)
+        lowered = [text.lower() for text in texts]
+        starts = []
+        position = 0
+        for text in lowered:
+            starts.append(position)
+            position += len(text) + 1
+        haystack = _SEPARATOR.join(lowered)
+
+        position = 0
+        while True:
+            match = self._regex.search(haystack, position)
+            if match is None:
+                return results
+            index = bisect.bisect_right(starts, match.start()) - 1
+            results[index] = True
+            if index + 1 == len(texts):
+                return results
+            position = starts[index + 1]
+
+    def matches_emails(self, emails: Sequence[EmailState]) -> List[bool]:
+        """Batch `matches` over the subject and body of each email."""
+        return self.matches_batch([f"{email['email_subject']} {email['email_body']}" for email in emails])
@@ -1,4 +1,8 @@
+import time
+from typing import Callable
+
 from simple_agent.state import EmailState
+from tests.stubs.keyword_matcher import KeywordMatcher
 
 # Keywords that indicate an email requires attention
 URGENT_KEYWORDS = [
@@ -14,6 +18,8 @@ URGENT_KEYWORDS = [
     "emergency",
 ]
 
+URGENT_MATCHER = KeywordMatcher(URGENT_KEYWORDS)
+
 
 def summarize_email_stubbed(state: EmailState) -> EmailState:
     """Generate a simple stubbed summary of the email."""
@@ -28,12 +34,19 @@ def summarize_email_stubbed(state: EmailState) -> EmailState:
 
 def check_email_attention_stubbed(state: EmailState) -> EmailState:
     """Determine if an email requires attention based on subject and body."""
-    subject = state["email_subject"].lower()
-    body = state["email_body"].lower()
-    
-    # Check if any urgent keywords are in the subject or body
-    combined_text = f"{subject} {body}"
-    
-    requires_attention = any(keyword in combined_text for keyword in URGENT_KEYWORDS)
+    requires_attention = URGENT_MATCHER.matches(f"{state['email_subject']} {state['email_body']}")
     
-    return {"requires_attention": requires_attention}
\ No newline at end of file
+    return {"requires_attention": requires_attention}
+
+def slow_node(node: Callable[[EmailState], EmailState], delay: float) -> Callable[[EmailState], EmailState]:
+    """Wrap a stub node so it sleeps for `delay` seconds, simulating an LLM round-trip."""
+    def wrapper(state: EmailState) -> EmailState:
+        time.sleep(delay)
+        return node(state)
+
+    return wrapper
+
+
+def summarize_and_classify_email_stubbed(state: EmailState) -> EmailState:
+    """Produce both the stubbed summary and the keyword-based attention decision in one node."""
+    return {**summarize_email_stubbed(state), **check_email_attention_stubbed(state)}
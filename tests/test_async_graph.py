@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from simple_agent.agent import create_graph
+from tests.conftest import make_email
+
+FAKE_LATENCY = 0.2
+
+pytestmark = pytest.mark.fake_model(latency=FAKE_LATENCY)
+
+
+def test_async_graph_creates_ticket_for_urgent_email(fake_model):
+    """Test that the async node variants produce the same routing as the sync nodes."""
+    graph = create_graph(use_async=True)
+
+    result = asyncio.run(graph.ainvoke(make_email("URGENT: outage", "Production is down.")))
+
+    assert result["requires_attention"] is True
+    assert result["jira_ticket_id"].startswith("JIRA-")
+    assert result["email_summary"]
+    assert fake_model.calls == 2
+
+
+def test_async_graph_logs_normal_email(fake_model):
+    """Test that the async graph routes non-urgent emails to logging."""
+    graph = create_graph(use_async=True)
+
+    result = asyncio.run(graph.ainvoke(make_email("Feature idea", "Dark mode would be nice.")))
+
+    assert result["requires_attention"] is False
+    assert result["jira_ticket_id"] is None
+
+
+def test_async_graph_multiplexes_many_emails_on_one_event_loop(fake_model):
+    """Test that one event loop drives many in-flight emails without a thread per email."""
+    graph = create_graph(use_async=True)
+    emails = [make_email(f"URGENT: outage {i}", "Production is down.") for i in range(100)]
+
+    async def run_all():
+        return await asyncio.gather(*(graph.ainvoke(email) for email in emails))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < FAKE_LATENCY * 10
+    assert all(result["jira_ticket_id"] for result in results)
+    assert fake_model.calls == 200
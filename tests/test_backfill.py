@@ -0,0 +1,106 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from simple_agent.backfill import (
+    JOB_FAILED,
+    BackfillError,
+    LocalFileBatchBackend,
+    OpenAIBatchBackend,
+    build_batch_requests,
+    run_backfill,
+)
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import URGENT_KEYWORDS
+
+
+def keyword_batch_responder(body):
+    prompt = body["messages"][-1]["content"]
+    if prompt.endswith("Does this email require immediate attention?"):
+        return "yes" if any(keyword in prompt.lower() for keyword in URGENT_KEYWORDS) else "no"
+    return " Backfilled summary. "
+
+
+class DroppingBackend(LocalFileBatchBackend):
+    """Local backend that loses the result for one custom_id, like a per-request provider error."""
+
+    def __init__(self, directory, dropped_custom_id):
+        super().__init__(directory, keyword_batch_responder)
+        self.dropped_custom_id = dropped_custom_id
+
+    def results(self, job_id):
+        results = super().results(job_id)
+        results.pop(self.dropped_custom_id)
+        return results
+
+
+def test_build_batch_requests_uses_node_prompts():
+    """Test that each email contributes one summary and one attention request in chat completions format."""
+    requests = build_batch_requests([make_email("Outage")])
+
+    assert [request.custom_id for request in requests] == ["0:summarize_email", "0:check_email_attention"]
+    assert requests[1].body["messages"][0]["role"] == "system"
+    assert requests[1].body["messages"][1]["content"].endswith("Does this email require immediate attention?")
+    assert json.loads(requests[0].to_jsonl())["url"] == "/v1/chat/completions"
+
+
+def test_run_backfill_submits_one_job_and_routes_each_email(tmp_path):
+    """Test that all prompts go out as one batch job and results are routed to Jira or logging."""
+    backend = LocalFileBatchBackend(str(tmp_path), keyword_batch_responder, polls_until_complete=3)
+    emails = [make_email("URGENT: outage"), make_email("Weekly notes"), make_email("Critical bug")]
+
+    batch = run_backfill(emails, backend, poll_interval=0)
+
+    assert len(list(tmp_path.glob("*.input.jsonl"))) == 1
+    assert [result.state["requires_attention"] for result in batch.results] == [True, False, True]
+    assert [result.state["jira_ticket_id"] is not None for result in batch.results] == [True, False, True]
+    assert all(result.state["email_summary"] == "Backfilled summary." for result in batch.results)
+
+
+def test_run_backfill_reports_emails_with_missing_results_as_failed(tmp_path):
+    """Test that an email whose batch request failed is not routed and is reported as failed."""
+    backend = DroppingBackend(str(tmp_path), "1:check_email_attention")
+
+    batch = run_backfill([make_email("URGENT: outage"), make_email("Weekly notes")], backend, poll_interval=0)
+
+    assert [result.ok for result in batch.results] == [True, False]
+    assert isinstance(batch.results[1].error, BackfillError)
+
+
+def test_run_backfill_raises_when_job_fails(tmp_path):
+    """Test that a failed batch job surfaces as BackfillError."""
+    backend = LocalFileBatchBackend(str(tmp_path), keyword_batch_responder)
+    backend.status = lambda job_id: JOB_FAILED
+
+    with pytest.raises(BackfillError):
+        run_backfill([make_email("URGENT: outage")], backend, poll_interval=0)
+
+
+def test_openai_backend_maps_batch_api_calls(tmp_path):
+    """Test the OpenAI backend against a fake client implementing the files and batches APIs."""
+    uploads = []
+    output = "\n".join([
+        json.dumps({"custom_id": "0:summarize_email", "error": None, "response": {
+            "status_code": 200, "body": {"choices": [{"message": {"content": "Summary."}}]}}}),
+        json.dumps({"custom_id": "0:check_email_attention", "error": {"code": "server_error"}, "response": None}),
+    ])
+    job = SimpleNamespace(id="batch_1", status="completed", output_file_id="file_out")
+    client = SimpleNamespace(
+        files=SimpleNamespace(
+            create=lambda file, purpose: uploads.append((file, purpose)) or SimpleNamespace(id="file_in"),
+            content=lambda file_id: SimpleNamespace(text=output),
+        ),
+        batches=SimpleNamespace(
+            create=lambda input_file_id, endpoint, completion_window: job,
+            retrieve=lambda job_id: job,
+        ),
+    )
+    backend = OpenAIBatchBackend(client=client)
+
+    job_id = backend.submit(build_batch_requests([make_email("Outage")]))
+
+    assert job_id == "batch_1"
+    assert uploads[0][1] == "batch"
+    assert backend.status(job_id) == "completed"
+    assert backend.results(job_id) == {"0:summarize_email": "Summary."}
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+
+from simple_agent.agent import create_graph
+from simple_agent.batch import aprocess_emails, percentile, process_emails
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+
+
+class ConcurrencyTracker:
+    """Stub summary node that records how many emails are in flight at once."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, state):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return summarize_email_stubbed(state)
+
+
+def _failing_check(state):
+    if "explode" in state["email_subject"]:
+        raise RuntimeError("classifier unavailable")
+    return check_email_attention_stubbed(state)
+
+
+def test_process_emails_preserves_input_order():
+    """Test that results line up with inputs even when later emails finish first."""
+    def variable_delay_summary(state):
+        time.sleep(0.05 if state["email_subject"].endswith("0") else 0.0)
+        return summarize_email_stubbed(state)
+
+    graph = create_graph(summarize_email=variable_delay_summary, check_email_attention=check_email_attention_stubbed)
+    emails = [make_email(f"urgent issue {i}") for i in range(10)]
+
+    batch = process_emails(emails, graph=graph, max_concurrency=4)
+
+    assert [result.index for result in batch.results] == list(range(10))
+    assert [result.state["email_subject"] for result in batch.results] == [email["email_subject"] for email in emails]
+
+
+def test_process_emails_bounds_concurrency():
+    """Test that no more than max_concurrency emails are in flight."""
+    tracker = ConcurrencyTracker(delay=0.05)
+    graph = create_graph(summarize_email=tracker, check_email_attention=check_email_attention_stubbed)
+
+    process_emails([make_email(f"note {i}") for i in range(12)], graph=graph, max_concurrency=3)
+
+    assert tracker.max_in_flight == 3
+
+
+def test_process_emails_isolates_failures():
+    """Test that one failing email is reported without affecting the rest of the batch."""
+    graph = create_graph(summarize_email=summarize_email_stubbed, check_email_attention=_failing_check)
+    emails = [make_email("urgent outage"), make_email("please explode"), make_email("weekly notes")]
+
+    batch = process_emails(emails, graph=graph)
+
+    assert [result.ok for result in batch.results] == [True, False, True]
+    assert isinstance(batch.results[1].error, RuntimeError)
+    assert batch.results[1].state is None
+    assert batch.results[0].state["jira_ticket_id"].startswith("JIRA-")
+    assert batch.stats.total == 3
+    assert batch.stats.failed == 1
+    assert batch.stats.succeeded == 2
+
+
+def test_process_emails_reports_throughput_and_latency_percentiles():
+    """Test that batch stats include throughput and p50/p95 latency."""
+    graph = create_graph(summarize_email=summarize_email_stubbed, check_email_attention=check_email_attention_stubbed)
+
+    batch = process_emails([make_email(f"note {i}") for i in range(20)], graph=graph, max_concurrency=4)
+
+    assert batch.stats.throughput > 0
+    assert 0 < batch.stats.p50_latency <= batch.stats.p95_latency
+
+
+def test_aprocess_emails_preserves_order_and_isolates_failures():
+    """Test the asyncio batch path with a concurrency limit."""
+    async def summary(state):
+        await asyncio.sleep(0.01)
+        return summarize_email_stubbed(state)
+
+    async def check(state):
+        return _failing_check(state)
+
+    graph = create_graph(summarize_email=summary, check_email_attention=check, use_async=True)
+    emails = [make_email("urgent outage"), make_email("please explode"), make_email("weekly notes")]
+
+    batch = asyncio.run(aprocess_emails(emails, graph=graph, max_concurrency=2))
+
+    assert [result.ok for result in batch.results] == [True, False, True]
+    assert batch.results[2].state["requires_attention"] is False
+    assert batch.stats.failed == 1
+
+
+def test_percentile_uses_nearest_rank():
+    """Test the nearest-rank percentile used for batch latency figures."""
+    assert percentile([], 95) == 0.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.0
+    assert percentile([float(i) for i in range(1, 101)], 95) == 95.0
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from simple_agent.agent import create_graph
+from simple_agent import nodes, preprocess
+from simple_agent.cache import ResponseCache
+from tests.conftest import make_email
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prompt_changes_miss_the_cache(fake_model, monkeypatch):
+    """Test that the key covers the rendered prompt: a new template or token budget is not served old answers."""
+    cache = ResponseCache()
+    email = make_email("Outage", "Server is down. " * 40)
+    nodes.check_email_attention(email, response_cache=cache)
+    nodes.check_email_attention(dict(email, email_body=email["email_body"].replace(" ", "  ")), response_cache=cache)
+    assert fake_model.calls == 1
+
+    monkeypatch.setitem(preprocess.TOKEN_BUDGETS, "check_email_attention", 64)
+    nodes.check_email_attention(email, response_cache=cache)
+    assert fake_model.calls == 2
+
+    monkeypatch.setattr(nodes, "ATTENTION_SYSTEM_PROMPT", nodes.ATTENTION_SYSTEM_PROMPT + " Be strict.")
+    nodes.check_email_attention(email, response_cache=cache)
+    assert fake_model.calls == 3
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """Test that the LRU tier stays within max_entries and keeps recently read entries."""
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats().evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    """Test that entries older than the TTL are treated as misses."""
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=60, clock=clock)
+    cache.set("a", "1")
+
+    clock.now += 59
+    assert cache.get("a") == "1"
+    clock.now += 2
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats.expirations == 1
+    assert stats.hits == 1
+    assert stats.misses == 1
+
+
+def test_sqlite_tier_survives_restart_and_is_size_bounded(tmp_path):
+    """Test that the on-disk tier serves a fresh process and evicts the oldest entries."""
+    clock = FakeClock()
+    path = str(tmp_path / "responses.sqlite")
+    writer = ResponseCache(sqlite_path=path, max_disk_entries=2, clock=clock)
+    for key in ("a", "b", "c"):
+        clock.now += 1
+        writer.set(key, key.upper())
+    writer.close()
+
+    reader = ResponseCache(sqlite_path=path, clock=clock)
+
+    assert reader.get("a") is None
+    assert reader.get("c") == "C"
+    assert reader.get("c") == "C"
+    stats = reader.stats()
+    assert stats.disk_hits == 1
+    assert stats.memory_hits == 1
+    assert stats.hit_rate == pytest.approx(2 / 3)
+
+
+def test_graph_with_cache_skips_llm_for_duplicate_emails(fake_model):
+    """Test that a duplicate email is answered from the cache with no extra LLM calls."""
+    cache = ResponseCache()
+    graph = create_graph(response_cache=cache)
+
+    first = graph.invoke(make_email("URGENT: outage", "Production is down."))
+    second = graph.invoke(make_email("URGENT: outage", "Production  is down.\n"))
+
+    assert fake_model.calls == 2
+    assert second["email_summary"] == first["email_summary"]
+    assert second["requires_attention"] is True
+    assert cache.stats().hits == 2
+
+
+def test_async_graph_with_cache_skips_llm_for_duplicate_emails(fake_model):
+    """Test that the async nodes use the injected cache as well."""
+    graph = create_graph(use_async=True, response_cache=ResponseCache())
+
+    async def run_twice():
+        await graph.ainvoke(make_email("Feature idea", "Dark mode please."))
+        return await graph.ainvoke(make_email("Feature idea", "Dark mode please."))
+
+    result = asyncio.run(run_twice())
+
+    assert fake_model.calls == 2
+    assert result["requires_attention"] is False
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from simple_agent.agent import create_graph
+from simple_agent.batch import aprocess_emails, process_emails
+from simple_agent.checkpoint import (
+    ainvoke_email,
+    async_sqlite_checkpointer,
+    email_thread_id,
+    invoke_email,
+    sqlite_checkpointer,
+)
+from tests.conftest import make_email
+
+
+class FlakyJira:
+    """Ticket node that fails its first `failures` calls."""
+
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, state):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("Jira unavailable")
+        return {"jira_ticket_id": "JIRA-RETRY"}
+
+
+def test_thread_id_is_stable_per_email():
+    """Test that every attempt at an email lands on the same thread."""
+    assert email_thread_id(make_email("URGENT: outage #1")) == email_thread_id(dict(make_email("URGENT: outage #1")))
+    assert email_thread_id(make_email("URGENT: outage #1")) != email_thread_id(make_email("URGENT: outage #2"))
+
+
+def test_retry_after_jira_failure_makes_no_additional_llm_calls(fake_model, tmp_path):
+    """Test that a retry resumes at create_jira_ticket from the SQLite checkpoint."""
+    jira = FlakyJira()
+    graph = create_graph(create_jira_ticket=jira, checkpointer=sqlite_checkpointer(str(tmp_path / "cp.sqlite")))
+
+    with pytest.raises(ConnectionError):
+        invoke_email(graph, make_email())
+    assert fake_model.calls == 2
+
+    result = invoke_email(graph, make_email())
+
+    assert fake_model.calls == 2
+    assert jira.calls == 2
+    assert result["jira_ticket_id"] == "JIRA-RETRY"
+    assert result["email_summary"]
+
+
+def test_checkpoints_survive_a_worker_restart(fake_model, tmp_path):
+    """Test that a new graph over the same SQLite file resumes the failed thread."""
+    path = str(tmp_path / "cp.sqlite")
+    with pytest.raises(ConnectionError):
+        invoke_email(create_graph(create_jira_ticket=FlakyJira(), checkpointer=sqlite_checkpointer(path)), make_email())
+
+    restarted = create_graph(create_jira_ticket=FlakyJira(failures=0), checkpointer=sqlite_checkpointer(path))
+    result = invoke_email(restarted, make_email())
+
+    assert fake_model.calls == 2
+    assert result["jira_ticket_id"] == "JIRA-RETRY"
+
+
+def test_finished_email_is_not_run_again(fake_model):
+    """Test that re-invoking a completed email returns its checkpointed result."""
+    jira = FlakyJira(failures=0)
+    graph = create_graph(create_jira_ticket=jira, checkpointer=InMemorySaver())
+
+    first = invoke_email(graph, make_email())
+    second = invoke_email(graph, make_email())
+
+    assert second == first
+    assert fake_model.calls == 2
+    assert jira.calls == 1
+
+
+def test_batch_retry_only_reruns_failed_steps(fake_model):
+    """Test that rerunning a batch with failures makes no LLM calls for already-triaged emails."""
+    graph = create_graph(create_jira_ticket=FlakyJira(failures=2), checkpointer=InMemorySaver())
+    emails = [make_email(f"URGENT: outage #{i}") for i in range(3)]
+
+    first = process_emails(emails, graph=graph, max_concurrency=1)
+    assert first.stats.failed == 2
+    assert fake_model.calls == 6
+
+    retry = process_emails(emails, graph=graph, max_concurrency=1)
+
+    assert retry.stats.failed == 0
+    assert fake_model.calls == 6
+
+
+def test_async_retry_resumes_from_checkpoint(fake_model):
+    """Test that the async path resumes the same way."""
+    attempts = []
+
+    async def flaky_jira(state):
+        attempts.append(state)
+        if len(attempts) == 1:
+            raise ConnectionError("Jira unavailable")
+        return {"jira_ticket_id": "JIRA-ASYNC"}
+
+    graph = create_graph(create_jira_ticket=flaky_jira, use_async=True, checkpointer=InMemorySaver())
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await ainvoke_email(graph, make_email())
+        return await ainvoke_email(graph, make_email())
+
+    result = asyncio.run(run())
+    assert result["jira_ticket_id"] == "JIRA-ASYNC"
+    assert fake_model.calls == 2
+
+
+def test_async_sqlite_checkpoints_survive_a_restart(fake_model, tmp_path):
+    """Test that an async graph resumes from, and returns finished results from, the SQLite file."""
+    path = str(tmp_path / "cp.sqlite")
+    jira = FlakyJira()
+
+    async def attempt():
+        async with async_sqlite_checkpointer(path) as checkpointer:
+            graph = create_graph(create_jira_ticket=jira, use_async=True, checkpointer=checkpointer)
+            return await ainvoke_email(graph, make_email())
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(attempt())
+    resumed = asyncio.run(attempt())
+    finished = asyncio.run(attempt())
+
+    assert resumed["jira_ticket_id"] == finished["jira_ticket_id"] == "JIRA-RETRY"
+    assert fake_model.calls == 2
+    assert jira.calls == 2
+
+
+def test_workers_checkpoint_to_sqlite_by_default(fake_model, tmp_path, monkeypatch):
+    """Test that $EMAIL_AGENT_CHECKPOINT_DB gives sync and async worker graphs a SQLite default."""
+    monkeypatch.setenv("EMAIL_AGENT_CHECKPOINT_DB", str(tmp_path / "worker.sqlite"))
+    emails = [make_email(f"URGENT: outage #{i}") for i in range(2)]
+
+    assert type(create_graph().checkpointer).__name__ == "SqliteSaver"
+    assert create_graph(checkpointer=False).checkpointer is None
+    first = process_emails(emails)
+    assert first.stats.failed == 0
+    assert fake_model.calls == 4
+
+    # The async worker opens its own saver over the same file, so nothing is rerun
+    retry = asyncio.run(aprocess_emails(emails))
+    assert [result.state["jira_ticket_id"] for result in retry.results] == [
+        result.state["jira_ticket_id"] for result in first.results
+    ]
+    assert fake_model.calls == 4
@@ -0,0 +1,67 @@
+import pytest
+
+from eval.conciseness import assess_conciseness, assess_conciseness_batch
+
+SUMMARIES = {
+    "plain": ("The production server is down. Customers cannot log in. Immediate action is required.", 3),
+    "abbreviations": ("Dr. Smith at Acme Corp. asked about the U.S. invoice, e.g. the one from Jan. 3.", 1),
+    "decimals": ("Revenue grew 3.5% to $1.2M vs. last year. Costs stayed at 0.8x.", 2),
+    "ellipsis": ("The customer is unhappy... and wants a refund. They escalated it.", 2),
+    "quoted": ('"Is it down?" the customer asked. Support confirmed the outage!', 2),
+    "bullets": ("Issues reported:\n- login fails\n- export is slow\n- emails bounce", 4),
+    "no punctuation": ("The customer asked about pricing", 1),
+    "empty": ("", 0),
+}
+
+
+@pytest.mark.parametrize("summary,expected", SUMMARIES.values(), ids=SUMMARIES.keys())
+def test_sentence_count(summary, expected):
+    assessment = assess_conciseness(summary)
+
+    assert assessment.sentence_count == expected
+    assert assessment.confident
+
+
+def test_ambiguous_boundaries_lower_confidence_only_when_the_score_could_change():
+    """Test that an abbreviation before a capital widens the count range, and matters only across a score step."""
+    three_or_four = assess_conciseness("Acme Inc. The server is down. Customers are affected. Fix it today.")
+    two_or_three = assess_conciseness("Acme Inc. The server is down. Fix it today.")
+
+    assert (three_or_four.min_count, three_or_four.max_count) == (3, 4)
+    assert not three_or_four.confident
+    assert (two_or_three.min_count, two_or_three.max_count) == (2, 3)
+    assert two_or_three.confident
+
+
+def test_filler_and_greetings_are_not_concise():
+    assessment = assess_conciseness("Hi team, I just wanted to flag the outage. Best regards.")
+
+    assert assessment.filler == ("hi", "just wanted to", "best regards")
+    assert assessment.sentence_count == 2
+    assert assessment.score == 0.5
+    assert not assessment.is_concise
+    assert "Filler: hi" in assessment.describe()
+
+
+def test_filler_drops_the_score_one_bucket():
+    """Test that filler costs one bucket at every sentence count and never goes below zero."""
+    four = assess_conciseness("Hope you are doing well. The server is down. Customers are affected. Fix it today.")
+    five = assess_conciseness("Basically the server is down. It is slow. Logins fail. Exports fail. Fix it.")
+
+    assert (four.sentence_count, four.score) == (4, 0.0)
+    assert (five.sentence_count, five.score) == (5, 0.0)
+    assert assess_conciseness("The server is down. Customers are affected.").score == 1.0
+
+
+def test_filler_is_counted_when_judging_confidence():
+    """Test that a 4-5 sentence range is confident once filler puts both readings in the lowest bucket."""
+    assessment = assess_conciseness("Basically Acme Inc. The server is down. Customers are affected. Logins fail. Fix it.")
+
+    assert (assessment.min_count, assessment.max_count) == (4, 5)
+    assert assessment.confident
+
+
+def test_batch_matches_one_at_a_time():
+    summaries = [summary for summary, _ in SUMMARIES.values()] + ["Hello. Thanks in advance... Bye."]
+
+    assert assess_conciseness_batch(summaries) == [assess_conciseness(summary) for summary in summaries]
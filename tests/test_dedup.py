@@ -0,0 +1,190 @@
+import asyncio
+import random
+import struct
+import threading
+import time
+
+from simple_agent.agent import create_graph
+from simple_agent.batch import process_emails
+from simple_agent.dedup import NUM_PERMUTATIONS, IncidentIndex, email_signature, minhash, signature_similarity
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+
+OUTAGE = (
+    "URGENT: Production server down",
+    "Hi team, our production server prod-web-{host} is down since 10:{minute} UTC. "
+    "Customers cannot access the app. Please investigate immediately.",
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _outage(index: int):
+    subject, body = OUTAGE
+    return make_email(subject, body.format(host=index, minute=10 + index % 50))
+
+
+class CountingTicketNode:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, state):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            return {"jira_ticket_id": f"JIRA-{self.calls}"}
+
+
+def test_signature_ignores_quoted_history_and_signatures():
+    """Test that the same report signs alike with or without a sign-off, and a reply quoting it does not."""
+    subject, body = OUTAGE[0], OUTAGE[1].format(host=1, minute=10)
+    signed = body + "\n\nThanks,\nJane Doe\nSite Reliability\n+1 555 0100"
+    reply = "Thanks, we are looking into it.\n\nOn Mon, Jan 6, 2025 at 10:02 AM Jane <jane@company.com> wrote:\n" + body
+
+    assert email_signature(make_email(subject, signed)) == email_signature(make_email(subject, body))
+    assert signature_similarity(
+        email_signature(make_email(subject, reply)), email_signature(make_email(subject, body)),
+    ) < 0.5
+
+
+def test_minhash_separates_near_duplicates_from_other_incidents():
+    """Test that templated duplicates score high and unrelated urgent emails score low."""
+    first = email_signature(_outage(1))
+    second = email_signature(_outage(2))
+    billing = minhash("URGENT: Payment processing failing\nPayments are failing for all customers since 10:40 UTC.")
+
+    assert signature_similarity(first, second) >= 0.6
+    assert signature_similarity(first, billing) < 0.3
+    assert len(first) == NUM_PERMUTATIONS
+
+
+def test_index_matches_recorded_incident_and_expires_it_after_window():
+    """Test that a recorded ticket is found for a near-duplicate until the window passes."""
+    clock = FakeClock()
+    index = IncidentIndex(window_seconds=60, clock=clock)
+    first = email_signature(_outage(1))
+
+    assert index.match_or_reserve(first) is None
+    index.record(first, "JIRA-1")
+    match = index.match_or_reserve(email_signature(_outage(2)))
+    assert match.ticket_id == "JIRA-1"
+    assert match.similarity >= 0.6
+
+    clock.now += 61
+    assert index.lookup(email_signature(_outage(3))) is None
+    assert len(index) == 0
+    assert index.stats().evictions == 1
+
+
+def test_index_evicts_oldest_beyond_max_entries():
+    """Test that the window never holds more than max_entries incidents."""
+    index = IncidentIndex(max_entries=2)
+    signatures = [minhash(f"incident number {i} on cluster {i * 7}") for i in range(3)]
+    for i, signature in enumerate(signatures):
+        index.match_or_reserve(signature)
+        index.record(signature, f"JIRA-{i}")
+
+    assert len(index) == 2
+    assert index.lookup(signatures[0]) is None
+    assert index.lookup(signatures[2]).ticket_id == "JIRA-2"
+
+
+def test_released_reservation_lets_waiting_duplicate_open_its_own_ticket():
+    """Test that a failed first ticket does not leave duplicates waiting forever."""
+    index = IncidentIndex(pending_timeout=5)
+    first = email_signature(_outage(1))
+    assert index.match_or_reserve(first) is None
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(index.match_or_reserve(email_signature(_outage(2)))))
+    waiter.start()
+    time.sleep(0.05)
+    index.release(first)
+    waiter.join(timeout=2)
+
+    assert results == [None]
+    assert index.stats().misses == 2
+
+
+def test_lookup_stays_sub_millisecond_at_tens_of_thousands_of_incidents():
+    """Test that banded lookups do not scan the whole window."""
+    rng = random.Random(0)
+    index = IncidentIndex()
+    lanes = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+    for i in range(30_000):
+        signature = lanes.unpack(rng.randbytes(lanes.size))
+        index.match_or_reserve(signature)
+        index.record(signature, f"JIRA-{i}")
+    queries = [email_signature(_outage(i)) for i in range(200)]
+
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup(query)
+    assert (time.perf_counter() - start) / len(queries) < 0.001
+
+
+def test_graph_opens_one_ticket_for_a_storm_of_near_duplicates():
+    """Test that concurrent duplicates wait for the first ticket and record the match."""
+    create_ticket = CountingTicketNode(delay=0.1)
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        create_jira_ticket=create_ticket,
+        incident_index=IncidentIndex(),
+    )
+
+    result = process_emails([_outage(i) for i in range(12)], graph=graph, max_concurrency=12)
+
+    states = [email_result.state for email_result in result.results]
+    assert create_ticket.calls == 1
+    assert {state["jira_ticket_id"] for state in states} == {"JIRA-1"}
+    duplicates = [state for state in states if state["matched_ticket_id"]]
+    assert len(duplicates) == 11
+    assert all(state["similarity_score"] >= 0.5 for state in duplicates)
+
+
+def test_graph_still_tickets_distinct_incidents():
+    """Test that unrelated attention emails each get their own ticket."""
+    create_ticket = CountingTicketNode()
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        create_jira_ticket=create_ticket,
+        incident_index=IncidentIndex(),
+    )
+
+    graph.invoke(_outage(1))
+    result = graph.invoke(make_email("URGENT: Payment processing failing", "Payments are failing for all customers."))
+
+    assert create_ticket.calls == 2
+    assert result["jira_ticket_id"] == "JIRA-2"
+    assert result["matched_ticket_id"] is None
+
+
+def test_async_graph_attaches_duplicate_to_existing_ticket():
+    """Test that the async graph runs the deduplication node too."""
+    async def create_ticket(state):
+        return {"jira_ticket_id": "JIRA-ASYNC"}
+
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        create_jira_ticket=create_ticket,
+        use_async=True,
+        incident_index=IncidentIndex(),
+    )
+
+    async def run():
+        await graph.ainvoke(_outage(1))
+        return await graph.ainvoke(_outage(2))
+
+    result = asyncio.run(run())
+    assert result["matched_ticket_id"] == "JIRA-ASYNC"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+
+from eval.llm_cache import (
+    OFFLINE,
+    AsyncCachingTransport,
+    CachingTransport,
+    LLMCacheMiss,
+    LLMResponseStore,
+    request_hash,
+)
+from simple_agent.agent import create_graph
+from simple_agent.llm import ModelRegistry, set_model_registry
+from simple_agent.metrics import GraphMetrics
+from tests.stubs.fake_chat_model import FAKE_SUMMARY
+from tests.stubs.fake_openai_server import FakeOpenAIServer
+
+BODY = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Summarize: server down"}], "temperature": 0}
+
+
+def _post(client: httpx.Client, base_url: str, body=BODY) -> httpx.Response:
+    return client.post(f"{base_url}/chat/completions", json=body, headers={"Authorization": "Bearer test"})
+
+
+def _fetch_in_worker(args):
+    """One xdist-like worker sending the same request through the shared cache directory."""
+    directory, base_url = args
+    store = LLMResponseStore(directory)
+    with httpx.Client(transport=CachingTransport(httpx.HTTPTransport(), store)) as client:
+        return _post(client, base_url).json()["choices"][0]["message"]["content"]
+
+
+def test_identical_requests_are_served_from_the_store(tmp_path):
+    """Test that a repeated request is a hit, and that key order and headers do not change the hash."""
+    store = LLMResponseStore(tmp_path)
+    with FakeOpenAIServer(responder=lambda body: "cached answer") as server:
+        with httpx.Client(transport=CachingTransport(httpx.HTTPTransport(), store)) as client:
+            first = _post(client, server.base_url)
+            reordered = dict(reversed(list(BODY.items())))
+            second = client.post(f"{server.base_url}/chat/completions", json=reordered, headers={"Authorization": "Bearer other"})
+            _post(client, server.base_url, dict(BODY, temperature=1))
+
+    assert server.request_count == 2
+    assert first.json() == second.json()
+    assert (store.hits, store.misses) == (1, 2)
+    assert len(list(tmp_path.glob("*/*.json"))) == 2
+
+
+def test_concurrent_workers_missing_on_one_request_call_the_api_once(tmp_path):
+    """Test that the per-hash lock lets only one process fetch while the others wait and read."""
+    with FakeOpenAIServer(responder=lambda body: "shared answer") as server:
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            answers = list(pool.map(_fetch_in_worker, [(str(tmp_path), server.base_url)] * 4))
+
+    assert answers == ["shared answer"] * 4
+    assert server.request_count == 1
+
+
+def test_offline_mode_raises_on_a_miss_and_serves_hits(tmp_path):
+    """Test that offline mode never reaches the upstream transport."""
+    with FakeOpenAIServer(responder=lambda body: "recorded") as server:
+        with httpx.Client(transport=CachingTransport(httpx.HTTPTransport(), LLMResponseStore(tmp_path))) as client:
+            _post(client, server.base_url)
+
+        offline = LLMResponseStore(tmp_path, mode=OFFLINE)
+        with httpx.Client(transport=CachingTransport(httpx.HTTPTransport(), offline)) as client:
+            assert _post(client, server.base_url).json()["choices"][0]["message"]["content"] == "recorded"
+            with pytest.raises(LLMCacheMiss):
+                _post(client, server.base_url, dict(BODY, temperature=1))
+
+    assert server.request_count == 1
+
+
+def test_failed_responses_are_not_stored(tmp_path):
+    """Test that a 429 is passed through but not cached, so the next run retries it."""
+    request = httpx.Request("POST", "http://llm/v1/chat/completions", json=BODY)
+
+    class Upstream(httpx.BaseTransport):
+        def handle_request(self, request):
+            return httpx.Response(429, json={"error": "rate limited"})
+
+    response = CachingTransport(Upstream(), LLMResponseStore(tmp_path)).handle_request(request)
+
+    assert response.status_code == 429
+    assert not LLMResponseStore(tmp_path).path(request_hash(request)).exists()
+
+
+def test_streamed_and_async_graph_calls_replay_from_the_cache(tmp_path, monkeypatch):
+    """Test the real chat client through the registry hooks: streamed summary and async nodes, then a warm replay."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    store = LLMResponseStore(tmp_path)
+    email = {
+        "email_subject": "URGENT: Production server is down",
+        "email_body": "Customers cannot access the service.",
+        "email_to": "oncall@company.com",
+    }
+
+    def run_graphs():
+        registry = ModelRegistry(
+            transport_wrapper=lambda transport: CachingTransport(transport, store),
+            async_transport_wrapper=lambda transport: AsyncCachingTransport(transport, store),
+        )
+        previous = set_model_registry(registry)
+        try:
+            metrics = GraphMetrics()
+            result = asyncio.run(create_graph(use_async=True, metrics=metrics).ainvoke(email))
+            partials = [chunk["email_summary"] for chunk in create_graph(metrics=metrics).stream(email, stream_mode="custom")]
+        finally:
+            set_model_registry(previous).close()
+        return partials, result["email_summary"]
+
+    with FakeOpenAIServer(responder=lambda body: FAKE_SUMMARY) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        cold = run_graphs()
+        cold_requests = server.request_count
+        warm = run_graphs()
+
+    # The async graph records summary and attention; the sync graph sends identical requests and hits.
+    assert cold_requests == 2
+    assert server.request_count == cold_requests
+    assert warm == cold
+    assert len(warm[0]) == len(FAKE_SUMMARY.split())
+    recorded = [json.loads(path.read_text())["request"]["body"] for path in tmp_path.glob("*/*.json")]
+    assert any(body.get("stream") for body in recorded)
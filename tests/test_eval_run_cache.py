@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from eval.run_cache import GraphRunCache
+
+INPUTS = {"email_subject": "URGENT: Production server is down", "email_body": "Customers cannot log in."}
+
+
+def _run_in_worker(directory: str):
+    """One xdist-like worker asking for the same example; returns (result, pid that ran the graph)."""
+    cache = GraphRunCache(directory)
+
+    def run():
+        time.sleep(0.2)
+        return {"requires_attention": True, "ran_in": os.getpid()}
+
+    result = cache.get_or_run("graph", INPUTS, run)
+    return result, cache.executed
+
+
+def test_each_example_runs_once_across_processes(tmp_path):
+    """Test that concurrent workers sharing a directory execute the graph once and all see its result."""
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        outcomes = list(pool.map(_run_in_worker, [str(tmp_path)] * 4))
+
+    results = [result for result, _ in outcomes]
+    assert sum(executed for _, executed in outcomes) == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_results_are_shared_within_a_process_and_keyed_by_graph(tmp_path):
+    """Test in-process reuse, separate keys per graph name, and that failed runs are retried."""
+    cache = GraphRunCache(tmp_path)
+    calls = []
+
+    def run():
+        calls.append(1)
+        return {"email_summary": "Server down."}
+
+    assert cache.get_or_run("graph", INPUTS, run) == cache.get_or_run("graph", INPUTS, run)
+    cache.get_or_run("single_call_graph", INPUTS, run)
+    assert (len(calls), cache.executed, cache.reused) == (2, 2, 1)
+
+    def failing():
+        raise ConnectionError("LLM unavailable")
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_run("graph", {"email_subject": "other"}, failing)
+    assert cache.get_or_run("graph", {"email_subject": "other"}, run) == {"email_summary": "Server down."}
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from eval.dataset import load_dataset
+from eval.runner import EvaluatorSpec, default_evaluators, format_comparison, format_report, run_evaluation
+from simple_agent.agent import create_graph
+
+EXAMPLES = load_dataset()
+
+
+class ConcurrencyProbe:
+    """Counts how many callers are inside at once, from coroutines or threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class SlowGraph:
+    """Async graph stand-in that echoes the expected outputs after a short wait."""
+    checkpointer = None
+
+    def __init__(self, fail_subject=None):
+        self.probe = ConcurrencyProbe()
+        self.fail_subject = fail_subject
+
+    async def ainvoke(self, email):
+        with self.probe:
+            await asyncio.sleep(0.02)
+        if email["email_subject"] == self.fail_subject:
+            raise RuntimeError("graph failed")
+        return {"requires_attention": "urgent" in email["email_subject"].lower(), "jira_ticket_id": None}
+
+
+@pytest.fixture
+def judge_model(monkeypatch):
+    monkeypatch.setenv("LLM_JUDGE_MODEL", "judge-model")
+
+
+def test_graph_runs_and_judges_are_capped_per_model(judge_model):
+    """Test that each model's cap bounds its own work while different models overlap."""
+    graph = SlowGraph()
+    judge_probe = ConcurrencyProbe()
+
+    def slow_judge(run, example):
+        with judge_probe:
+            time.sleep(0.02)
+        return {"key": "judged", "score": 1}
+
+    report = asyncio.run(run_evaluation(
+        EXAMPLES,
+        evaluators=[EvaluatorSpec("judged", slow_judge, uses_judge=True)],
+        graph=graph,
+        concurrency={"app-model": 3, "judge-model": 2},
+        graph_model="app-model",
+    ))
+
+    assert graph.probe.peak == 3
+    assert judge_probe.peak == 2
+    assert {model: (usage.tasks, usage.peak) for model, usage in report.model_usage.items()} == {
+        "app-model": (len(EXAMPLES), 3),
+        "judge-model": (len(EXAMPLES), 2),
+    }
+
+
+def test_failures_are_isolated_and_scores_aggregated_per_key(judge_model):
+    """Test that a graph or evaluator failure only drops its own feedback, and None scores are not averaged."""
+    failing = EXAMPLES[0]["inputs"]["email_subject"]
+
+    def flaky(run, example):
+        if example is EXAMPLES[1]:
+            raise ValueError("judge failed")
+        return {"results": [{"key": "kept", "score": 0.5}, {"key": "dropped", "score": 0}]}
+
+    def maybe(run, example):
+        return {"key": "maybe", "score": None if example is EXAMPLES[2] else 1}
+
+    report = asyncio.run(run_evaluation(
+        EXAMPLES,
+        evaluators=[EvaluatorSpec("flaky", flaky, uses_judge=True, keys=("kept",)), EvaluatorSpec("maybe", maybe)],
+        graph=SlowGraph(fail_subject=failing),
+    ))
+
+    assert [result.index for result in report.results] == list(range(len(EXAMPLES)))
+    assert "graph" in report.results[0].errors and not report.results[0].feedback
+    assert report.results[1].errors == {"flaky": "ValueError('judge failed')"}
+    assert (report.graph_failures, report.evaluator_errors) == (1, 1)
+    summaries = {summary.key: summary for summary in report.summaries}
+    assert set(summaries) == {"kept", "maybe"}
+    assert (summaries["kept"].count, summaries["kept"].mean) == (len(EXAMPLES) - 2, 0.5)
+    assert (summaries["maybe"].count, summaries["maybe"].scored) == (len(EXAMPLES) - 1, len(EXAMPLES) - 2)
+    assert summaries["maybe"].pass_rate is None
+
+
+def test_default_evaluators_over_the_real_async_graph(fake_model):
+    """Test the full pipeline against the fake model: every key is reported for every example."""
+    report = asyncio.run(run_evaluation(EXAMPLES[:4], evaluators=default_evaluators("combined")))
+
+    assert [summary.key for summary in report.summaries] == [
+        "correctness", "ticket_creation", "pre_classifier_agreement", "summary_conciseness",
+        "summary_faithfulness", "summary_completeness", "summary_triage_usefulness",
+    ]
+    assert all(summary.count == 4 for summary in report.summaries)
+    assert (report.graph_failures, report.evaluator_errors) == (0, 0)
+    assert "summary_triage_usefulness" in format_report(report)
+
+
+def test_preprocess_comparison_over_the_dataset(fake_model):
+    """Test that the preprocess comparison scores both graphs and reports no triage changes on clean bodies."""
+    reports = [
+        asyncio.run(run_evaluation(EXAMPLES[:4], graph=create_graph(use_async=True, preprocess=preprocess)))
+        for preprocess in (False, True)
+    ]
+
+    before, after = ({summary.key: summary.mean for summary in report.summaries} for report in reports)
+    assert before == after
+    table = format_comparison(*reports, labels=("preprocess=False", "preprocess=True"))
+    assert table.splitlines()[0].split() == ["key", "preprocess=False", "preprocess=True", "delta"]
+    assert "correctness" in table and "+0.00" in table
+    assert "0 of 4 requires_attention verdicts changed" in table
+
+
+def test_comparison_lists_changed_verdicts():
+    """Test that an example whose requires_attention flips between runs is listed with its expected label."""
+    class AlwaysAttention(SlowGraph):
+        async def ainvoke(self, email):
+            return dict(await super().ainvoke(email), requires_attention=True)
+
+    evaluators = [EvaluatorSpec("correctness", default_evaluators()[0].evaluator)]
+    baseline, candidate = (
+        asyncio.run(run_evaluation(EXAMPLES, evaluators=evaluators, graph=graph))
+        for graph in (SlowGraph(), AlwaysAttention())
+    )
+
+    flipped = [example for example in EXAMPLES if "urgent" not in example["inputs"]["email_subject"].lower()]
+    table = format_comparison(baseline, candidate)
+    assert f"{len(flipped)} of {len(EXAMPLES)} requires_attention verdicts changed" in table
+    subject = flipped[0]["inputs"]["email_subject"]
+    assert f"{subject!r}: False -> True (expected {flipped[0]['outputs']['requires_attention']})" in table
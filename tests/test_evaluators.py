@@ -0,0 +1,78 @@
+import pytest
+
+from eval.evaluators import (
+    local_summary_conciseness_batch,
+    summary_completeness_evaluator,
+    summary_conciseness_evaluator,
+    summary_faithfulness_evaluator,
+    summary_multi_criteria_evaluator,
+    summary_triage_usefulness_evaluator,
+)
+
+SINGLE_CRITERION_EVALUATORS = [
+    summary_faithfulness_evaluator,
+    summary_completeness_evaluator,
+    summary_conciseness_evaluator,
+    summary_triage_usefulness_evaluator,
+]
+
+RUN = {"email_summary": "The production server is down. Customers cannot log in."}
+EXAMPLE = {"inputs": {"email_subject": "URGENT: Production server is down", "email_body": "Customers cannot log in."}}
+
+
+def test_combined_judge_reports_every_criterion_under_its_own_key_with_one_call(fake_model):
+    """Test that one structured call yields the same keys and scores as the four single-criterion judges."""
+    separate = [evaluator(RUN, EXAMPLE) for evaluator in SINGLE_CRITERION_EVALUATORS]
+    assert fake_model.calls == 4
+
+    combined = summary_multi_criteria_evaluator(RUN, EXAMPLE)["results"]
+
+    assert fake_model.calls == 5
+    assert [(r["key"], r["score"]) for r in combined] == [(r["key"], r["score"]) for r in separate]
+    assert [r["key"] for r in combined] == [
+        "summary_faithfulness", "summary_completeness", "summary_conciseness", "summary_triage_usefulness",
+    ]
+
+
+def test_combined_judge_scores_each_section_like_its_single_judge(fake_model):
+    """Test the per-criterion normalization of the combined response."""
+    def responder(schema, messages):
+        return schema.model_validate({
+            "faithfulness": {"is_faithful": False, "reasoning": "invents a date"},
+            "completeness": {
+                "captures_main_topic": True, "captures_requests_or_problems": True,
+                "captures_urgency_if_present": False, "overall_score": 2, "reasoning": "no urgency",
+            },
+            "conciseness": {"is_concise": False, "sentence_count": 4, "reasoning": "long"},
+            "triage_usefulness": {"would_help_triage": True, "clarity_score": 4, "reasoning": "clear"},
+        })
+
+    fake_model.structured_responder = responder
+
+    scores = {r["key"]: r["score"] for r in summary_multi_criteria_evaluator(RUN, EXAMPLE)["results"]}
+
+    assert scores == {
+        "summary_faithfulness": 0,
+        "summary_completeness": pytest.approx(2 / 3),
+        "summary_conciseness": 0.5,
+        "summary_triage_usefulness": pytest.approx(0.8),
+    }
+
+
+def test_local_conciseness_asks_the_judge_only_when_the_count_is_ambiguous(fake_model):
+    """Test that confident summaries are scored without a call and ambiguous ones fall back to the judge."""
+    runs = [
+        RUN,
+        {"email_summary": "One. Two. Three. Four. Five."},
+        {"email_summary": "Acme Inc. The server is down. Customers are affected. Fix it today."},
+    ]
+
+    results = local_summary_conciseness_batch(runs, [EXAMPLE] * len(runs))
+
+    assert fake_model.calls == 1
+    assert [(r["score"], r["source"]) for r in results[:2]] == [(1.0, "local"), (0.0, "local")]
+    assert results[2]["source"] == "llm"
+    assert {r["key"] for r in results} == {"summary_conciseness"}
+
+    local_summary_conciseness_batch(runs, [EXAMPLE] * len(runs), llm_fallback=False)
+    assert fake_model.calls == 1
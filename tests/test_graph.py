@@ -1,7 +1,15 @@
+import time
+
 import pytest
 from simple_agent.agent import create_graph
 from simple_agent.state import EmailState
-from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import (
+    check_email_attention_stubbed,
+    slow_node,
+    summarize_and_classify_email_stubbed,
+    summarize_email_stubbed,
+)
 
 
 def test_graph_flags_email_with_urgent_keyword_and_creates_ticket():
@@ -51,3 +59,81 @@ def test_graph_does_not_flag_normal_email_and_no_ticket():
     assert result["requires_attention"] is False
     assert result["jira_ticket_id"] is None
     assert result["email_summary"] is not None
+
+
+SLOW_NODE_DELAY = 0.3
+
+
+def _slow_graph(parallel: bool):
+    return create_graph(
+        summarize_email=slow_node(summarize_email_stubbed, SLOW_NODE_DELAY),
+        check_email_attention=slow_node(check_email_attention_stubbed, SLOW_NODE_DELAY),
+        parallel=parallel,
+    )
+
+
+URGENT_EMAIL = make_email(
+    "URGENT: Server outage needs immediate fix",
+    "The production server is down. Please address this ASAP.",
+)
+
+
+def test_parallel_graph_overlaps_summary_and_attention_check():
+    """Test that the fan-out topology costs max(summary, classify) rather than their sum."""
+    graph = _slow_graph(parallel=True)
+
+    start = time.perf_counter()
+    result = graph.invoke(URGENT_EMAIL)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < SLOW_NODE_DELAY * 1.8
+    assert result["requires_attention"] is True
+    assert result["email_summary"] is not None
+    assert result["jira_ticket_id"].startswith("JIRA-")
+
+
+def test_sequential_graph_runs_summary_then_attention_check():
+    """Test that parallel=False keeps the original chained topology."""
+    graph = _slow_graph(parallel=False)
+
+    start = time.perf_counter()
+    result = graph.invoke(URGENT_EMAIL)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= SLOW_NODE_DELAY * 2
+    assert result["requires_attention"] is True
+    assert result["jira_ticket_id"].startswith("JIRA-")
+
+
+def test_parallel_graph_routes_normal_email_to_log():
+    """Test that the join still routes non-urgent emails away from ticket creation."""
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        parallel=True,
+    )
+
+    result = graph.invoke({
+        **URGENT_EMAIL,
+        "email_subject": "Weekly team sync notes",
+        "email_body": "Here are the notes from today's meeting.",
+    })
+
+    assert result["requires_attention"] is False
+    assert result["jira_ticket_id"] is None
+    assert result["email_summary"] is not None
+
+
+@pytest.mark.parametrize("subject,expects_ticket", [
+    ("URGENT: Server outage needs immediate fix", True),
+    ("Weekly team sync notes", False),
+])
+def test_single_call_graph_routes_on_combined_node(subject, expects_ticket):
+    """Test that the single-call topology routes on the combined node's attention decision."""
+    graph = create_graph(single_call=True, summarize_and_classify_email=summarize_and_classify_email_stubbed)
+
+    result = graph.invoke({**URGENT_EMAIL, "email_subject": subject, "email_body": "See subject."})
+
+    assert result["requires_attention"] is expects_ticket
+    assert (result["jira_ticket_id"] is not None) is expects_ticket
+    assert result["email_summary"] is not None
@@ -0,0 +1,85 @@
+from functools import partial
+
+import pytest
+
+from simple_agent.agent import create_graph
+from simple_agent.graph_cache import GraphCache, set_graph_cache
+from simple_agent.metrics import GraphMetrics
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+
+
+@pytest.fixture
+def cache():
+    cache = GraphCache(max_entries=2)
+    previous = set_graph_cache(cache)
+    yield cache
+    set_graph_cache(previous)
+
+
+def _tenant_graph(**options):
+    return create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        **options,
+    )
+
+
+def test_identical_configurations_share_one_compiled_graph(cache):
+    """Test that the same node callables and options return the same compiled graph."""
+    graph = _tenant_graph()
+
+    assert _tenant_graph() is graph
+    assert _tenant_graph(parallel=False) is not graph
+    assert graph.invoke(make_email())["requires_attention"] is True
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+    assert stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_node_callables_and_dependencies_are_keyed_by_identity(cache):
+    """Test that a different callable, a new partial or a different metrics object compiles a new graph."""
+    graph = _tenant_graph()
+
+    assert create_graph(
+        summarize_email=partial(summarize_email_stubbed),
+        check_email_attention=check_email_attention_stubbed,
+    ) is not graph
+    assert _tenant_graph(metrics=GraphMetrics()) is not graph
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used(cache):
+    """Test LRU eviction once more than max_entries configurations are built."""
+    sequential = _tenant_graph(parallel=False)
+    parallel = _tenant_graph()
+    assert _tenant_graph(parallel=False) is sequential
+
+    _tenant_graph(single_call=True)
+
+    assert cache.stats().evictions == 1
+    assert _tenant_graph(parallel=False) is sequential
+    assert _tenant_graph() is not parallel
+
+
+def test_invalidate_drops_graphs_built_with_an_object(cache):
+    """Test the invalidation hook for one replaced dependency and for the whole cache."""
+    metrics = GraphMetrics()
+    tenant = _tenant_graph(metrics=metrics)
+    other = _tenant_graph()
+
+    assert cache.invalidate(metrics) == 1
+    assert _tenant_graph() is other
+    assert _tenant_graph(metrics=metrics) is not tenant
+
+    assert cache.invalidate() == 2
+    assert cache.stats().size == 0
+    assert cache.stats().invalidations == 3
+
+
+def test_zero_capacity_disables_caching():
+    """Test that max_entries=0 compiles a fresh graph on every call."""
+    previous = set_graph_cache(GraphCache(max_entries=0))
+    try:
+        assert _tenant_graph() is not _tenant_graph()
+    finally:
+        set_graph_cache(previous)
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+from simple_agent.agent import create_graph
+from simple_agent.ingest import read_jsonl, read_mbox, resume_offset, run_pipeline
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+
+MBOX = b"""From alice@example.com Mon Jan  1 00:00:00 2024
+From: alice@example.com
+To: support@company.com
+Subject: URGENT: cannot log in
+
+I am locked out of my account.
+
+From bob@example.com Mon Jan  1 00:01:00 2024
+From: bob@example.com
+To: feedback@company.com
+Subject: Love the product
+
+Keep up the good work!
+"""
+
+
+def _write_jsonl(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            subject = f"urgent issue {i}" if i % 2 == 0 else f"weekly notes {i}"
+            f.write(json.dumps({"inputs": {"email_subject": subject, "email_body": "Body", "email_to": "a@b.com"}}) + "\n")
+
+
+def _read_sink(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _stub_graph(summarize_email=summarize_email_stubbed):
+    return create_graph(summarize_email=summarize_email, check_email_attention=check_email_attention_stubbed)
+
+
+def test_read_jsonl_yields_states_and_resumable_offsets(tmp_path):
+    """Test that JSONL records stream as EmailState dicts with offsets that resume mid-file."""
+    source = tmp_path / "mail.jsonl"
+    _write_jsonl(source, 3)
+
+    records = list(read_jsonl(str(source)))
+    resumed = list(read_jsonl(str(source), start_offset=records[0][0]))
+
+    assert [state["email_subject"] for _, state in records] == ["urgent issue 0", "weekly notes 1", "urgent issue 2"]
+    assert records[-1][0] == source.stat().st_size
+    assert resumed == records[1:]
+
+
+def test_read_mbox_parses_messages_and_resumes_from_offset(tmp_path):
+    """Test that mbox messages are split lazily and can be resumed from a byte offset."""
+    source = tmp_path / "mail.mbox"
+    source.write_bytes(MBOX)
+
+    records = list(read_mbox(str(source)))
+    resumed = list(read_mbox(str(source), start_offset=records[0][0]))
+
+    assert [state["email_subject"] for _, state in records] == ["URGENT: cannot log in", "Love the product"]
+    assert records[0][1]["email_to"] == "support@company.com"
+    assert records[0][1]["email_body"] == "I am locked out of my account."
+    assert [state["email_subject"] for _, state in resumed] == ["Love the product"]
+
+
+def test_run_pipeline_writes_results_in_source_order(tmp_path):
+    """Test that results are appended to the sink in source order with their resume offsets."""
+    source, sink = tmp_path / "mail.jsonl", tmp_path / "results.jsonl"
+    _write_jsonl(source, 6)
+
+    stats = run_pipeline(read_jsonl(str(source)), str(sink), graph=_stub_graph(), max_in_flight=3)
+
+    results = _read_sink(sink)
+    assert stats.processed == 6
+    assert [r["email_subject"] for r in results] == [f"{'urgent issue' if i % 2 == 0 else 'weekly notes'} {i}" for i in range(6)]
+    assert [r["requires_attention"] for r in results] == [True, False] * 3
+    assert all("email_body" not in r and "clean_email_body" not in r for r in results)
+    assert results[-1]["source_offset"] == source.stat().st_size == stats.end_offset
+
+
+def test_run_pipeline_bounds_emails_read_ahead_of_sink(tmp_path):
+    """Test backpressure: the source is never read more than max_in_flight records ahead of the sink."""
+    sink = tmp_path / "results.jsonl"
+    lock = threading.Lock()
+    counters = {"read": 0, "max_ahead": 0}
+
+    def source():
+        for i in range(20):
+            with lock:
+                written = len(sink.read_text().splitlines()) if sink.exists() else 0
+                counters["max_ahead"] = max(counters["max_ahead"], counters["read"] - written)
+                counters["read"] += 1
+            yield i, {"email_subject": f"note {i}", "email_body": "Body", "email_to": "a@b.com"}
+
+    def slow_summary(state):
+        time.sleep(0.01)
+        return summarize_email_stubbed(state)
+
+    run_pipeline(source(), str(sink), graph=_stub_graph(slow_summary), max_in_flight=4)
+
+    assert counters["max_ahead"] <= 4
+
+
+def test_resume_after_crash_skips_processed_emails(tmp_path):
+    """Test that a resumed run truncates a torn write and processes each email exactly once."""
+    source, sink = tmp_path / "mail.jsonl", tmp_path / "results.jsonl"
+    _write_jsonl(source, 5)
+    first_two = list(read_jsonl(str(source)))[:2]
+    run_pipeline(iter(first_two), str(sink), graph=_stub_graph())
+    with open(sink, "a") as f:
+        f.write('{"email_subject": "torn wri')
+
+    offset = resume_offset(str(sink))
+    run_pipeline(read_jsonl(str(source), offset), str(sink), graph=_stub_graph(), start_offset=offset)
+
+    results = _read_sink(sink)
+    assert offset == first_two[-1][0]
+    assert [r["email_subject"] for r in results] == [
+        "urgent issue 0", "weekly notes 1", "urgent issue 2", "weekly notes 3", "urgent issue 4",
+    ]
+
+
+def test_resume_offset_without_sink_starts_from_zero(tmp_path):
+    """Test that a fresh run starts at the beginning of the source."""
+    assert resume_offset(str(tmp_path / "missing.jsonl")) == 0
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simple_agent.agent import create_graph
+from simple_agent.batch import process_emails
+from simple_agent.jira import JiraClient, JiraRestClient, TicketBatcher, TicketRequest, email_idempotency_key
+from tests.conftest import make_email
+from tests.stubs.fake_jira_server import FakeJiraServer
+from tests.stubs.stub_nodes import check_email_attention_stubbed, summarize_email_stubbed
+
+BULK = "POST /rest/api/2/issue/bulk"
+SEARCH = "GET /rest/api/2/search"
+
+
+@pytest.fixture
+def jira_server():
+    with FakeJiraServer() as server:
+        yield server
+
+
+@pytest.fixture
+def jira_client(jira_server):
+    client = JiraRestClient(jira_server.base_url, jira_server.project_key)
+    yield client
+    client.close()
+
+
+def test_idempotency_key_ignores_whitespace_but_not_content():
+    """Test that re-sent copies of an email share a key while different emails do not."""
+    email = make_email("URGENT: Server is down #1")
+    resent = {**email, "email_body": f"  {email['email_body']}\n", "email_to": "OnCall@Company.com"}
+
+    assert email_idempotency_key(email) == email_idempotency_key(resent)
+    assert email_idempotency_key(email) != email_idempotency_key(make_email("URGENT: Server is down #2"))
+
+
+def test_batcher_flushes_concurrent_submissions_as_one_bulk_request(jira_server, jira_client):
+    """Test that a burst of tickets becomes one bulk create over a reused connection."""
+    batcher = TicketBatcher(jira_client, max_batch_size=20, max_wait=5.0)
+    requests = [TicketRequest(f"Ticket {i}", "description", f"key-{i}") for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        ticket_ids = list(pool.map(lambda request: batcher.submit(request).result(timeout=5), requests))
+    batcher.close()
+
+    assert ticket_ids == [f"SUP-{i}" for i in range(1, 21)]
+    assert jira_server.request_counts[BULK] == 1
+    assert jira_server.request_counts[SEARCH] == 1
+    assert jira_server.connections == 1
+    assert batcher.stats().batches_flushed == 1
+
+
+def test_batcher_flushes_partial_batch_after_max_wait(jira_server, jira_client):
+    """Test that a lone ticket is created once the time window closes."""
+    batcher = TicketBatcher(jira_client, max_batch_size=50, max_wait=0.05)
+
+    assert batcher.submit(TicketRequest("Lone ticket", "description", "lone")).result(timeout=2) == "SUP-1"
+    batcher.close()
+    assert jira_server.request_counts[BULK] == 1
+
+
+def test_duplicates_and_retries_never_open_duplicate_tickets(jira_server, jira_client):
+    """Test that duplicate emails share a ticket and retries make no new create requests."""
+    batcher = TicketBatcher(jira_client, max_batch_size=10, max_wait=0.2)
+    duplicate = TicketRequest("Server down", "description", "same-email")
+
+    futures = [batcher.submit(duplicate) for _ in range(3)] + [batcher.submit(TicketRequest("Other", "d", "other"))]
+    first_ids = [future.result(timeout=2) for future in futures]
+    retried = batcher.submit(duplicate).result(timeout=2)
+    batcher.close()
+
+    assert first_ids[:3] == ["SUP-1"] * 3
+    assert retried == "SUP-1"
+    assert len(jira_server.issues) == 2
+    assert jira_server.request_counts[BULK] == 1
+    assert batcher.stats().coalesced == 2
+
+
+def test_fresh_client_finds_existing_ticket_by_idempotency_label(jira_server, jira_client):
+    """Test that a restarted worker resolves an already-created ticket with one search and no create."""
+    original = jira_client.create_ticket("Server down", "description", "restart-key")
+    restarted = JiraRestClient(jira_server.base_url, jira_server.project_key)
+
+    assert restarted.create_ticket("Server down", "description", "restart-key") == original
+    restarted.close()
+    assert len(jira_server.issues) == 1
+    assert jira_server.request_counts[BULK] == 1
+    assert jira_server.request_counts[SEARCH] == 2
+
+
+def test_concurrent_unbatched_creates_open_one_ticket_per_key():
+    """Test that threads racing on one idempotency key without a batcher share a single create."""
+    class SlowClient(JiraClient):
+        def __init__(self):
+            super().__init__()
+            self.created = []
+
+        def _find_existing(self, idempotency_keys):
+            time.sleep(0.05)
+            return {}
+
+        def _bulk_create(self, requests):
+            self.created += [request.idempotency_key for request in requests]
+            return super()._bulk_create(requests)
+
+    client = SlowClient()
+    start = threading.Barrier(8)
+
+    def create(index):
+        start.wait()
+        return client.create_ticket("Server down", "description", f"key-{index % 2}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ticket_ids = list(pool.map(create, range(8)))
+
+    assert sorted(client.created) == ["key-0", "key-1"]
+    assert len(set(ticket_ids[0::2])) == len(set(ticket_ids[1::2])) == 1
+    assert ticket_ids[0] != ticket_ids[1]
+
+
+def test_failed_create_fails_callers_waiting_on_the_same_key():
+    """Test that callers waiting on another thread's create see its error, and the key can be retried."""
+    class FlakyClient(JiraClient):
+        def __init__(self):
+            super().__init__()
+            self.fail = True
+
+        def _find_existing(self, idempotency_keys):
+            time.sleep(0.05)
+            return {}
+
+        def _bulk_create(self, requests):
+            if self.fail:
+                raise RuntimeError("Jira unavailable")
+            return super()._bulk_create(requests)
+
+    client = FlakyClient()
+    start = threading.Barrier(4)
+
+    def create(_):
+        start.wait()
+        try:
+            return client.create_ticket("Server down", "description", "flaky-key")
+        except RuntimeError as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outcomes = list(pool.map(create, range(4)))
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    client.fail = False
+    assert client.create_ticket("Server down", "description", "flaky-key").startswith("JIRA-")
+
+
+def test_failed_flush_fails_every_future_in_the_batch():
+    """Test that a bulk create error surfaces on each waiting submission."""
+    class BrokenClient:
+        def create_tickets(self, requests):
+            raise RuntimeError("Jira unavailable")
+
+    batcher = TicketBatcher(BrokenClient(), max_batch_size=2, max_wait=1.0)
+    futures = [batcher.submit(TicketRequest(f"T{i}", "d", f"k{i}")) for i in range(2)]
+    batcher.close()
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="Jira unavailable"):
+            future.result(timeout=2)
+
+
+def test_graph_batches_tickets_across_concurrent_runs(jira_server, jira_client):
+    """Test that concurrent graph runs share bulk ticket creation through the batcher."""
+    batcher = TicketBatcher(jira_client, max_batch_size=8, max_wait=2.0)
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        ticket_batcher=batcher,
+    )
+    emails = [make_email(f"URGENT: Server is down #{i}") for i in range(8)] + [make_email("URGENT: Server is down #0")]
+
+    result = process_emails(emails, graph=graph, max_concurrency=9)
+    batcher.close()
+
+    ticket_ids = [email_result.state["jira_ticket_id"] for email_result in result.results]
+    assert sorted(set(ticket_ids)) == sorted(f"SUP-{i}" for i in range(1, 9))
+    assert ticket_ids[0] == ticket_ids[8]
+    assert jira_server.request_counts[BULK] == 1
+
+
+def test_async_graph_awaits_batched_ticket(jira_server, jira_client):
+    """Test that the async create_jira_ticket node awaits the batcher future."""
+    batcher = TicketBatcher(jira_client, max_batch_size=1, max_wait=1.0)
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        use_async=True,
+        ticket_batcher=batcher,
+    )
+
+    result = asyncio.run(graph.ainvoke(make_email("URGENT: Server is down #1")))
+    batcher.close()
+
+    assert result["jira_ticket_id"] == "SUP-1"
@@ -0,0 +1,99 @@
+import random
+import string
+
+import pytest
+
+from tests.stubs.keyword_matcher import SUBSTRING_SCAN_MAX_KEYWORDS, KeywordMatcher
+from tests.stubs.stub_nodes import URGENT_KEYWORDS, check_email_attention_stubbed
+
+
+def _loop_matches(keywords, text):
+    return any(keyword in text.lower() for keyword in keywords)
+
+
+@pytest.mark.parametrize("text", [
+    "URGENT: server down",
+    "Please respond ASAP",
+    "This is time sensitive",
+    "time  sensitive with two spaces",
+    "Nothing to see here",
+    "",
+    "importantly, this mentions prioritys",
+])
+def test_matches_agrees_with_substring_loop(text):
+    """Test that the compiled matcher has the same semantics as the per-keyword substring loop."""
+    assert KeywordMatcher(URGENT_KEYWORDS).matches(text) == _loop_matches(URGENT_KEYWORDS, text)
+
+
+def test_matches_agrees_with_loop_on_random_keywords():
+    """Test the trie-shaped regex against the loop on keywords with heavily shared prefixes."""
+    rng = random.Random(7)
+    keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(200)]
+    keywords += ["a.b", "c+", "[x]", "end-of"]
+    matcher = KeywordMatcher(keywords)
+
+    for _ in range(500):
+        text = "".join(rng.choice("abcd .+[]x-") for _ in range(rng.randint(0, 12)))
+        assert matcher.matches(text) == _loop_matches(keywords, text), text
+
+
+def test_large_keyword_sets_use_compiled_automaton_for_batches():
+    """Test that large keyword sets are scanned with the trie regex and agree with the loop."""
+    keywords = [f"kw{i:05d}" for i in range(SUBSTRING_SCAN_MAX_KEYWORDS + 1)]
+    matcher = KeywordMatcher(keywords)
+    texts = ["nothing", "has kw00042 inside", "", "kw0004 is too short", f"ends with kw{SUBSTRING_SCAN_MAX_KEYWORDS:05d}"]
+
+    assert not matcher._substring_scan
+    assert matcher.matches_batch(texts) == [_loop_matches(keywords, text) for text in texts]
+
+
+def test_batch_offsets_survive_case_folding_that_changes_length():
+    """Test that a text whose lowercase form is longer does not shift hits onto its neighbours."""
+    matcher = KeywordMatcher(["urgent"] + [f"kw{i:05d}" for i in range(SUBSTRING_SCAN_MAX_KEYWORDS)])
+    texts = ["İ" * 10 + " x", "urgent", "nothing here"]
+
+    assert len(texts[0].lower()) != len(texts[0])
+    assert matcher.matches_batch(texts) == [False, True, False]
+
+
+def test_word_boundary_mode_ignores_partial_words():
+    """Test that word-boundary mode only matches whole words and phrases."""
+    matcher = KeywordMatcher(["important", "action required"], word_boundary=True)
+
+    assert matcher.matches("This is IMPORTANT.")
+    assert matcher.matches("Action required: renew")
+    assert not matcher.matches("Importantly, nothing is wrong")
+    assert not KeywordMatcher(["urgent"], word_boundary=True).matches("insurgents")
+
+
+def test_find_all_returns_occurrences_in_order():
+    """Test that find_all reports each keyword hit left to right."""
+    matcher = KeywordMatcher(["urgent", "asap", "deadline"])
+
+    assert matcher.find_all("URGENT: deadline is today, reply asap") == ["urgent", "deadline", "asap"]
+
+
+def test_matches_batch_maps_hits_back_to_each_text():
+    """Test that the batch API flags exactly the texts containing a keyword."""
+    matcher = KeywordMatcher(URGENT_KEYWORDS)
+    texts = ["hello", "urgent", "", "critical fix", "weekly notes", "asap"]
+
+    assert matcher.matches_batch(texts) == [_loop_matches(URGENT_KEYWORDS, text) for text in texts]
+    assert matcher.matches_batch([]) == []
+    assert KeywordMatcher([]).matches_batch(["urgent"]) == [False]
+
+
+def test_matches_emails_agrees_with_substring_loop():
+    """Test that the batch email API gives the same answers as the original per-keyword loop."""
+    rng = random.Random(3)
+    words = list(URGENT_KEYWORDS) + ["hello", "meeting", "notes", "invoice", "thanks"]
+    emails = [
+        {"email_subject": rng.choice(words), "email_body": " ".join(rng.choice(words) for _ in range(5))}
+        for _ in range(50)
+    ]
+    emails += [{"email_subject": "".join(rng.choice(string.ascii_lowercase) for _ in range(8)), "email_body": "ok"}]
+
+    batch = KeywordMatcher(URGENT_KEYWORDS).matches_emails(emails)
+
+    assert batch == [_loop_matches(URGENT_KEYWORDS, f"{e['email_subject']} {e['email_body']}") for e in emails]
+    assert batch == [check_email_attention_stubbed(email)["requires_attention"] for email in emails]
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from simple_agent.llm import ModelRegistry, get_model_registry, set_model_registry
+from simple_agent.nodes import check_email_attention
+from tests.stubs.fake_openai_server import FakeOpenAIServer
+
+
+class VerdictResponse(BaseModel):
+    is_correct: bool
+
+
+@pytest.fixture
+def openai_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+
+def test_registry_returns_same_client_for_same_configuration(openai_key):
+    """Test that repeated lookups hand out one long-lived client and count cache hits."""
+    registry = ModelRegistry()
+
+    first = registry.get("gpt-4o-mini", temperature=0)
+    second = registry.get("gpt-4o-mini", temperature=0)
+    other = registry.get("gpt-4o-mini", temperature=0.5)
+
+    assert first is second
+    assert other is not first
+    stats = registry.stats()
+    assert stats.hits == 1
+    assert stats.misses == 2
+
+
+def test_registry_keys_structured_output_by_schema(openai_key):
+    """Test that structured-output clients are cached per schema and share the base client's pool."""
+    registry = ModelRegistry()
+
+    base = registry.get("gpt-4o-mini")
+    structured = registry.get("gpt-4o-mini", schema=VerdictResponse)
+
+    assert structured is registry.get("gpt-4o-mini", schema=VerdictResponse)
+    assert structured is not base
+    assert base.http_client is registry.get("gpt-4o-mini", temperature=1).http_client
+
+
+def test_nodes_reuse_pooled_connection_across_calls(openai_key):
+    """Test that node calls go through the shared registry and reuse one keep-alive connection."""
+    with FakeOpenAIServer() as server:
+        def factory(model, temperature, http_client, http_async_client):
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                base_url=server.base_url,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+
+        previous = set_model_registry(ModelRegistry(model_factory=factory))
+        try:
+            state = {"email_subject": "Outage", "email_body": "Everything is down."}
+            for _ in range(3):
+                assert check_email_attention(state) == {"requires_attention": True}
+            stats = get_model_registry().stats()
+        finally:
+            set_model_registry(previous).close()
+
+    assert server.request_count == 3
+    assert stats.hits == 2
+    assert stats.misses == 1
+    assert stats.requests == 3
+    assert stats.connections_opened == 1
+    assert stats.pool_reuse == 2
+
+
+def test_aclose_closes_both_connection_pools(openai_key):
+    """Test that aclose shuts the async pool on its own loop as well as the sync pool."""
+    registry = ModelRegistry()
+    model = registry.get("gpt-4o-mini")
+
+    asyncio.run(registry.aclose())
+
+    assert model.http_client.is_closed
+    assert model.http_async_client.is_closed
+    assert registry.get("gpt-4o-mini") is not model
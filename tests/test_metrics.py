@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from simple_agent.agent import create_graph
+from simple_agent.batch import process_emails
+from simple_agent.metrics import GraphMetrics, TokenUsage, UsageHandler, estimate_cost
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import check_email_attention_stubbed, slow_node, summarize_email_stubbed
+
+
+def test_records_wall_and_queue_time_per_node_and_per_email():
+    """Test that stub-node runs fill node histograms and close one email run each."""
+    metrics = GraphMetrics()
+    graph = create_graph(
+        summarize_email=slow_node(summarize_email_stubbed, 0.05),
+        check_email_attention=check_email_attention_stubbed,
+        metrics=metrics,
+    )
+
+    process_emails([make_email(), make_email("Meeting notes")], graph=graph, max_concurrency=2)
+
+    snapshot = metrics.snapshot()
+    nodes = snapshot["nodes"]
+    assert nodes["summarize_email"]["calls"] == 2
+    assert nodes["summarize_email"]["duration_seconds"]["sum"] >= 0.1
+    assert nodes["create_jira_ticket"]["calls"] == 1
+    assert nodes["log_no_attention_needed"]["calls"] == 1
+    # join_triage waits for the slow summary, so its queue time is measured from that node's end.
+    assert nodes["join_triage"]["queue_seconds"]["count"] == 2
+    assert nodes["join_triage"]["queue_seconds"]["sum"] < 0.1
+    assert snapshot["emails"]["completed"] == 2
+    assert snapshot["emails"]["in_flight"] == 0
+    assert snapshot["emails"]["duration_seconds"]["sum"] >= 0.1
+
+
+def test_records_token_usage_and_cost_from_response_metadata(fake_model):
+    """Test that LLM usage is attributed to the node that made the call and summed per email."""
+    metrics = GraphMetrics()
+    create_graph(metrics=metrics).invoke(make_email())
+
+    nodes = metrics.snapshot()["nodes"]
+    for name in ("summarize_email", "check_email_attention"):
+        node = nodes[name]
+        assert node["input_tokens"] > 0 and node["output_tokens"] > 0
+        assert node["cost_usd"] == pytest.approx(estimate_cost("gpt-4o-mini", node["input_tokens"], node["output_tokens"]))
+    assert nodes["create_jira_ticket"]["input_tokens"] == 0
+
+    emails = metrics.snapshot()["emails"]
+    expected_tokens = sum(nodes[name]["input_tokens"] + nodes[name]["output_tokens"] for name in nodes)
+    assert emails["tokens"]["sum"] == expected_tokens
+    assert emails["cost_usd"]["sum"] > 0
+
+
+def test_usage_handler_counts_every_model_call_in_an_invocation(fake_model):
+    """Test that a UsageHandler passed in the config tallies calls and tokens across all nodes."""
+    metrics = GraphMetrics()
+    usage = TokenUsage()
+    create_graph(metrics=metrics).invoke(make_email(), config={"callbacks": [UsageHandler(usage)]})
+
+    assert usage.llm_calls == fake_model.calls == 2
+    assert usage.total_tokens == metrics.snapshot()["emails"]["tokens"]["sum"]
+
+
+def test_async_graph_is_instrumented(fake_model):
+    """Test that async nodes record usage the same way."""
+    metrics = GraphMetrics()
+    asyncio.run(create_graph(use_async=True, metrics=metrics).ainvoke(make_email()))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["nodes"]["summarize_email"]["input_tokens"] > 0
+    assert snapshot["emails"]["completed"] == 1
+
+
+def test_failed_node_counts_error_and_failed_email():
+    """Test that a raising node is recorded as an error and closes the email run."""
+    def broken_jira(state):
+        raise ConnectionError("Jira unavailable")
+
+    metrics = GraphMetrics()
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        create_jira_ticket=broken_jira,
+        metrics=metrics,
+    )
+    process_emails([make_email()], graph=graph)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["nodes"]["create_jira_ticket"]["errors"] == 1
+    assert snapshot["emails"]["failed"] == 1
+    assert snapshot["emails"]["completed"] == 0
+
+
+def test_prometheus_text_has_cumulative_histograms():
+    """Test the exporter output format for node and email metrics."""
+    metrics = GraphMetrics()
+    graph = create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        metrics=metrics,
+    )
+    graph.invoke(make_email())
+
+    text = metrics.to_prometheus()
+    assert "# TYPE email_agent_node_duration_seconds histogram" in text
+    assert 'email_agent_node_calls_total{node="summarize_email"} 1' in text
+    assert 'email_agent_emails_total{outcome="completed"} 1' in text
+    assert 'email_agent_node_duration_seconds_bucket{node="summarize_email",le="+Inf"} 1' in text
+    buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith('email_agent_node_duration_seconds_bucket{node="summarize_email"')
+    ]
+    assert buckets == sorted(buckets)
+    assert text.endswith("\n")
+
+
+def test_json_dump_round_trips(tmp_path):
+    """Test that the JSON dump is the snapshot."""
+    metrics = GraphMetrics()
+    create_graph(
+        summarize_email=summarize_email_stubbed,
+        check_email_attention=check_email_attention_stubbed,
+        metrics=metrics,
+    ).invoke(make_email())
+
+    path = tmp_path / "metrics.json"
+    metrics.dump_json(str(path))
+
+    assert json.loads(path.read_text()) == metrics.snapshot()
+
+
+def test_wrapper_overhead_is_negligible():
+    """Test that instrumenting a node adds only microseconds per call."""
+    metrics = GraphMetrics()
+    node = metrics.wrap("noop", lambda state: {}, terminal=True)
+    calls = 20_000
+
+    states = [make_email(f"Email {i}") for i in range(calls)]
+
+    start = time.perf_counter()
+    for state in states:
+        node(state)
+    per_call = (time.perf_counter() - start) / calls
+
+    assert per_call < 50e-6
+    assert metrics.snapshot()["emails"]["completed"] == calls
@@ -0,0 +1,38 @@
+import asyncio
+
+from simple_agent.agent import create_graph
+from simple_agent.cache import ResponseCache
+from simple_agent.nodes import asummarize_and_classify_email, summarize_and_classify_email
+from tests.conftest import make_email
+from tests.stubs.fake_chat_model import FAKE_SUMMARY
+
+URGENT_EMAIL = make_email("URGENT: outage", "Production is down.")
+
+
+def test_summarize_and_classify_email_makes_one_structured_call(fake_model):
+    """Test that the combined node returns both fields from a single LLM call."""
+    result = summarize_and_classify_email(URGENT_EMAIL)
+
+    assert result == {"email_summary": FAKE_SUMMARY, "requires_attention": True}
+    assert fake_model.calls == 1
+
+
+def test_asummarize_and_classify_email_uses_cache(fake_model):
+    """Test that the async combined node serves repeats from the response cache."""
+    cache = ResponseCache()
+
+    first = asyncio.run(asummarize_and_classify_email(URGENT_EMAIL, response_cache=cache))
+    second = asyncio.run(asummarize_and_classify_email(URGENT_EMAIL, response_cache=cache))
+
+    assert first == second
+    assert fake_model.calls == 1
+
+
+def test_single_call_graph_halves_llm_calls(fake_model):
+    """Test that the default single-call graph makes one LLM call per email instead of two."""
+    graph = create_graph(single_call=True)
+
+    result = graph.invoke({**URGENT_EMAIL, "email_summary": None, "requires_attention": None, "jira_ticket_id": None})
+
+    assert result["jira_ticket_id"].startswith("JIRA-")
+    assert fake_model.calls == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from eval.dataset import load_dataset
+from simple_agent.agent import create_graph
+from simple_agent.preclassifier import PreClassifier, Rule
+from simple_agent.preprocess import prompt_body
+from tests.conftest import make_email
+from tests.stubs.stub_nodes import summarize_email_stubbed
+
+@pytest.mark.parametrize("subject,body,expected", [
+    ("URGENT: Production server is down", "Customers cannot access the service.", True),
+    ("Feature request: Dark mode", "I would love to see a dark mode option.", False),
+    ("Newsletter subscription inquiry", "Please add me to your newsletter.", False),
+    ("Question about API documentation", "Where are the webhook docs?", None),
+    ("Urgent feature request", "We would love to see CSV export.", None),
+])
+def test_classify_decides_only_one_sided_evidence(subject, body, expected):
+    """Test that strong one-sided evidence is decided locally and mixed or weak evidence escalates."""
+    result = PreClassifier().classify(subject, body)
+
+    assert result.requires_attention is expected
+
+
+def test_custom_rules_and_thresholds():
+    """Test that confidence rules and thresholds are configurable."""
+    classifier = PreClassifier(rules=[Rule("pager", r"\bpagerduty\b", 1.0)], attention_threshold=1.0)
+
+    assert classifier.classify("PagerDuty alert", "").requires_attention is True
+    assert classifier.classify("Hello", "").requires_attention is None
+
+
+def test_local_decisions_agree_with_dataset_labels():
+    """Test that every email decided locally on eval/dataset.jsonl matches its label."""
+    classifier = PreClassifier()
+
+    for case in load_dataset():
+        result = classifier.classify(case["inputs"]["email_subject"], prompt_body(case["inputs"], "check_email_attention"))
+        if result.decided:
+            assert result.requires_attention == case["outputs"]["requires_attention"], case["inputs"]["email_subject"]
+    assert classifier.stats().local_decision_rate >= 0.5
+
+
+def test_graph_skips_llm_for_locally_decided_emails(fake_model):
+    """Test that only escalated emails reach the LLM classifier and counters reflect it."""
+    classifier = PreClassifier()
+    graph = create_graph(summarize_email=summarize_email_stubbed, pre_classifier=classifier)
+
+    urgent = graph.invoke(make_email("URGENT: Production server is down", "This is a critical outage."))
+    ambiguous = graph.invoke(make_email("Question about API documentation", "Where are the webhook docs?"))
+
+    assert urgent["jira_ticket_id"].startswith("JIRA-")
+    assert ambiguous["requires_attention"] is False
+    assert fake_model.calls == 1
+    stats = classifier.stats()
+    assert (stats.local_attention, stats.local_no_attention, stats.escalated) == (1, 0, 1)
+    assert stats.local_decision_rate == 0.5
+
+
+def test_quoted_history_does_not_decide_a_reply(fake_model):
+    """Test that the tier scores the cleaned body, so an outage quoted under a thank-you is not urgent."""
+    classifier = PreClassifier()
+    graph = create_graph(summarize_email=summarize_email_stubbed, pre_classifier=classifier)
+    body = (
+        "Thank you, everything works again. Keep up the good work!\n\n"
+        "On Mon, Jan 6, 2025 at 10:02 AM Support <support@company.com> wrote:\n"
+        "> URGENT: the production server is down and customers cannot access the service.\n"
+    )
+
+    result = graph.invoke(make_email("Re: Thank you", body))
+
+    assert result["requires_attention"] is False
+    assert classifier.stats().local_no_attention == 1
+    assert fake_model.calls == 0
+
+
+def test_async_graph_wraps_async_llm_node(fake_model):
+    """Test that the tiered node stays async when wrapping the async LLM node."""
+    classifier = PreClassifier()
+    graph = create_graph(use_async=True, pre_classifier=classifier)
+
+    result = asyncio.run(graph.ainvoke(make_email("Thank you for the great service", "Keep up the good work!")))
+
+    assert result["requires_attention"] is False
+    assert fake_model.calls == 1
+    assert classifier.stats().local_no_attention == 1
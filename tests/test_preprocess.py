@@ -0,0 +1,124 @@
+from concurrent.futures import Future
+
+import pytest
+
+from eval.dataset import load_dataset
+from simple_agent.agent import create_graph
+from simple_agent.nodes import build_attention_messages, create_jira_ticket
+from simple_agent.preprocess import TOKEN_BUDGETS, clean_email_body, estimate_tokens, truncate_to_budget
+from tests.conftest import make_email
+from tests.stubs.email_threads import SIGNATURE, with_thread_noise
+from tests.stubs.fake_chat_model import keyword_responder
+
+class RecordingResponder:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, messages):
+        self.prompts.append(messages[-1].content)
+        return keyword_responder(messages)
+
+
+@pytest.fixture
+def recorder(fake_model):
+    fake_model.responder = RecordingResponder()
+    return fake_model.responder
+
+
+def test_cleaning_a_threaded_email_recovers_the_newest_message():
+    """Test that quoted history, signatures and disclaimers are removed from every eval email."""
+    bodies = [example["inputs"]["email_body"] for example in load_dataset()]
+    for index, body in enumerate(bodies):
+        threaded = with_thread_noise(body, bodies[index + 1:index + 5] or bodies[:4])
+
+        assert clean_email_body(threaded) == body
+        assert estimate_tokens(threaded) > 5 * estimate_tokens(body)
+
+
+def test_cleaning_keeps_content_it_cannot_attribute_to_a_thread():
+    """Test that forwarded reports, mid-text thanks and bare sign-offs are not stripped."""
+    forwarded = "FYI, see below.\n---------- Forwarded message ---------\nFrom: Ops\nDate: Mon\n\nThe API is down."
+    assert clean_email_body(forwarded) == forwarded
+    assert clean_email_body("Thanks for the fix, but exports fail again.\n\nBest regards,\nAnn") == (
+        "Thanks for the fix, but exports fail again."
+    )
+    assert clean_email_body("Thanks") == "Thanks"
+    assert clean_email_body("Short note.\n\nFrom: Bob\nSent: Monday\nTo: Support\n\nOld text") == "Short note."
+    assert clean_email_body(f"The dashboard is blank.\n-- \n{SIGNATURE}") == "The dashboard is blank."
+
+
+def test_cleaning_keeps_postscripts_and_sentences_after_a_sign_off():
+    """Test that a P.S. survives signature stripping and a sign-off followed by prose is not cut."""
+    body = "The export fails.\n\nThanks,\nJane\n\nP.S. This is blocking payroll, we need a fix today or we cancel."
+    assert clean_email_body(body) == (
+        "The export fails.\n\nP.S. This is blocking payroll, we need a fix today or we cancel."
+    )
+    assert clean_email_body(f"The dashboard is blank.\n-- \n{SIGNATURE}\nPS: it is blank for all users") == (
+        "The dashboard is blank.\n\nPS: it is blank for all users"
+    )
+    prose = "Exports fail.\n\nThanks,\nbut it broke again overnight and we lost the whole batch.\nJane"
+    assert clean_email_body(prose) == prose
+
+
+def test_quoted_lines_are_only_dropped_after_a_reply_header():
+    """Test that pasted ">" logs in a new email are kept, while bottom-posted quotes are removed."""
+    pasted = "Export crashes with:\n> ERROR payroll.export: timeout\n> retrying (3/3)\nPlease advise."
+    assert clean_email_body(pasted) == pasted
+    bottom_posted = "On Mon, Jan 6, 2025 at 9:14 AM Ops <ops@company.com> wrote:\n> Is it fixed?\n>\n\nNo, still down."
+    assert clean_email_body(bottom_posted) == "On Mon, Jan 6, 2025 at 9:14 AM Ops <ops@company.com> wrote:\n\nNo, still down."
+
+
+def test_truncation_keeps_head_and_tail_within_budget():
+    """Test head/tail preservation when a body exceeds the budget."""
+    body = "START " + "filler " * 2000 + "END"
+
+    truncated = truncate_to_budget(body, 100)
+
+    assert truncated.startswith("START ")
+    assert truncated.endswith("END")
+    assert "characters omitted" in truncated
+    assert estimate_tokens(truncated) <= 110
+    assert truncate_to_budget("short body", 100) == "short body"
+
+
+def test_prompts_use_each_nodes_budget():
+    """Test that the attention prompt is capped at its own, smaller budget."""
+    state = make_email("Follow-up", "word " * 10_000)
+
+    prompt = build_attention_messages(state)[-1].content
+
+    assert estimate_tokens(prompt) < TOKEN_BUDGETS["check_email_attention"] + 50
+
+
+def test_graph_prompts_and_ticket_use_the_cleaned_body(recorder):
+    """Test that the preprocessing node feeds both LLM nodes, and triage matches the unthreaded email."""
+    bodies = [example["inputs"]["email_body"] for example in load_dataset()]
+    history = [body for body in bodies if "urgent" in body.lower() or "immediately" in body.lower()]
+    body = "Could you add a dark mode option to the dashboard?"
+
+    result = create_graph().invoke(make_email("Follow-up", with_thread_noise(body, history)))
+
+    assert result["clean_email_body"] == body
+    assert len(recorder.prompts) == 2
+    assert all(body in prompt and ">" not in prompt and "CONFIDENTIALITY" not in prompt for prompt in recorder.prompts)
+    # The quoted history is full of urgent keywords; triage only sees the new message.
+    assert result["requires_attention"] is False
+
+
+def test_ticket_description_uses_the_cleaned_body():
+    """Test that the Jira description copies the cleaned body rather than the whole thread."""
+    class CapturingBatcher:
+        def submit(self, request):
+            self.request = request
+            future = Future()
+            future.set_result("JIRA-1")
+            return future
+
+    batcher = CapturingBatcher()
+    body = "URGENT: checkout is failing for all customers."
+    state = make_email("Follow-up", with_thread_noise(body, [body]))
+    state["clean_email_body"] = clean_email_body(state["email_body"])
+
+    create_jira_ticket(state, ticket_batcher=batcher)
+
+    assert batcher.request.description.endswith(f"Body:\n{body}")
@@ -0,0 +1,293 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from simple_agent.llm import ModelRegistry, get_model_registry, openai_model_factory, set_model_registry
+from simple_agent.nodes import acheck_email_attention, check_email_attention
+from simple_agent.ratelimit import (
+    AsyncRateLimitedTransport,
+    RateLimitedTransport,
+    RateLimiter,
+    estimate_request_tokens,
+    parse_duration,
+    parse_retry_after,
+)
+from tests.stubs.fake_openai_server import FakeOpenAIServer
+
+STATE = {"email_subject": "Outage", "email_body": "Everything is down."}
+UNLIMITED = 1e9
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def openai_key(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+
+def _use_server(server, limiter):
+    """Install a registry whose models talk to the fake server through `limiter`."""
+    def factory(model, temperature, http_client, http_async_client):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            base_url=server.base_url,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            max_retries=0,
+        )
+
+    return set_model_registry(ModelRegistry(model_factory=factory, rate_limiter=limiter))
+
+
+def test_requests_are_paced_to_the_per_minute_limit():
+    """Test that a burst beyond capacity is spread at the refill rate."""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=600, clock=clock)
+
+    waits = [limiter.reserve(1) for _ in range(12)]
+
+    assert waits[:10] == [0.0] * 10
+    assert waits[10:] == pytest.approx([0.1, 0.2])
+    clock.now += 1.2
+    assert limiter.reserve(1) == 0.0
+    assert limiter.stats().throttled == 2
+
+
+def test_tokens_are_budgeted_and_oversized_requests_borrow():
+    """Test the tokens/min bucket, including a request larger than its burst capacity."""
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=6000, clock=clock)
+
+    assert limiter.reserve(80) == 0.0
+    assert limiter.reserve(80) == pytest.approx(0.6)
+
+    limiter = RateLimiter(tokens_per_minute=6000, clock=clock)
+    assert limiter.reserve(500) == 0.0
+    assert limiter.reserve(10) == pytest.approx(4.1)
+
+
+def test_headers_replace_limits_and_pause_until_reset():
+    """Test that server limits are adopted and an exhausted budget pauses until its reset."""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60_000, clock=clock)
+
+    limiter.observe({
+        "x-ratelimit-limit-requests": "120",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1.5s",
+        "x-ratelimit-limit-tokens": "30000",
+    })
+
+    stats = limiter.stats()
+    assert stats.requests_per_minute == 120
+    assert stats.tokens_per_minute == 30_000
+    assert limiter.reserve(1) == pytest.approx(1.5)
+
+
+def test_retry_after_pauses_every_caller_and_adds_jitter():
+    """Test that a 429 with Retry-After holds back all requests, and the retry is jittered."""
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, backoff_base=0.5, rng=random.Random(0))
+
+    delay = limiter.retry_delay(0, retry_after=2.0)
+
+    assert 2.0 <= delay <= 2.5
+    assert limiter.reserve(1) == pytest.approx(2.0)
+    assert limiter.stats().rate_limited == 1
+
+
+def test_backoff_without_retry_after_is_full_jitter_and_capped():
+    """Test exponential backoff bounds when the server gives no Retry-After."""
+    limiter = RateLimiter(backoff_base=0.5, backoff_max=3.0, rng=random.Random(1))
+
+    delays = [limiter.retry_delay(attempt, None) for attempt in range(8)]
+
+    assert all(0 <= delay <= min(3.0, 0.5 * 2 ** attempt) for attempt, delay in enumerate(delays))
+    assert len(set(delays)) == len(delays)
+
+
+def test_header_parsing():
+    """Test duration, Retry-After and request token estimate parsing."""
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration(None) is None
+    assert parse_retry_after({"retry-after-ms": "250", "retry-after": "1"}) == 0.25
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert parse_retry_after({}) is None
+    assert estimate_request_tokens(b'{"messages": [{"role": "user", "content": "abcdefgh"}], "max_tokens": 10}') == 12
+
+
+def test_bulk_run_holds_the_server_limit_without_failures(openai_key):
+    """Test that concurrent node calls are paced to the server's limit, so 429s stay rare and are retried."""
+    with FakeOpenAIServer(requests_per_minute=1200) as server:
+        limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=UNLIMITED, backoff_base=0.05)
+        previous = _use_server(server, limiter)
+        try:
+            check_email_attention(STATE)  # client construction is slow; keep it out of the timing
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                results = list(pool.map(lambda _: check_email_attention(STATE), range(40)))
+            elapsed = time.perf_counter() - start
+        finally:
+            set_model_registry(previous).close()
+
+    assert results == [{"requires_attention": True}] * 40
+    # Pacing is computed at send time; connection jitter can still bunch two requests together.
+    assert server.rate_limited <= 5
+    # About 20 requests fit the one-second burst; the rest go out at 20/s.
+    assert 0.9 <= elapsed < 2.0
+    assert limiter.stats().throttled >= 15
+
+
+def test_overconfigured_limiter_adapts_to_server_headers_and_retries(openai_key):
+    """Test that 429s from a too-high local limit are retried and the server limit is adopted."""
+    with FakeOpenAIServer(requests_per_minute=1200) as server:
+        limiter = RateLimiter(requests_per_minute=60_000, tokens_per_minute=UNLIMITED, backoff_base=0.05)
+        previous = _use_server(server, limiter)
+        try:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                results = list(pool.map(lambda _: check_email_attention(STATE), range(40)))
+        finally:
+            set_model_registry(previous).close()
+
+    assert results == [{"requires_attention": True}] * 40
+    stats = limiter.stats()
+    assert stats.requests_per_minute == 1200
+    assert stats.retries == server.rate_limited
+
+
+def test_rate_limited_call_waits_for_retry_after_and_succeeds(openai_key):
+    """Test that a 429 is retried after Retry-After instead of failing the node."""
+    with FakeOpenAIServer() as server:
+        limiter = RateLimiter(backoff_base=0.01)
+        previous = _use_server(server, limiter)
+        server.reject_next(2, retry_after=0.2)
+        try:
+            start = time.perf_counter()
+            result = check_email_attention(STATE)
+            elapsed = time.perf_counter() - start
+        finally:
+            set_model_registry(previous).close()
+
+    assert result == {"requires_attention": True}
+    assert elapsed >= 0.4
+    stats = limiter.stats()
+    assert stats.retries == 2
+    assert stats.requests == 3
+
+
+def test_exhausted_retries_surface_the_rate_limit_error(openai_key):
+    """Test that the 429 reaches the caller once max_retries is spent."""
+    from openai import RateLimitError
+
+    with FakeOpenAIServer() as server:
+        limiter = RateLimiter(max_retries=1, backoff_base=0.01)
+        previous = _use_server(server, limiter)
+        server.reject_next(2, retry_after=0.01)
+        try:
+            with pytest.raises(RateLimitError):
+                check_email_attention(STATE)
+        finally:
+            set_model_registry(previous).close()
+
+    assert limiter.stats().rate_limited == 2
+
+
+def test_token_limit_is_enforced_across_requests():
+    """Test that requests with large prompts are paced by tokens/min rather than requests/min."""
+    with FakeOpenAIServer(tokens_per_minute=60_000) as server:
+        registry = ModelRegistry(rate_limiter=RateLimiter(tokens_per_minute=60_000, backoff_base=0.05))
+        client = registry._http_clients()[0]
+        body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "x" * 1600}], "max_tokens": 100}
+        try:
+            start = time.perf_counter()
+            statuses = [client.post(f"{server.base_url}/chat/completions", json=body).status_code for _ in range(6)]
+            elapsed = time.perf_counter() - start
+        finally:
+            registry.close()
+
+    # 500 tokens per request against a 1000-token burst refilling at 1000/s. The first request
+    # pays for connection setup, which can make the next paced one land a moment early.
+    assert statuses == [200] * 6
+    assert server.rate_limited <= 1
+    assert elapsed >= 1.8
+
+
+def test_async_calls_share_the_same_budget(openai_key):
+    """Test that async node calls are paced by the same limiter."""
+    with FakeOpenAIServer(requests_per_minute=1200) as server:
+        limiter = RateLimiter(requests_per_minute=1200, tokens_per_minute=UNLIMITED, backoff_base=0.05)
+        previous = _use_server(server, limiter)
+        try:
+            async def run():
+                return await asyncio.gather(*(acheck_email_attention(STATE) for _ in range(30)))
+
+            results = asyncio.run(run())
+            registry_limiter = get_model_registry().rate_limiter
+        finally:
+            set_model_registry(previous)
+
+    assert registry_limiter is limiter
+    assert results == [{"requires_attention": True}] * 30
+    assert server.rate_limited <= 5
+    assert limiter.stats().requests == 30 + server.rate_limited
+
+
+class ScriptedUpstream(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Upstream transport that fails as scripted (a status code or an exception), then answers 200."""
+
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.attempts = 0
+
+    def _respond(self, request):
+        self.attempts += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure, headers={"retry-after-ms": "1"}, request=request)
+        return httpx.Response(200, json={"ok": True}, request=request)
+
+    def handle_request(self, request):
+        return self._respond(request)
+
+    async def handle_async_request(self, request):
+        return self._respond(request)
+
+
+def _request():
+    return httpx.Request("POST", "http://llm/v1/chat/completions", json={"messages": []})
+
+
+def test_transient_failures_are_retried_by_the_transport_alone(openai_key):
+    """Test that connection errors and 5xx are retried up to max_transient_retries, and the SDK does not retry."""
+    limiter = RateLimiter(backoff_base=0.001)
+    recovered = ScriptedUpstream(httpx.ConnectError("refused"), 503)
+    assert RateLimitedTransport(recovered, limiter).handle_request(_request()).status_code == 200
+    assert recovered.attempts == 3
+
+    exhausted = ScriptedUpstream(500, 502, 504)
+    assert RateLimitedTransport(exhausted, limiter).handle_request(_request()).status_code == 504
+    assert exhausted.attempts == 3
+
+    unreachable = ScriptedUpstream(*[httpx.ConnectTimeout("timed out")] * 3)
+    with pytest.raises(httpx.ConnectTimeout):
+        asyncio.run(AsyncRateLimitedTransport(unreachable, limiter).handle_async_request(_request()))
+    assert unreachable.attempts == 3
+
+    model = openai_model_factory("gpt-4o-mini", 0, httpx.Client(), httpx.AsyncClient())
+    assert model.max_retries == 0
@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import simple_agent.agent as agent
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run(code: str):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_the_agent_defers_llm_imports_and_graph_compilation():
+    """Test that a cold import neither compiles the default graph nor loads the OpenAI client stack."""
+    loaded = _run(
+        "import json, sys\n"
+        "import simple_agent.agent as agent\n"
+        "print(json.dumps({\n"
+        "    'compiled': agent._graph is not None,\n"
+        "    'modules': [name for name in ('langchain_openai', 'openai', "
+        "'langchain_core.language_models.chat_models') if name in sys.modules],\n"
+        "}))\n"
+    )
+
+    assert loaded == {"compiled": False, "modules": []}
+
+
+def test_default_graph_is_compiled_once_on_first_access():
+    """Test that `graph` (the langgraph.json entry point) resolves lazily to the memoized default graph."""
+    from simple_agent.agent import graph
+
+    assert graph is agent.get_graph()
+    assert agent.graph is graph
+    assert "summarize_email" in graph.nodes
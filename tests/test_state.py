@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from simple_agent.agent import create_graph
+from simple_agent.checkpoint import invoke_email
+from simple_agent.dedup import IncidentIndex
+from simple_agent.preclassifier import PreClassifier
+from simple_agent.preprocess import clean_email_body
+from simple_agent.state import CompactEmailState, EmailState
+from tests.conftest import make_email
+from tests.stubs.fake_chat_model import FAKE_SUMMARY
+from tests.stubs.stub_nodes import summarize_email_stubbed
+
+
+def test_compact_state_round_trips_and_reads_like_the_typed_dict():
+    """Test conversion both ways and the dict-style reads the nodes rely on."""
+    state = CompactEmailState.from_dict(make_email())
+
+    assert state["email_subject"] == "URGENT: Production server is down"
+    assert state["requires_attention"] is None
+    assert state.get("clean_email_body", "fallback") == "fallback"
+    assert "email_body" in state and "email_summary" not in state
+    assert state.to_dict() == {key: value for key, value in make_email().items() if value is not None}
+    assert state == make_email()
+    assert not hasattr(state, "__dict__")
+    with pytest.raises(KeyError):
+        state["unknown"]
+
+
+def test_compact_state_shares_unchanged_bodies_and_interns_recipients():
+    """Test that an unchanged cleaned body and repeated recipients are not stored twice."""
+    body = "The dashboard is blank."
+    copy = "".join(["The dashboard ", "is blank."])
+
+    first = CompactEmailState(body, "Dashboard", "".join(["support@", "company.com"]), clean_email_body=copy)
+    second = CompactEmailState(body, "Dashboard", "".join(["support@", "company.com"]))
+
+    assert first.clean_email_body is body
+    assert first.email_to is second.email_to
+    assert clean_email_body(body) is body
+
+
+def test_graph_runs_on_the_compact_schema(fake_model):
+    """Test that the default nodes run unchanged on CompactEmailState, from dict or compact input."""
+    graph = create_graph(compact_state=True)
+
+    from_dict = graph.invoke(make_email())
+    from_compact = graph.invoke(CompactEmailState.from_dict(make_email()))
+
+    assert {key: value for key, value in from_compact.items() if value is not None} == from_dict
+    assert from_dict["email_summary"] == FAKE_SUMMARY
+    assert from_dict["requires_attention"] is True
+    assert from_dict["jira_ticket_id"].startswith("JIRA-")
+    assert from_dict["clean_email_body"] == make_email()["email_body"]
+
+
+def test_async_checkpointed_graph_accepts_compact_state(fake_model):
+    """Test the async nodes and invoke_email's thread id with compact input."""
+    async_graph = create_graph(use_async=True, compact_state=True)
+    result = asyncio.run(async_graph.ainvoke(CompactEmailState.from_dict(make_email("Weekly notes"))))
+    assert result["requires_attention"] is False
+
+    checkpointed = create_graph(compact_state=True, checkpointer=InMemorySaver())
+    assert invoke_email(checkpointed, CompactEmailState.from_dict(make_email()))["jira_ticket_id"].startswith("JIRA-")
+
+
+def test_nodes_in_a_compact_graph_receive_compact_records():
+    """Test that the metrics, pre-classifier and incident wrappers do not coerce the input back to a dict."""
+    received = {}
+
+    def recording(name, node):
+        def record(state: EmailState) -> EmailState:
+            received[name] = type(state)
+            return node(state)
+        return record
+
+    def create_ticket(state: EmailState) -> EmailState:
+        received["create_jira_ticket"] = type(state)
+        return {"jira_ticket_id": "JIRA-1"}
+
+    graph = create_graph(
+        summarize_email=recording("summarize_email", summarize_email_stubbed),
+        check_email_attention=recording("check_email_attention", lambda state: {"requires_attention": True}),
+        create_jira_ticket=create_ticket,
+        pre_classifier=PreClassifier(),
+        incident_index=IncidentIndex(),
+        compact_state=True,
+    )
+    # Escalated by the pre-classifier, so the wrapped LLM node runs
+    graph.invoke(make_email("Server issue"))
+
+    assert received == {
+        "summarize_email": CompactEmailState,
+        "check_email_attention": CompactEmailState,
+        "create_jira_ticket": CompactEmailState,
+    }
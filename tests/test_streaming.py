@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from simple_agent.agent import create_graph
+from simple_agent.llm import ModelRegistry, set_model_registry
+from simple_agent.metrics import GraphMetrics
+from simple_agent.nodes import summarize_email
+from tests.conftest import make_email
+from tests.stubs.fake_chat_model import FAKE_SUMMARY
+from tests.stubs.fake_openai_server import FakeOpenAIServer
+
+pytestmark = pytest.mark.fake_model(chunk_latency=0.02)
+
+
+def test_messages_mode_streams_summary_tokens(fake_model):
+    """Test that stream_mode="messages" yields the summary in several chunks tagged with its node."""
+    graph = create_graph(metrics=GraphMetrics())
+
+    chunks = [
+        message.content
+        for message, metadata in graph.stream(make_email(), stream_mode="messages")
+        if metadata["langgraph_node"] == "summarize_email" and message.content
+    ]
+
+    assert len(chunks) == len(FAKE_SUMMARY.split())
+    assert "".join(chunks) == FAKE_SUMMARY
+
+
+def test_custom_mode_emits_growing_partial_summaries_before_the_call_ends(fake_model):
+    """Test that partial email_summary updates arrive well before the summary is complete."""
+    graph = create_graph(metrics=GraphMetrics())
+
+    start = time.perf_counter()
+    partials = []
+    for mode, chunk in graph.stream(make_email(), stream_mode=["custom", "values"]):
+        if mode == "custom":
+            partials.append((time.perf_counter() - start, chunk["email_summary"]))
+        else:
+            final = chunk
+    total = time.perf_counter() - start
+
+    texts = [text for _, text in partials]
+    assert texts[-1] == final["email_summary"] == FAKE_SUMMARY
+    assert all(FAKE_SUMMARY.startswith(text) for text in texts)
+    assert len(texts) == len(FAKE_SUMMARY.split())
+    assert partials[0][0] < total / 2
+
+
+def test_async_graph_streams_partial_summaries(fake_model):
+    """Test that the async summarize node streams through astream the same way."""
+    graph = create_graph(use_async=True, metrics=GraphMetrics())
+
+    async def run():
+        return [chunk["email_summary"] async for chunk in graph.astream(make_email(), stream_mode="custom")]
+
+    partials = asyncio.run(run())
+
+    assert len(partials) > 1
+    assert partials[-1] == FAKE_SUMMARY
+
+
+def test_streamed_summary_still_reports_token_usage(fake_model):
+    """Test that usage from the final streamed chunk reaches the node metrics."""
+    metrics = GraphMetrics()
+    create_graph(metrics=metrics).invoke(make_email())
+
+    assert metrics.snapshot()["nodes"]["summarize_email"]["output_tokens"] == len(FAKE_SUMMARY.split())
+
+
+def test_summarize_node_works_outside_a_graph(fake_model):
+    """Test that calling the node directly, with no stream writer available, still returns the summary."""
+    assert summarize_email(make_email()) == {"email_summary": FAKE_SUMMARY}
+
+
+def test_openai_client_streams_through_the_pooled_transport(monkeypatch):
+    """Test that the real chat client streams the summary over the shared, rate-limited pool with usage."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    with FakeOpenAIServer(responder=lambda body: FAKE_SUMMARY) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        previous = set_model_registry(ModelRegistry())
+        try:
+            metrics = GraphMetrics()
+            graph = create_graph(
+                check_email_attention=lambda state: {"requires_attention": False},
+                metrics=metrics,
+            )
+            partials = [chunk["email_summary"] for chunk in graph.stream(make_email(), stream_mode="custom")]
+        finally:
+            set_model_registry(previous).close()
+
+    assert server.requests[0]["stream"] is True
+    assert partials[-1] == FAKE_SUMMARY
+    assert len(partials) == len(FAKE_SUMMARY.split())
+    assert metrics.snapshot()["nodes"]["summarize_email"]["input_tokens"] == 10